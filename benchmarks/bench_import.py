@@ -0,0 +1,79 @@
+"""
+Compare serial and process-pool row validation in cases.importer.
+
+Writes an N-row CSV (with a few bad and duplicate rows), then times
+scan_csv() with one worker and with --workers processes, reporting rows/sec
+for each. Both runs must produce the same scan (errors, duplicates, count).
+The speedup is bounded by the CPU cores available and by the per-chunk
+database checks, which always run in the calling process.
+
+    python benchmarks/bench_import.py --rows 100000 --workers 4 --chunk 1000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+HEADER = "Client Name,Phone,Email,Firm Name,Case Type,Case Status,Date Opened,Notes,Status Note\n"
+
+
+def _setup_django(db_path: str) -> None:
+    os.environ["DJANGO_DB_PATH"] = db_path
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+
+def _csv(rows: int) -> bytes:
+    out = io.StringIO()
+    out.write(HEADER)
+    for i in range(rows):
+        if i % 997 == 1:
+            out.write(f"Client {i},5550000000,client{i}@example.com,Acme Law,Bogus Type,Case Signed,2024-01-02,n,s\n")
+        elif i % 1009 == 2:
+            out.write("Client 0,5550000000,client0@example.com,Acme Law,Work Injury,Case Signed,2024-01-02,notes 0,note 0\n")
+        else:
+            out.write(
+                f"Client {i},555{i % 10000000:07d},client{i}@example.com,Acme Law,Work Injury,Case Signed,"
+                f"2024-01-02,notes for client {i},note {i}\n"
+            )
+    return out.getvalue().encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--chunk", type=int, default=1000, help="rows per chunk")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_django(str(Path(tmp) / "bench.sqlite3"))
+
+        from cases.importer import scan_csv
+
+        data = _csv(args.rows)
+        print(f"{args.rows} rows, chunk={args.chunk}, {os.cpu_count()} CPU(s)")
+        print(f"{'workers':<10}{'seconds':>10}{'rows/s':>12}")
+        scans = {}
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            scans[workers] = scan_csv(io.BytesIO(data), chunk_size=args.chunk, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:<10}{elapsed:>10.2f}{args.rows / elapsed:>12.0f}")
+
+        if scans[1] != scans[args.workers]:
+            sys.exit("parallel scan differs from the serial one")
+
+
+if __name__ == "__main__":
+    main()
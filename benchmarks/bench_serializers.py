@@ -0,0 +1,126 @@
+"""
+Compare the DRF serializers with cases.fastpath for the bootstrap / client
+lookup payloads.
+
+Seeds N cases x M notes into a throwaway SQLite database, then times
+"query + serialize + render" for both paths and reports requests/sec and
+p50/p99 latency. Both paths must render identical bytes.
+
+    python benchmarks/bench_serializers.py --cases 500 --notes 10 --requests 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def _setup_django(db_path: str) -> None:
+    os.environ["DJANGO_DB_PATH"] = db_path
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+
+def _seed(cases: int, notes: int):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from cases.models import Case, CaseNote, Client
+
+    attorney = get_user_model().objects.create_user(email="bench@example.com", password="bench-password")
+    now = timezone.now()
+    clients = Client.objects.bulk_create([
+        Client(code=f"BEN-{i:06d}", name=f"Client {i}", email=f"client{i}@example.com", phone="5551234567", attorney=attorney)
+        for i in range(cases)
+    ], batch_size=500)
+    rows = Case.objects.bulk_create([
+        Case(
+            client=clients[i],
+            client_name=f"Client {i}",
+            client_code=f"BEN-{i:06d}",
+            client_phone="5551234567",
+            client_email=f"client{i}@example.com",
+            firm_name="Benchmark & Partners",
+            firm_email="firm@example.com",
+            firm_phone="5559876543",
+            attorney=attorney,
+            case_type="Auto Accident",
+            case_status="Case Signed",
+            date_opened=now - timedelta(days=90),
+            last_update=now - timedelta(seconds=i),
+            notes="Client reported back pain after the collision.",
+        )
+        for i in range(cases)
+    ], batch_size=500)
+    CaseNote.objects.bulk_create([
+        CaseNote(case=case, status="Case Signed", status_note=f"Status note {n} for {case.client_name}")
+        for case in rows
+        for n in range(notes)
+    ], batch_size=500)
+    return attorney
+
+
+def _time(fn, requests: int):
+    fn()  # warm-up
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "rps": len(samples) / sum(samples),
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--notes", type=int, default=10, help="notes per case")
+    parser.add_argument("--limit", type=int, default=500, help="cases per request (bootstrap limit)")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_django(str(Path(tmp) / "bench.sqlite3"))
+
+        from rest_framework.renderers import JSONRenderer
+        from cases import fastpath
+        from cases.models import Case
+        from cases.serializers import AttorneyItemSerializer, CasePublicSerializer
+
+        attorney = _seed(args.cases, args.notes)
+        qs = Case.objects.filter(attorney=attorney).order_by("-last_update")[:args.limit]
+        render = JSONRenderer().render
+
+        paths = {
+            "attorney/drf": lambda: render(AttorneyItemSerializer(qs.prefetch_related("status_notes"), many=True).data),
+            "attorney/fast": lambda: render(fastpath.attorney_items(qs)),
+            "public/drf": lambda: render(CasePublicSerializer(qs.prefetch_related("status_notes"), many=True).data),
+            "public/fast": lambda: render(fastpath.public_cases(qs)),
+        }
+
+        for view in ("attorney", "public"):
+            if paths[f"{view}/drf"]() != paths[f"{view}/fast"]():
+                sys.exit(f"{view}: fast path output differs from the DRF serializer")
+
+        print(f"{args.cases} cases x {args.notes} notes, limit={args.limit}, {args.requests} requests per path")
+        print(f"{'path':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, fn in paths.items():
+            r = _time(fn, args.requests)
+            print(f"{name:<16}{r['rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
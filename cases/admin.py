@@ -20,7 +20,10 @@ from django.utils.html import strip_tags
 
 from django.http import HttpResponse  # you use HttpResponse below
 from django.middleware.csrf import get_token  # to render a valid CSRF token
-from .models import Case, CASE_TYPES, CASE_STATUSES , CaseNote # you reference these
+from .models import Case, CaseNote, ImportJob # you reference these
+from .exporter import CSV, NDJSON, stream_export
+from .importer import CsvImportError, import_csv, scan_csv
+from .jobs import enqueue, resume
 from django.forms.models import BaseInlineFormSet
 
 
@@ -114,6 +117,7 @@ class CaseCsvImportForm(forms.Form):
         help_text="Headers: Client Name, Phone, Email, Firm Name, Case Type, Case Status, Date Opened, Notes" " (optional: Firm Email, Firm Phone)",
     )
     validate_only = forms.BooleanField(required=False, initial=False, label="Dry run (validate only)")
+    background = forms.BooleanField(required=False, initial=False, label="Import in the background")
 
     def clean_csv_file(self):
         f = self.cleaned_data["csv_file"]
@@ -157,6 +161,7 @@ class CaseAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom = [
             path("import-csv/", self.admin_site.admin_view(self.import_csv_view), name="cases_case_import_csv"),
+            path("import-jobs/<int:pk>/", self.admin_site.admin_view(self.import_job_view), name="cases_case_import_job"),
         ]
         return custom + urls
 
@@ -181,171 +186,62 @@ class CaseAdmin(admin.ModelAdmin):
         f = form.cleaned_data["csv_file"]
         validate_only = form.cleaned_data["validate_only"]
 
-        # Decode file
-        try:
-            text = f.read().decode("utf-8-sig")
-        except UnicodeDecodeError:
-            return JsonResponse({"ok": False, "errors": [{"row": None, "msg": "CSV must be UTF-8 encoded."}]}, status=400)
-
-        import csv, io, re
-        from datetime import datetime
-        from django.utils import timezone
-
-        reader = csv.DictReader(io.StringIO(text))
-        required = ["Client Name", "Phone", "Email", "Firm Name", "Case Type", "Case Status", "Date Opened", "Notes"]
-        missing = [h for h in required if h not in (reader.fieldnames or [])]
-        if missing:
-            return JsonResponse({"ok": False, "errors": [{"row": None, "msg": f"Missing header(s): {', '.join(missing)}"}]}, status=400)
-
-        valid_types = set(CASE_TYPES)
-        valid_stats = set(CASE_STATUSES)
-
-        def make_key(name, phone, email, firm, ctype, cstat, opened_dt):
-            return (
-                (name or "").strip().lower(),
-                re.sub(r"\D", "", phone or ""),
-                (email or "").strip().lower(),
-                (firm or "").strip().lower(),
-                (ctype or "").strip(),
-                (cstat or "").strip(),
-                opened_dt.date().isoformat() if opened_dt else "",
-            )
+        # Large files: store the upload and let `manage.py run_import_jobs`
+        # import it; the modal polls import_job_view for progress
+        if form.cleaned_data["background"] and not validate_only:
+            job = enqueue(f, request.user)
+            return JsonResponse({
+                "ok": True,
+                "queued": True,
+                "job": job.pk,
+                "progress_url": reverse("admin:cases_case_import_job", args=[job.pk]),
+            }, status=202)
 
-        created_candidates = []   # [{"obj": Case, "row": int, "key": tuple}]
-        errors = []
-        seen_in_file = set()
-        file_dupes = []
-
-        rownum = 1  # header = row 1
-        for row in reader:
-            rownum += 1
-            name  = (row.get("Client Name") or "").strip()
-            phone = re.sub(r"\D", "", (row.get("Phone") or ""))
-            email = (row.get("Email") or "").strip()
-            firm  = (row.get("Firm Name") or "").strip()
-            ctype = (row.get("Case Type") or "").strip()
-            cstat = (row.get("Case Status") or "").strip()
-            dopen = (row.get("Date Opened") or "").strip()
-            notes = (row.get("Notes") or "").strip()
-            status_note_csv = (
-                row.get("Status Note")
-                or row.get("Status_note")
-                or row.get("status_note")
-            )
-            status_note_csv = status_note_csv.strip()
-            # NEW: optional firm contacts
-            firm_email = (row.get("Firm Email") or "").strip()                 # NEW
-            firm_phone = re.sub(r"\D", "", (row.get("Firm Phone") or ""))      # NEW
-
-            row_err = []
-            if not name: row_err.append("Client Name required")
-            if len(phone) != 10: row_err.append("Phone must be 10 digits")
-            if not email: row_err.append("Email required")
-            if not firm: row_err.append("Firm Name required")
-            if ctype not in valid_types: row_err.append(f"Case Type must be one of: {', '.join(sorted(valid_types))}")
-            if cstat not in valid_stats: row_err.append(f"Case Status must be one of: {', '.join(sorted(valid_stats))}")
-
-            # NEW: validate firm_phone only if provided
-            if firm_phone and len(firm_phone) != 10:
-                row_err.append("Firm Phone must be 10 digits if provided")     # NEW
-
-            try:
-                opened = datetime.strptime(dopen, "%Y-%m-%d") if dopen else timezone.now()
-            except ValueError:
-                try:
-                    opened = datetime.fromisoformat(dopen)
-                except Exception:
-                    row_err.append("Date Opened must be YYYY-MM-DD or ISO 8601")
-                    opened = None
-
-            if row_err:
-                errors.append({"row": rownum, "msg": "; ".join(row_err)})
-                continue
+        # Stream the upload twice (cases.importer): validate every chunk
+        # first, then import chunk by chunk only if the whole file is clean
+        try:
+            scan = scan_csv(f)
+        except CsvImportError as exc:
+            return JsonResponse({"ok": False, "errors": [{"row": None, "msg": str(exc)}]}, status=400)
 
-            key = make_key(name, phone, email, firm, ctype, cstat, opened)
-            if key in seen_in_file:
-                file_dupes.append({"row": rownum, "msg": "Duplicate row in the uploaded CSV"})
-                continue
-            seen_in_file.add(key)
-
-            obj = Case(
-                client_name=name,
-                client_phone=phone,
-                client_email=email,
-                firm_name=firm,
-                firm_email=firm_email,     # NEW
-                firm_phone=firm_phone,     # NEW
-                case_type=ctype,
-                case_status=cstat,
-                date_opened=opened,
-                notes=notes,
-            )
-            obj.attorney_id = None
-            obj._status_note_csv = status_note_csv
-
-            created_candidates.append({"obj": obj, "row": rownum, "key": key})
-
-        if errors:
-            return JsonResponse({"ok": False, "errors": errors}, status=400)
-
-        # Check duplicates in DB (email case-insensitive, date by date part)
-        db_dupes = []
-        to_save = []
-        for item in created_candidates:
-            o = item["obj"]
-            exists = Case.objects.filter(
-                client_name=o.client_name,
-                client_phone=o.client_phone,
-                firm_name=o.firm_name,
-                case_type=o.case_type,
-                case_status=o.case_status,
-                date_opened__date=o.date_opened.date(),
-            ).filter(client_email__iexact=o.client_email).exists()
-
-            if exists:
-                db_dupes.append({"row": item["row"], "msg": "Duplicate of an existing case in the database"})
-            else:
-                to_save.append(o)
+        if scan.error_count:
+            return JsonResponse({"ok": False, "errors": scan.report_errors()}, status=400)
 
         if validate_only:
             return JsonResponse({
                 "ok": True,
                 "validated": True,
-                "count": len(to_save),
-                "skipped_duplicates_in_file": len(file_dupes),
-                "skipped_duplicates_in_db": len(db_dupes),
-                "duplicates": file_dupes + db_dupes,
+                "count": scan.count,
+                "skipped_duplicates_in_file": len(scan.file_dupes),
+                "skipped_duplicates_in_db": len(scan.db_dupes),
+                "duplicates": scan.duplicates,
             })
 
-        for o in to_save:
-            o.save()
-            status_note_text = getattr(o, "_status_note_csv", "").strip()
-            if not status_note_text:
-                # Fallback to main case.notes if no explicit status_note column
-                status_note_text = (o.notes or "").strip()
-
-            if status_note_text:
-                # This uses your Case.add_status_note, which:
-                # - finds or creates a CaseNote for (case, status)
-                # - updates its status_note text
-                o.add_status_note(
-                    status_note_text,
-                    status=o.case_status,
-                    created_by=None,  # CSV import, no specific user
-                )
+        try:
+            stats = import_csv(f, scan)
+        except CsvImportError as exc:
+            return JsonResponse({"ok": False, "errors": [{"row": None, "msg": str(exc)}]}, status=400)
 
         return JsonResponse({
             "ok": True,
-            "created": len(to_save),
-            "skipped_duplicates_in_file": len(file_dupes),
-            "skipped_duplicates_in_db": len(db_dupes),
-            "duplicates": file_dupes + db_dupes,
+            **stats.as_dict(),
+            "skipped_duplicates_in_file": len(scan.file_dupes),
+            "skipped_duplicates_in_db": len(scan.db_dupes),
+            "duplicates": scan.duplicates,
         })
 
+    def import_job_view(self, request, pk):
+        """Progress of a background import (rows done, rows/sec, ETA) as JSON."""
+        job = ImportJob.objects.filter(pk=pk).first()
+        if job is None:
+            return JsonResponse({"ok": False, "errors": [{"row": None, "msg": "No such import job."}]}, status=404)
+        return JsonResponse({"ok": True, **job.progress()})
+
     def save_related(self, request, form, formsets, change):
         """
         After saving the Case and its inlines, sync case.case_status
-        to the latest CaseNote.status (if any).
+        to the latest CaseNote.status (if any), then the denormalized
+        latest note for that status.
         """
         super().save_related(request, form, formsets, change)
 
@@ -355,6 +251,9 @@ class CaseAdmin(admin.ModelAdmin):
             obj.case_status = latest_note.status
             obj.save(update_fields=["case_status", "last_update"])
 
+        # inline edits may have added/changed/removed the current status's note
+        obj.refresh_latest_note()
+
 
     @admin.action(description="Resend client access email")
     def resend_client_access_email(self, request, queryset):
@@ -365,5 +264,30 @@ class CaseAdmin(admin.ModelAdmin):
         self.message_user(request, _(f"Resent access email for {count} case(s)."), level=messages.SUCCESS)
 
     # actions = ["resend_client_access_email"]
+    actions = ["export_cases_csv", "export_cases_ndjson"]
+
+    @admin.action(description="Export selected cases (CSV, re-importable)")
+    def export_cases_csv(self, request, queryset):
+        return stream_export(queryset, CSV)
+
+    @admin.action(description="Export selected cases with notes (NDJSON)")
+    def export_cases_ndjson(self, request, queryset):
+        return stream_export(queryset, NDJSON)
 
     
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "file_name", "status", "rows_done", "rows_total", "attempts", "created_by", "created_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = [f.name for f in ImportJob._meta.fields]
+    actions = ["resume_jobs"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Resume selected failed imports")
+    def resume_jobs(self, request, queryset):
+        count = resume(queryset.values_list("pk", flat=True))
+        self.message_user(request, _(f"Re-queued {count} import(s)."), level=messages.SUCCESS)
@@ -0,0 +1,95 @@
+# cases/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+
+class ClientProfileCache:
+    """
+    Bounded LRU of rendered client lookup payloads, keyed by client_code.
+
+    The cache is per process: the Case/CaseNote signals evict entries in the
+    worker that made the write, and `ttl` bounds how long any other worker can
+    keep serving an entry it built before that write. Callers that know the
+    current version of the data (an ETag) pass it as `version`; an entry
+    stored under a different version is treated as a miss.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, code: str, version: Optional[str] = None) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(code)
+            stale = entry is not None and (
+                (self.ttl and now - entry[0] > self.ttl)
+                or (version is not None and entry[1] != version)
+            )
+            if entry is None or stale:
+                if stale:
+                    del self._entries[code]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(code)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, code: str, payload: Any, version: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries[code] = (time.monotonic(), version, payload)
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, code: Optional[str]) -> None:
+        if not code:
+            return
+        with self._lock:
+            self._entries.pop(code, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+client_profile_cache = ClientProfileCache(
+    max_entries=getattr(settings, "CLIENT_PROFILE_CACHE_MAX_ENTRIES", 1024),
+    ttl=getattr(settings, "CLIENT_PROFILE_CACHE_TTL", 300),
+)
+
+
+def invalidate_client_profile(code: Optional[str]) -> None:
+    """
+    Drop the cached payload now, and again once the surrounding transaction
+    commits so a lookup that raced the write cannot re-cache stale rows.
+    """
+    if not code:
+        return
+    client_profile_cache.invalidate(code)
+    transaction.on_commit(lambda: client_profile_cache.invalidate(code))
@@ -0,0 +1,72 @@
+# cases/conditional.py
+import hashlib
+from typing import Optional
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Case
+
+
+def _fingerprint(qs, *parts, **aggregates) -> Optional[str]:
+    """
+    ETag for a set of cases, from one aggregate query over the cases and
+    their notes: it moves whenever a case is added/removed/saved (count,
+    updated_at, which every save writes) or a note is added/removed/edited
+    (count, updated_at).
+    Returns None when the set is empty. Extra `aggregates` are folded in.
+    """
+    agg = qs.aggregate(
+        cases=Count("id", distinct=True),
+        last_update=Max("last_update"),
+        updated=Max("updated_at"),
+        notes=Count("status_notes"),
+        notes_updated=Max("status_notes__updated_at"),
+        **aggregates,
+    )
+    if not agg["cases"]:
+        return None
+
+    raw = "|".join(str(p) for p in (*parts, *agg.values()))
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def attorney_fingerprint(attorney_id, *variant) -> Optional[str]:
+    """`variant` carries the query params that shape the response (limit, cursor, ...)."""
+    return _fingerprint(Case.objects.filter(attorney_id=attorney_id), "attorney", attorney_id, *variant)
+
+
+def client_fingerprint(code: str) -> Optional[str]:
+    # The profile fields come from the Client row, so its edits count too.
+    return _fingerprint(
+        Case.objects.filter(client__code=code), "client", code,
+        client_updated=Max("client__updated_at"),
+    )
+
+
+def etag_matches(request, etag: Optional[str]) -> bool:
+    """
+    If-None-Match check; weak validators match too (compression weakens
+    ETags). Only GET and HEAD may answer 304 (RFC 9110 13.1.2), so any other
+    method is served in full.
+    """
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not etag or not header or request.method not in ("GET", "HEAD"):
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in parse_etags(header))
+
+
+def with_etag(response, etag: Optional[str]):
+    if etag:
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
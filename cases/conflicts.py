@@ -0,0 +1,111 @@
+# cases/conflicts.py
+"""
+Client-ownership conflict checks, answered for many cases at once.
+
+A case conflicts when its client email or code belongs to a Client of
+another attorney that still has other cases. Case.clean() checks one case;
+bulk paths (the admin CSV import) pass every row and pay one grouped query
+per chunk of rows instead of several queries per row.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from django.db.models import Count, Q
+
+from .models import Case, Client
+
+EMAIL_CONFLICT = "This client email is already associated with another attorney."
+CODE_CONFLICT = "This client code is already associated with another attorney."
+
+# Emails + codes per query, under SQLite's 999 bound-parameter limit.
+CHUNK_SIZE = 400
+
+
+@dataclass(frozen=True)
+class ConflictCheck:
+    client_email: str
+    client_code: str
+    attorney_id: Optional[int]
+    # the case being checked, whose own link to the client doesn't count
+    case_id: object = None
+
+    @classmethod
+    def for_case(cls, case: Case) -> "ConflictCheck":
+        return cls(case.client_email or "", case.client_code or "", case.attorney_id, case.pk)
+
+
+# (client id, attorney id, number of cases)
+_ClientRow = Tuple[int, Optional[int], int]
+
+
+def _chunks(values: Sequence, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _load_clients(emails: List[str], codes: List[str]) -> Tuple[Dict[str, _ClientRow], Dict[str, _ClientRow]]:
+    """
+    Clients matching any email or code, with their case counts. An email
+    shared by several clients resolves to the oldest one, as a
+    `.filter(email=...).first()` would.
+    """
+    by_email: Dict[str, _ClientRow] = {}
+    by_code: Dict[str, _ClientRow] = {}
+    half = CHUNK_SIZE // 2
+    for start in range(0, max(len(emails), len(codes)), half):
+        email_chunk = set(emails[start:start + half])
+        code_chunk = set(codes[start:start + half])
+        rows = (
+            Client.objects.filter(Q(email__in=email_chunk) | Q(code__in=code_chunk))
+            .annotate(n_cases=Count("cases"))
+            .values_list("id", "email", "code", "attorney_id", "n_cases")
+        )
+        for pk, email, code, attorney_id, n_cases in rows:
+            row = (pk, attorney_id, n_cases)
+            if email in email_chunk and (email not in by_email or pk < by_email[email][0]):
+                by_email[email] = row
+            if code in code_chunk:
+                by_code[code] = row
+    return by_email, by_code
+
+
+def find_conflicts(checks: Sequence[ConflictCheck]) -> List[Optional[str]]:
+    """
+    One message (or None) per check, in order. The email conflict wins when
+    both the email and the code conflict.
+    """
+    emails = sorted({c.client_email for c in checks if c.client_email})
+    codes = sorted({c.client_code for c in checks if c.client_code})
+    if not emails and not codes:
+        return [None] * len(checks)
+    by_email, by_code = _load_clients(emails, codes)
+
+    # (check index, message, client row) for every client owned elsewhere
+    candidates = []
+    for i, check in enumerate(checks):
+        for lookup, key, message in (
+            (by_email, check.client_email, EMAIL_CONFLICT),
+            (by_code, check.client_code, CODE_CONFLICT),
+        ):
+            client = lookup.get(key) if key else None
+            if client is not None and client[1] != check.attorney_id and client[2]:
+                candidates.append((i, message, client))
+
+    # A client with a single case only conflicts if that case isn't the one
+    # being checked; fetch those cases' ids in one pass.
+    single: Set[int] = {
+        client[0] for i, _m, client in candidates
+        if client[2] == 1 and checks[i].case_id is not None
+    }
+    only_case: Dict[int, object] = {}
+    for chunk in _chunks(sorted(single), CHUNK_SIZE):
+        only_case.update(Case.objects.filter(client_id__in=chunk).order_by().values_list("client_id", "id"))
+
+    results: List[Optional[str]] = [None] * len(checks)
+    for i, message, (client_id, _attorney_id, n_cases) in candidates:
+        if results[i] is not None:
+            continue
+        if n_cases == 1 and client_id in only_case and only_case[client_id] == checks[i].case_id:
+            continue
+        results[i] = message
+    return results
@@ -0,0 +1,116 @@
+# cases/exporter.py
+"""
+Streamed case exports (CaseAdmin's export actions, AttorneyCaseExportView).
+
+CSV rows use the import layout (cases.importer), one row per case with its
+latest status note, so an export can be uploaded again through
+import_csv_view. NDJSON lines carry the same columns plus the case's whole
+note history.
+
+Cases and notes are read with .iterator(chunk_size=...), both ordered by
+case id, and merged in one pass: memory holds one chunk of each and the
+notes of a single case, whatever the size of the export.
+"""
+import csv
+import io
+from typing import Iterator, List, Tuple
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from core.renderers import FastJSONRenderer
+
+from .importer import REQUIRED_HEADERS
+from .models import CaseNote
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+EXPORT_HEADERS = [*REQUIRED_HEADERS, "Status Note", "Firm Email", "Firm Phone"]
+
+# Case columns in EXPORT_HEADERS order, after the id
+_CASE_FIELDS = (
+    "id", "client_name", "client_phone", "client_email", "firm_name", "case_type", "case_status",
+    "date_opened", "notes", "latest_note_text", "firm_email", "firm_phone",
+)
+_DATE_OPENED = _CASE_FIELDS.index("date_opened") - 1
+
+# Flush the CSV buffer once it holds this many characters
+_CSV_FLUSH_AT = 64 * 1024
+
+
+def _chunk_size() -> int:
+    return getattr(settings, "CASES_EXPORT_CHUNK_SIZE", 2000)
+
+
+def _row(values: tuple) -> list:
+    row = list(values[1:])
+    row[_DATE_OPENED] = row[_DATE_OPENED].isoformat() if row[_DATE_OPENED] else ""
+    return row
+
+
+def iter_case_rows(qs, chunk_size: int) -> Iterator[tuple]:
+    return qs.order_by("id").values_list(*_CASE_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def iter_cases_with_notes(qs, chunk_size: int) -> Iterator[Tuple[tuple, List[tuple]]]:
+    """
+    (case row, [(status, status_note, created_at), ...]) per case, oldest
+    note first. Notes of cases outside `qs` (e.g. created after the case
+    query started) are skipped.
+    """
+    notes = iter(
+        CaseNote.objects.filter(case__in=qs.values("id"))
+        .order_by("case_id", "created_at", "id")
+        .values_list("case_id", "status", "status_note", "created_at")
+        .iterator(chunk_size=chunk_size)
+    )
+    note = next(notes, None)
+    for case in iter_case_rows(qs, chunk_size):
+        case_id = case[0]
+        while note is not None and note[0] < case_id:
+            note = next(notes, None)
+        group = []
+        while note is not None and note[0] == case_id:
+            group.append(note[1:])
+            note = next(notes, None)
+        yield case, group
+
+
+def iter_csv(qs, chunk_size: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM for spreadsheet apps; the importer reads utf-8-sig
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    for case in iter_case_rows(qs, chunk_size):
+        writer.writerow(_row(case))
+        if buffer.tell() >= _CSV_FLUSH_AT:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_ndjson(qs, chunk_size: int) -> Iterator[bytes]:
+    render = FastJSONRenderer().render
+    for case, notes in iter_cases_with_notes(qs, chunk_size):
+        item = dict(zip(EXPORT_HEADERS, _row(case)))
+        item["Status Notes"] = [
+            {"Status": status, "Status Note": text, "Created At": created_at.isoformat()}
+            for status, text, created_at in notes
+        ]
+        yield render(item) + b"\n"
+
+
+def stream_export(qs, fmt: str = CSV) -> StreamingHttpResponse:
+    chunk_size = _chunk_size()
+    stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+    if fmt == NDJSON:
+        response = StreamingHttpResponse(iter_ndjson(qs, chunk_size), content_type="application/x-ndjson")
+    else:
+        fmt = CSV
+        response = StreamingHttpResponse(iter_csv(qs, chunk_size), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="cases-{stamp}.{fmt}"'
+    return response
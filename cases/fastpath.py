@@ -0,0 +1,117 @@
+# cases/fastpath.py
+"""
+values_list-based equivalents of AttorneyItemSerializer and
+CasePublicSerializer (with their nested CaseNoteSerializer).
+
+Each function runs two queries (cases, then all of their notes), groups the
+notes by case in one pass and builds plain dicts with the same keys, key
+order and value formatting as the DRF serializers, so rendering either
+result with JSONRenderer yields identical bytes.
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from django.utils import timezone
+
+from .models import CaseNote
+
+ATTORNEY_FIELDS = (
+    "client_name", "client_code", "client_email", "client_phone",
+    "firm_name", "firm_email", "firm_phone",
+    "case_type",
+    "date_opened", "last_update",
+    "notes",
+)
+PUBLIC_FIELDS = (
+    "firm_name",
+    "firm_email",
+    "firm_phone",
+    "case_type",
+    "date_opened",
+    "last_update",
+    "notes",
+)
+_DATETIME_FIELDS = {"date_opened", "last_update"}
+_NOTE_FIELDS = ("case_id", "id", "status", "status_note", "created_at", "updated_at")
+
+
+def _datetime(value):
+    """Same output as rest_framework.fields.DateTimeField (ISO 8601, 'Z' for UTC)."""
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _notes_by_case(case_ids) -> Dict[object, List[dict]]:
+    grouped = defaultdict(list)
+    # Default CaseNote ordering (created_at), as the prefetch would use.
+    for case_id, pk, status, text, created_at, updated_at in (
+        CaseNote.objects.filter(case_id__in=case_ids).values_list(*_NOTE_FIELDS)
+    ):
+        grouped[case_id].append({
+            "id": pk,
+            "case_status": status,
+            "status_note": text,
+            "created_at": _datetime(created_at),
+            "updated_at": _datetime(updated_at),
+        })
+    return grouped
+
+
+def _case_dict(id_key, pk, fields, values, notes) -> dict:
+    item = {id_key: str(pk)}
+    for name, value in zip(fields, values):
+        if name in _DATETIME_FIELDS:
+            item[name] = _datetime(value)
+        else:
+            item[name] = value
+    item["status_notes"] = notes
+    return item
+
+
+def attorney_and_public(qs) -> Tuple[List[dict], List[dict]]:
+    """Both representations of the cases in `qs`, from the same two queries."""
+    _, attorney, public = versioned_attorney_and_public(qs, "pk")
+    return attorney, public
+
+
+def versioned_attorney_and_public(qs, version: str = "updated_at") -> Tuple[list, List[dict], List[dict]]:
+    """
+    attorney_and_public() plus each case's `version` column, read by the
+    same case query as the fields it versions.
+    """
+    fields = tuple(dict.fromkeys(ATTORNEY_FIELDS + PUBLIC_FIELDS))
+    rows = list(qs.values_list("pk", version, *fields))
+    notes = _notes_by_case([row[0] for row in rows])
+
+    versions, attorney, public = [], [], []
+    for pk, row_version, *values in rows:
+        by_name = dict(zip(fields, values))
+        case_notes = notes.get(pk, [])
+        versions.append(row_version)
+        attorney.append(_case_dict(
+            "case_id", pk, ATTORNEY_FIELDS, [by_name[f] for f in ATTORNEY_FIELDS], case_notes,
+        ))
+        public.append(_case_dict(
+            "id", pk, PUBLIC_FIELDS, [by_name[f] for f in PUBLIC_FIELDS], [dict(n) for n in case_notes],
+        ))
+    return versions, attorney, public
+
+
+def attorney_items(qs) -> List[dict]:
+    """AttorneyItemSerializer(qs, many=True).data, without DRF."""
+    rows = list(qs.values_list("pk", *ATTORNEY_FIELDS))
+    notes = _notes_by_case([row[0] for row in rows])
+    return [_case_dict("case_id", pk, ATTORNEY_FIELDS, values, notes.get(pk, [])) for pk, *values in rows]
+
+
+def public_cases(qs) -> List[dict]:
+    """CasePublicSerializer(qs, many=True).data, without DRF."""
+    rows = list(qs.values_list("pk", *PUBLIC_FIELDS))
+    notes = _notes_by_case([row[0] for row in rows])
+    return [_case_dict("id", pk, PUBLIC_FIELDS, values, notes.get(pk, [])) for pk, *values in rows]
@@ -0,0 +1,133 @@
+# cases/fragments.py
+"""
+Per-case JSON fragments.
+
+Responses that list cases are assembled by joining pre-rendered fragments
+instead of running the DRF serializers field by field on every request. The
+output is byte-identical to rendering the serializers with JSONRenderer.
+"""
+import uuid
+from typing import Iterable, List, Sequence, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.settings import api_settings
+
+from . import fastpath
+from .models import Case, CaseFragment
+from .serializers import AttorneyItemSerializer, CasePublicSerializer
+
+ATTORNEY = "attorney"
+PUBLIC = "public"
+
+_COLUMNS = {
+    ATTORNEY: "fragment__attorney_json",
+    PUBLIC: "fragment__public_json",
+}
+
+# Same renderer DRF would pick for these views (core.renderers.FastJSONRenderer
+# unless API_JSON_BACKEND says otherwise); both render identical bytes.
+_renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+
+def render_json(data) -> str:
+    # JSON renderers render None as an empty body, not as a JSON value.
+    if data is None:
+        return "null"
+    return _renderer.render(data).decode()
+
+
+def json_array(fragments: Iterable[str]) -> str:
+    return "[" + ",".join(fragments) + "]"
+
+
+def json_object(pairs: Sequence[Tuple[str, str]]) -> str:
+    """Build an object from (key, already-rendered value) pairs, keeping order."""
+    return "{" + ",".join(f"{render_json(k)}:{v}" for k, v in pairs) + "}"
+
+
+class JSONFragmentResponse(HttpResponse):
+    def __init__(self, content: str, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content.encode(), **kwargs)
+
+
+def _serialize(case_ids) -> Tuple[list, List[dict], List[dict]]:
+    """
+    (updated_at per case, attorney items, public items) for `case_ids`. Each
+    version is read by the same query as its case's fields, so a fragment
+    is never stamped with a version newer than what it renders.
+    """
+    qs = Case.objects.filter(pk__in=case_ids)
+    if getattr(settings, "CASES_FAST_SERIALIZERS", False):
+        return fastpath.versioned_attorney_and_public(qs, "updated_at")
+
+    cases = list(qs.prefetch_related("status_notes"))
+    return (
+        [case.updated_at for case in cases],
+        AttorneyItemSerializer(cases, many=True).data,
+        CasePublicSerializer(cases, many=True).data,
+    )
+
+
+def render_fragments(case_ids: Iterable) -> List[CaseFragment]:
+    """Render and upsert the fragments for `case_ids` (two reads, one write)."""
+    versions, attorney, public = _serialize(list(case_ids))
+    if not attorney:
+        return []
+
+    fragments = [
+        CaseFragment(
+            case_id=uuid.UUID(a["case_id"]),
+            source_updated_at=version,
+            attorney_json=render_json(a),
+            public_json=render_json(p),
+        )
+        for version, a, p in zip(versions, attorney, public)
+    ]
+    CaseFragment.objects.bulk_create(
+        fragments,
+        update_conflicts=True,
+        unique_fields=["case"],
+        update_fields=["source_updated_at", "attorney_json", "public_json", "rendered_at"],
+    )
+    return fragments
+
+
+def fetch_fragments(qs, view: str, *fields: str) -> List[tuple]:
+    """
+    Evaluate the (ordered) case queryset `qs` as rows of
+    (pk, last_update, fragment_json, *fields), rendering any fragment that is
+    missing or was rendered from another version of its case. Freshness is
+    keyed on Case.updated_at, which every save moves; last_update only
+    tracks the fields clients are notified about.
+    """
+    return scan_fragments(qs, view, *fields)[0]
+
+
+def scan_fragments(qs, view: str, *fields: str) -> Tuple[List[tuple], List[tuple]]:
+    """
+    fetch_fragments(), plus the (last_update, pk) key of every row `qs`
+    returned, including cases deleted before their fragment was rendered.
+    Keyset walks page on these keys, not on the rows they got back.
+    """
+    rows = list(qs.values_list(
+        "pk", "last_update", "updated_at", "fragment__source_updated_at", _COLUMNS[view], *fields,
+    ))
+
+    stale = [row[0] for row in rows if row[4] is None or row[3] != row[2]]
+    fresh = {f.case_id: f for f in render_fragments(stale)} if stale else {}
+
+    out = []
+    for pk, last_update, version, source, fragment, *rest in rows:
+        if pk in fresh:
+            fragment = getattr(fresh[pk], f"{view}_json")
+        elif fragment is None or source != version:
+            # Deleted between the two reads.
+            continue
+        out.append((pk, last_update, fragment, *rest))
+    return out, [(row[1], row[0]) for row in rows]
+
+
+def drop_fragments(case_ids: Iterable) -> None:
+    CaseFragment.objects.filter(case_id__in=list(case_ids)).delete()
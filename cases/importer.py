@@ -0,0 +1,557 @@
+# cases/importer.py
+"""
+Bulk import engine behind CaseAdmin.import_csv_view.
+
+The upload is read as a stream, twice: scan_csv() validates it chunk by
+chunk (errors, duplicates, client conflicts) and, when it is clean,
+import_csv() re-reads it and writes the rows. Memory is bounded by the
+chunk size, not the file size. Row parsing can be fanned out to a process
+pool (CASES_IMPORT_WORKERS); everything that touches the database stays in
+the calling process and sees rows in file order.
+
+Saving imported cases one by one runs the Client lookup, the signals and
+add_status_note's queries for every row, and each note re-saves its case.
+CaseImporter instead writes validated rows in batches, one transaction per
+batch:
+
+  - clients are resolved by email for the whole batch in one query; rows
+    for an existing client take on its identity, new ones get their access
+    code generated in memory and are inserted together
+  - cases and their status notes are bulk_create()d, and the denormalized
+    latest note is filled in with one bulk_update()
+
+bulk_create() skips the model signals, so imported rows queue no push
+notifications (new cases have no fragments to drop); the cached lookup
+payload of every client touched is evicted after each batch.
+"""
+import csv
+import hashlib
+import io
+import logging
+import re
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .cache import invalidate_client_profile
+from .conflicts import ConflictCheck, find_conflicts
+from .models import CASE_STATUSES, CASE_TYPES, Case, CaseNote, Client, _generate_human_code
+
+logger = logging.getLogger(__name__)
+
+# Emails/codes per IN (...) query, under SQLite's 999 bound-parameter limit.
+LOOKUP_CHUNK_SIZE = 500
+
+CaseKey = Tuple[str, str, str, str, str, str, str]
+
+
+def make_key(name, phone, email, firm, ctype, cstat, opened_dt: Optional[datetime]) -> CaseKey:
+    """
+    What makes two imported cases the same: client name, phone, email and
+    firm (case-insensitive), type, status and the day the case was opened.
+    """
+    return (
+        (name or "").strip().lower(),
+        re.sub(r"\D", "", phone or ""),
+        (email or "").strip().lower(),
+        (firm or "").strip().lower(),
+        (ctype or "").strip(),
+        (cstat or "").strip(),
+        opened_dt.date().isoformat() if opened_dt else "",
+    )
+
+
+def existing_case_keys(emails: Iterable[str]) -> Set[CaseKey]:
+    """
+    make_key() of every stored case whose client email matches one of
+    `emails`, case-insensitively. One query per chunk of emails over the
+    Lower(client_email) index, instead of an unindexable lookup per row.
+    """
+    lowered = sorted({(e or "").strip().lower() for e in emails} - {""})
+    keys: Set[CaseKey] = set()
+    for start in range(0, len(lowered), LOOKUP_CHUNK_SIZE):
+        rows = (
+            Case.objects.annotate(email_key=Lower("client_email"))
+            .filter(email_key__in=lowered[start:start + LOOKUP_CHUNK_SIZE])
+            .order_by()
+            .values_list(
+                "client_name", "client_phone", "client_email", "firm_name",
+                "case_type", "case_status", "date_opened",
+            )
+        )
+        for name, phone, email, firm, ctype, cstat, opened in rows.iterator(chunk_size=2000):
+            # the day in the current time zone, as a date_opened__date lookup sees it
+            if opened is not None and timezone.is_aware(opened):
+                opened = timezone.localtime(opened)
+            keys.add(make_key(name, phone, email, firm, ctype, cstat, opened))
+    return keys
+
+
+@dataclass
+class ImportStats:
+    created: int = 0
+    clients_created: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.created / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "created": self.created,
+            "clients_created": self.clients_created,
+            "seconds": round(self.seconds, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+        }
+
+
+class CaseImporter:
+    """
+    Collects (case, status note text) pairs and writes them every
+    `batch_size` rows; call finish() to write the rest and get the stats.
+    The cases are unsaved Case instances whose fields are already validated.
+
+    `on_batch(last_row, count)` runs inside each batch's transaction, with
+    the last source row number passed to add(), so a caller can checkpoint
+    exactly what was committed.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, on_batch: Optional[Callable[[int, int], None]] = None) -> None:
+        self.batch_size = batch_size or getattr(settings, "CASES_IMPORT_BATCH_SIZE", 1000)
+        self.on_batch = on_batch
+        self.stats = ImportStats()
+        self._pending: List[Tuple[Case, str]] = []
+        self._last_row = 0
+        self._started = time.perf_counter()
+
+    def add(self, case: Case, status_note: str = "", row: Optional[int] = None) -> None:
+        self._pending.append((case, (status_note or "").strip()))
+        if row is not None:
+            self._last_row = row
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        with transaction.atomic():
+            codes = self._write_batch(batch)
+            for code in codes:
+                invalidate_client_profile(code)
+            if self.on_batch is not None:
+                self.on_batch(self._last_row, len(batch))
+        self.stats.created += len(batch)
+        self.stats.seconds = time.perf_counter() - self._started
+
+    def finish(self) -> ImportStats:
+        self.flush()
+        self.stats.seconds = time.perf_counter() - self._started
+        logger.info(
+            "Imported %s case(s) in %.2fs (%.0f rows/s)",
+            self.stats.created, self.stats.seconds, self.stats.rows_per_sec,
+        )
+        return self.stats
+
+    def _clients_by_email(self, emails: List[str]) -> Dict[str, Client]:
+        """The oldest client per email, as Client.for_case() would pick."""
+        found: Dict[str, Client] = {}
+        for start in range(0, len(emails), LOOKUP_CHUNK_SIZE):
+            chunk = emails[start:start + LOOKUP_CHUNK_SIZE]
+            for client in Client.objects.filter(email__in=chunk).order_by("id"):
+                found.setdefault(client.email, client)
+        return found
+
+    def _unique_codes(self, clients: List[Client]) -> None:
+        """Give every new client a code not taken in the DB or the batch."""
+        taken = set()
+        pending = clients
+        while pending:
+            for client in pending:
+                while not client.code or client.code in taken:
+                    client.code = _generate_human_code(client.name)
+                taken.add(client.code)
+            codes = [c.code for c in pending]
+            clash = set()
+            for start in range(0, len(codes), LOOKUP_CHUNK_SIZE):
+                clash.update(
+                    Client.objects.filter(code__in=codes[start:start + LOOKUP_CHUNK_SIZE])
+                    .values_list("code", flat=True)
+                )
+            pending = [c for c in pending if c.code in clash]
+            for client in pending:
+                client.code = ""
+
+    def _write_batch(self, batch: List[Tuple[Case, str]]) -> Iterable[str]:
+        now = timezone.now()
+        by_email = self._clients_by_email(sorted({case.client_email for case, _note in batch}))
+        existing = {client.pk: client for client in by_email.values()}
+        new_clients: List[Client] = []
+
+        # As Case.save() links a case: a row joins the client with its email
+        # and takes on the client's identity, without changing the client or
+        # its owner; the first row for an unknown email creates the client.
+        for case, _note in batch:
+            client = by_email.get(case.client_email)
+            if client is None:
+                client = Client(
+                    email=case.client_email,
+                    name=case.client_name,
+                    phone=case.client_phone,
+                    attorney_id=case.attorney_id,
+                )
+                by_email[case.client_email] = client
+                new_clients.append(client)
+            case.client = client
+
+        if new_clients:
+            self._unique_codes(new_clients)
+            for client in new_clients:
+                client.updated_at = now
+            Client.objects.bulk_create(new_clients, batch_size=LOOKUP_CHUNK_SIZE)
+            self.stats.clients_created += len(new_clients)
+
+        for case, _note in batch:
+            for case_field, value in case.client.mirror_values().items():
+                setattr(case, case_field, value)
+            case.last_update = now
+        Case.objects.bulk_create([case for case, _note in batch], batch_size=LOOKUP_CHUNK_SIZE)
+
+        with_notes = [(case, text) for case, text in batch if text]
+        notes = CaseNote.objects.bulk_create(
+            [CaseNote(case=case, status=case.case_status, status_note=text) for case, text in with_notes],
+            batch_size=LOOKUP_CHUNK_SIZE,
+        )
+        if notes:
+            for (case, _text), note in zip(with_notes, notes):
+                case._set_latest_note(note)
+            Case.objects.bulk_update(
+                [case for case, _text in with_notes],
+                ["latest_note", "latest_note_text", "latest_note_updated_at"],
+                batch_size=LOOKUP_CHUNK_SIZE,
+            )
+        return {client.code for client in existing.values()}
+
+
+def import_cases(rows: Iterable[Tuple[Case, str]], batch_size: Optional[int] = None) -> ImportStats:
+    """Import (case, status note text) pairs; see CaseImporter."""
+    importer = CaseImporter(batch_size)
+    for case, status_note in rows:
+        importer.add(case, status_note)
+    return importer.finish()
+
+
+# CSV parsing ---------------------------------------------------------------
+
+REQUIRED_HEADERS = ["Client Name", "Phone", "Email", "Firm Name", "Case Type", "Case Status", "Date Opened", "Notes"]
+
+# Reported errors are capped so a hopeless file can't fill the worker's memory.
+MAX_REPORTED_ERRORS = 1000
+
+_VALID_TYPES = set(CASE_TYPES)
+_VALID_STATUSES = set(CASE_STATUSES)
+
+
+class CsvImportError(Exception):
+    """The file as a whole can't be imported (encoding, headers)."""
+
+
+@dataclass
+class ParsedRow:
+    row: int
+    fields: Dict[str, object]
+    status_note: str
+    key: CaseKey
+
+    def build_case(self) -> Case:
+        return Case(attorney=None, **self.fields)
+
+
+def parse_row(rownum: int, row: Dict[str, str]) -> Tuple[Optional[ParsedRow], Optional[str]]:
+    """Validate one CSV row: (parsed row, None) or (None, error message)."""
+    name = (row.get("Client Name") or "").strip()
+    phone = re.sub(r"\D", "", (row.get("Phone") or ""))
+    email = (row.get("Email") or "").strip()
+    firm = (row.get("Firm Name") or "").strip()
+    ctype = (row.get("Case Type") or "").strip()
+    cstat = (row.get("Case Status") or "").strip()
+    dopen = (row.get("Date Opened") or "").strip()
+    notes = (row.get("Notes") or "").strip()
+    status_note = (row.get("Status Note") or row.get("Status_note") or row.get("status_note") or "").strip()
+    # optional firm contacts
+    firm_email = (row.get("Firm Email") or "").strip()
+    firm_phone = re.sub(r"\D", "", (row.get("Firm Phone") or ""))
+
+    errors = []
+    if not name:
+        errors.append("Client Name required")
+    if len(phone) != 10:
+        errors.append("Phone must be 10 digits")
+    if not email:
+        errors.append("Email required")
+    if not firm:
+        errors.append("Firm Name required")
+    if ctype not in _VALID_TYPES:
+        errors.append(f"Case Type must be one of: {', '.join(sorted(_VALID_TYPES))}")
+    if cstat not in _VALID_STATUSES:
+        errors.append(f"Case Status must be one of: {', '.join(sorted(_VALID_STATUSES))}")
+    if firm_phone and len(firm_phone) != 10:
+        errors.append("Firm Phone must be 10 digits if provided")
+
+    try:
+        opened = datetime.strptime(dopen, "%Y-%m-%d") if dopen else timezone.now()
+    except ValueError:
+        try:
+            opened = datetime.fromisoformat(dopen)
+        except ValueError:
+            errors.append("Date Opened must be YYYY-MM-DD or ISO 8601")
+            opened = None
+
+    if errors:
+        return None, "; ".join(errors)
+
+    fields = {
+        "client_name": name,
+        "client_phone": phone,
+        "client_email": email,
+        "firm_name": firm,
+        "firm_email": firm_email,
+        "firm_phone": firm_phone,
+        "case_type": ctype,
+        "case_status": cstat,
+        "date_opened": opened,
+        "notes": notes,
+    }
+    # the case notes stand in when there is no explicit Status Note column
+    return ParsedRow(rownum, fields, status_note or notes, make_key(name, phone, email, firm, ctype, cstat, opened)), None
+
+
+@contextmanager
+def open_csv(binary) -> Iterator[Iterator[Tuple[int, Dict[str, str]]]]:
+    """
+    Stream (row number, row) pairs out of a binary file object, decoding
+    as it reads; the header is row 1. Raises CsvImportError for a file that
+    isn't UTF-8 (possibly mid-way through) or lacks a required header.
+    """
+    binary.seek(0)
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        try:
+            reader = csv.DictReader(text)
+            fieldnames = reader.fieldnames or []
+        except UnicodeDecodeError:
+            raise CsvImportError("CSV must be UTF-8 encoded.")
+        missing = [h for h in REQUIRED_HEADERS if h not in fieldnames]
+        if missing:
+            raise CsvImportError(f"Missing header(s): {', '.join(missing)}")
+
+        def rows():
+            try:
+                for rownum, row in enumerate(reader, start=2):
+                    yield rownum, row
+            except UnicodeDecodeError:
+                raise CsvImportError("CSV must be UTF-8 encoded.")
+
+        yield rows()
+    finally:
+        # leave the upload open for the second pass
+        text.detach()
+
+
+def parse_chunk(chunk: List[Tuple[int, Dict[str, str]]]) -> List[Tuple[int, Optional[ParsedRow], Optional[str]]]:
+    """parse_row() over one chunk; module-level so a process pool can run it."""
+    return [(rownum, *parse_row(rownum, row)) for rownum, row in chunk]
+
+
+def _bounded_map(pool: ProcessPoolExecutor, fn, items: Iterable, ahead: int) -> Iterator:
+    """pool.map() in input order, reading at most `ahead` items past the one being consumed."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+@contextmanager
+def chunk_parser(workers: Optional[int] = None):
+    """
+    A function mapping an iterable of row chunks to their parse_chunk()
+    results, in order. With more than one worker the chunks are parsed in a
+    process pool (row validation is pure-Python CPU work), keeping only a
+    couple of chunks per worker in flight so memory stays bounded.
+    """
+    workers = workers or getattr(settings, "CASES_IMPORT_WORKERS", 1)
+    if workers <= 1:
+        yield lambda chunks: map(parse_chunk, chunks)
+        return
+    # django.setup() in each worker: a no-op after fork, needed under spawn
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        yield lambda chunks: _bounded_map(pool, parse_chunk, chunks, ahead=workers * 2)
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class CsvScan:
+    """What the validation pass found; `skip` holds the duplicate rows' numbers."""
+    count: int = 0
+    errors: List[Dict[str, object]] = field(default_factory=list)
+    error_count: int = 0
+    file_dupes: List[Dict[str, object]] = field(default_factory=list)
+    db_dupes: List[Dict[str, object]] = field(default_factory=list)
+    skip: Set[int] = field(default_factory=set)
+
+    def error(self, row: int, msg: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "msg": msg})
+
+    @property
+    def duplicates(self) -> List[Dict[str, object]]:
+        return self.file_dupes + self.db_dupes
+
+    def report_errors(self) -> List[Dict[str, object]]:
+        hidden = self.error_count - len(self.errors)
+        if hidden:
+            return self.errors + [{"row": None, "msg": f"... and {hidden} more error(s)"}]
+        return self.errors
+
+
+def _digest(key: CaseKey) -> bytes:
+    # 16 bytes instead of a 7-string tuple per row remembered
+    return hashlib.blake2b("\x1f".join(key).encode(), digest_size=16).digest()
+
+
+class SeenKeys:
+    """
+    The digests of every key scanned so far. The first `memory_limit` are
+    kept in a set; past that they move to a private temporary SQLite
+    database, which holds a bounded page cache in memory and spills the rest
+    to disk, so a huge file cannot grow the set without bound.
+    """
+
+    def __init__(self, memory_limit: Optional[int] = None):
+        self.memory_limit = memory_limit or getattr(settings, "CASES_IMPORT_SEEN_IN_MEMORY", 100000)
+        self.digests: Set[bytes] = set()
+        self.db: Optional[sqlite3.Connection] = None
+
+    def add(self, digest: bytes) -> bool:
+        """Remember `digest`; False if it was already seen."""
+        if self.db is None:
+            if digest in self.digests:
+                return False
+            self.digests.add(digest)
+            if len(self.digests) >= self.memory_limit:
+                self._spill()
+            return True
+        return self.db.execute("INSERT OR IGNORE INTO seen VALUES (?)", (digest,)).rowcount == 1
+
+    def _spill(self) -> None:
+        # "" opens a temporary on-disk database, deleted when it is closed
+        self.db = sqlite3.connect("")
+        self.db.execute("CREATE TABLE seen (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.db.executemany("INSERT INTO seen VALUES (?)", ((d,) for d in self.digests))
+        self.digests = set()
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def scan_csv(binary, chunk_size: Optional[int] = None, workers: Optional[int] = None) -> CsvScan:
+    """
+    First pass: validate the whole file one chunk at a time, checking each
+    chunk's rows for in-file duplicates (against every earlier row's key),
+    duplicates of stored cases and, for the rest, client ownership
+    conflicts. Memory holds a few chunks of rows plus the digests of the
+    keys seen so far, up to CASES_IMPORT_SEEN_IN_MEMORY of them (SeenKeys
+    moves the rest to a temporary on-disk table), and the row numbers of
+    the duplicates found.
+
+    Rows are parsed by chunk_parser(workers); the checks that follow run
+    here, in row order, so the report is the same for any worker count.
+    """
+    chunk_size = chunk_size or getattr(settings, "CASES_IMPORT_BATCH_SIZE", 1000)
+    scan = CsvScan()
+    with closing(SeenKeys()) as seen, open_csv(binary) as rows, chunk_parser(workers) as parse:
+        for chunk in parse(chunked(rows, chunk_size)):
+            candidates: List[ParsedRow] = []
+            for rownum, parsed, error in chunk:
+                if error:
+                    scan.error(rownum, error)
+                    continue
+                if seen.add(_digest(parsed.key)):
+                    candidates.append(parsed)
+                else:
+                    scan.file_dupes.append({"row": rownum, "msg": "Duplicate row in the uploaded CSV"})
+                    scan.skip.add(rownum)
+
+            # Exact copies of stored cases are skipped, not checked for
+            # ownership: re-importing an export must not conflict with itself.
+            existing = existing_case_keys(p.fields["client_email"] for p in candidates)
+            fresh: List[ParsedRow] = []
+            for parsed in candidates:
+                if parsed.key in existing:
+                    scan.db_dupes.append({"row": parsed.row, "msg": "Duplicate of an existing case in the database"})
+                    scan.skip.add(parsed.row)
+                else:
+                    fresh.append(parsed)
+
+            conflicts = find_conflicts([ConflictCheck(p.fields["client_email"], "", None) for p in fresh])
+            for parsed, message in zip(fresh, conflicts):
+                if message:
+                    scan.error(parsed.row, message)
+                else:
+                    scan.count += 1
+    scan.errors.sort(key=lambda e: e["row"])
+    return scan
+
+
+def import_csv(
+    binary,
+    scan: CsvScan,
+    chunk_size: Optional[int] = None,
+    *,
+    start_after: int = 0,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None,
+) -> ImportStats:
+    """
+    Second pass over a file scan_csv() passed: re-parse it chunk by chunk
+    and hand each chunk's rows, minus the duplicates, to a CaseImporter
+    that commits every `chunk_size` rows. Rows up to `start_after` were
+    committed by an earlier run and are skipped.
+    """
+    importer = CaseImporter(chunk_size, on_batch=on_batch)
+    with open_csv(binary) as rows, chunk_parser(workers) as parse:
+        wanted = ((rownum, row) for rownum, row in rows if rownum > start_after and rownum not in scan.skip)
+        for chunk in parse(chunked(wanted, importer.batch_size)):
+            for rownum, parsed, error in chunk:
+                if error:  # the file changed between passes
+                    raise CsvImportError(f"Row {rownum}: {error}")
+                importer.add(parsed.build_case(), parsed.status_note, row=rownum)
+    return importer.finish()
@@ -0,0 +1,136 @@
+# cases/jobs.py
+"""
+Background CSV imports (ImportJob), run by `manage.py run_import_jobs`.
+
+A worker claims one job under a lease, scans the file once (recording the
+row count, duplicate rows and any errors on the job), then imports it with
+cases.importer, advancing the job's checkpoint inside every batch's
+transaction. A job whose worker died is picked up again when its lease
+expires; a failed job is re-queued with resume(). Either way the import
+continues after the last committed batch.
+"""
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .importer import MAX_REPORTED_ERRORS, CsvImportError, CsvScan, import_csv, scan_csv
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=getattr(settings, "CASES_IMPORT_LEASE", 300))
+
+
+def enqueue(upload, user=None) -> ImportJob:
+    """Store the uploaded file and queue it for a worker."""
+    return ImportJob.objects.create(
+        file=upload,
+        file_name=getattr(upload, "name", "") or "",
+        created_by=user if getattr(user, "pk", None) else None,
+    )
+
+
+def resume(job_ids) -> int:
+    """Re-queue failed jobs; they continue from their checkpoint."""
+    return ImportJob.objects.filter(pk__in=job_ids, status=ImportJob.FAILED).update(
+        status=ImportJob.PENDING, locked_until=None, last_error="",
+    )
+
+
+def claim_job() -> Optional[ImportJob]:
+    """
+    Lease the oldest pending job, or a running one whose worker stopped
+    renewing its lease.
+    """
+    now = timezone.now()
+    due = ImportJob.objects.filter(
+        Q(status=ImportJob.PENDING)
+        | Q(status=ImportJob.RUNNING, locked_until__lt=now)
+    )
+    with transaction.atomic():
+        # skip_locked lets several workers claim different jobs (ignored
+        # where unsupported, e.g. SQLite, which serializes writers anyway)
+        job_id = (
+            due.select_for_update(skip_locked=True)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        due.filter(pk=job_id).update(
+            status=ImportJob.RUNNING,
+            locked_until=now + _lease(),
+            started_at=now,
+            run_start_rows=F("rows_done"),
+            attempts=F("attempts") + 1,
+        )
+    return ImportJob.objects.get(pk=job_id)
+
+
+def _checkpoint(job: ImportJob):
+    def on_batch(last_row: int, count: int) -> None:
+        # runs inside the batch's transaction: the checkpoint commits with it
+        ImportJob.objects.filter(pk=job.pk).update(
+            checkpoint_row=last_row,
+            rows_done=F("rows_done") + count,
+            locked_until=timezone.now() + _lease(),
+        )
+    return on_batch
+
+
+def _fail(job: ImportJob, message: str, errors=None) -> None:
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.FAILED,
+        locked_until=None,
+        last_error=message[:2000],
+        errors=errors if errors is not None else job.errors,
+    )
+
+
+def run_job(job: ImportJob) -> None:
+    """Scan (first run only) and import a claimed job; never raises."""
+    try:
+        with job.file.open("rb") as binary:
+            if job.rows_total is None:
+                scan = scan_csv(binary)
+                if scan.error_count:
+                    _fail(job, f"{scan.error_count} row(s) failed validation", scan.report_errors())
+                    return
+                job.rows_total = scan.count
+                job.skip_rows = sorted(scan.skip)
+                job.duplicates = scan.duplicates[:MAX_REPORTED_ERRORS]
+                job.save(update_fields=["rows_total", "skip_rows", "duplicates"])
+            else:
+                scan = CsvScan(skip=set(job.skip_rows))
+
+            import_csv(binary, scan, start_after=job.checkpoint_row, on_batch=_checkpoint(job))
+    except CsvImportError as exc:
+        _fail(job, str(exc), [{"row": None, "msg": str(exc)}])
+        return
+    except Exception as exc:
+        logger.exception("Import job %s failed", job.pk)
+        _fail(job, f"{type(exc).__name__}: {exc}")
+        return
+
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.DONE, locked_until=None, finished_at=timezone.now(),
+    )
+    logger.info("Import job %s done", job.pk)
+
+
+def process_next_job() -> Optional[ImportJob]:
+    """Claim and run one job; returns it (refreshed), or None when idle."""
+    job = claim_job()
+    if job is None:
+        return None
+    run_job(job)
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cases.jobs import process_next_job
+
+
+class Command(BaseCommand):
+    help = "Run queued CSV import jobs (cases.ImportJob) from the admin."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=2.0,
+            help="Seconds to sleep when no job is queued.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Run the jobs queued now and exit instead of polling.",
+        )
+
+    def handle(self, *args, interval, once, **options):
+        totals = {"done": 0, "failed": 0}
+        try:
+            while True:
+                job = process_next_job()
+                if job is not None:
+                    totals["done" if job.status == job.DONE else "failed"] += 1
+                    self.stdout.write(
+                        f"job {job.pk}: {job.status} rows={job.rows_done}/{job.rows_total}"
+                    )
+                    continue
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write("done={done} failed={failed}".format(**totals))
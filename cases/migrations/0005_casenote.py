@@ -0,0 +1,29 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_case_firm_email_case_firm_phone_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseNote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Case Approved', 'Case Approved'), ('Case Signed', 'Case Signed'), ('Court Date Scheduled', 'Court Date Scheduled'), ('Documents Received', 'Documents Received'), ('Hearing Scheduled', 'Hearing Scheduled'), ('Insurance Contacted', 'Insurance Contacted'), ('Mediation Scheduled', 'Mediation Scheduled'), ('Pending Insurance Response', 'Pending Insurance Response'), ('Settlement Approved', 'Settlement Approved'), ('Treatment Scheduled', 'Treatment Scheduled')], max_length=32)),
+                ('status_note', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_notes', to='cases.case')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['case', 'status', 'created_at'], name='cases_casen_case_id_0896f8_idx')],
+            },
+        ),
+    ]
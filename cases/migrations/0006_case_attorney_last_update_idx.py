@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_casenote'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['attorney', 'last_update', 'id'], name='cases_case_attorne_ecd156_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0006_case_attorney_last_update_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseFragment',
+            fields=[
+                ('case', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fragment', serialize=False, to='cases.case')),
+                ('source_last_update', models.DateTimeField()),
+                ('attorney_json', models.TextField()),
+                ('public_json', models.TextField()),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_latest_note(apps, schema_editor):
+    """Point every case at the newest note for its current status."""
+    Case = apps.get_model("cases", "Case")
+    CaseNote = apps.get_model("cases", "CaseNote")
+
+    # Ordered by created_at, so the last row seen per (case, status) wins.
+    latest = {}
+    notes = CaseNote.objects.order_by("case_id", "created_at").values_list(
+        "case_id", "status", "id", "status_note", "updated_at",
+    )
+    for case_id, status, note_id, text, updated_at in notes.iterator(chunk_size=2000):
+        latest[(case_id, status)] = (note_id, text, updated_at)
+
+    batch = []
+    for case in Case.objects.only("id", "case_status").iterator(chunk_size=2000):
+        note = latest.get((case.id, case.case_status))
+        if note is None:
+            continue
+        case.latest_note_id, case.latest_note_text, case.latest_note_updated_at = note
+        batch.append(case)
+        if len(batch) >= 500:
+            Case.objects.bulk_update(batch, ["latest_note", "latest_note_text", "latest_note_updated_at"])
+            batch = []
+    if batch:
+        Case.objects.bulk_update(batch, ["latest_note", "latest_note_text", "latest_note_updated_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0007_casefragment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='latest_note',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cases.casenote'),
+        ),
+        migrations.AddField(
+            model_name='case',
+            name='latest_note_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='case',
+            name='latest_note_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_latest_note, migrations.RunPython.noop),
+    ]
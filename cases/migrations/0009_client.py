@@ -0,0 +1,76 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:27
+
+import cases.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import uuid
+
+
+def _code_for(name):
+    # Same shape as cases.models._generate_human_code, frozen here.
+    prefix = (re.sub(r"[^A-Za-z]", "", name or "").upper()[:3] or "CLT").ljust(3, "X")
+    return f"{prefix}-{uuid.uuid4().hex[-6:].upper()}"
+
+
+def create_clients(apps, schema_editor):
+    """
+    One Client per distinct client_code, with the identity of that code's
+    most recently updated case (what the lookup endpoint used to show).
+    Cases without a code join the client with the same email, or get a new one.
+    """
+    Case = apps.get_model("cases", "Case")
+    Client = apps.get_model("cases", "Client")
+
+    clients, by_email, assignments = {}, {}, []
+    cases = Case.objects.order_by("-last_update").values_list(
+        "id", "client_code", "client_name", "client_email", "client_phone", "attorney_id",
+    )
+    for case_id, code, name, email, phone, attorney_id in cases.iterator(chunk_size=2000):
+        code = code or by_email.get(email) or _code_for(name)
+        if code not in clients:
+            clients[code] = Client(code=code, name=name, email=email, phone=phone, attorney_id=attorney_id)
+            by_email.setdefault(email, code)
+        assignments.append((case_id, code))
+
+    Client.objects.bulk_create(clients.values(), batch_size=500)
+    ids = dict(Client.objects.values_list("code", "id"))
+
+    batch = []
+    for case_id, code in assignments:
+        batch.append(Case(id=case_id, client_id=ids[code], client_code=code))
+        if len(batch) >= 500:
+            Case.objects.bulk_update(batch, ["client", "client_code"])
+            batch = []
+    if batch:
+        Case.objects.bulk_update(batch, ["client", "client_code"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cases', '0008_case_latest_note'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Client',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=32, unique=True)),
+                ('name', models.CharField(max_length=30)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('phone', models.CharField(max_length=10, validators=[cases.models.validate_phone_10])),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attorney', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='clients', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='case',
+            name='client',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cases', to='cases.client'),
+        ),
+        migrations.RunPython(create_clients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:50
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0009_client'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(django.db.models.functions.text.Lower('client_email'), name='cases_case_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.24 on 2026-10-17 23:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cases', '0012_case_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('case_id', models.UUIDField()),
+                ('removed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attorney', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='case_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['attorney', 'removed_at'], name='cases_caset_attorne_1033ee_idx')],
+            },
+        ),
+    ]
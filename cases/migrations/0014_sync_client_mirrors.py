@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Now
+
+
+def sync_client_mirrors(apps, schema_editor):
+    """
+    Copy every Client's identity onto its cases' mirror columns. Before,
+    each case save wrote its own identity onto the shared Client, leaving
+    the client's other cases (and the cases 0009 grouped by code) behind.
+    """
+    Case = apps.get_model("cases", "Case")
+    Client = apps.get_model("cases", "Client")
+
+    client = Client.objects.filter(pk=OuterRef("client_id"))
+    Case.objects.filter(client__isnull=False).filter(
+        ~Q(client_name=F("client__name"))
+        | ~Q(client_email=F("client__email"))
+        | ~Q(client_phone=F("client__phone"))
+        | ~Q(client_code=F("client__code"))
+    ).update(
+        client_name=Subquery(client.values("name")[:1]),
+        client_email=Subquery(client.values("email")[:1]),
+        client_phone=Subquery(client.values("phone")[:1]),
+        client_code=Subquery(client.values("code")[:1]),
+        updated_at=Now(),
+    )
+    # rendered fragments may hold the old identity
+    apps.get_model("cases", "CaseFragment").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0013_casetombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(sync_client_mirrors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def drop_fragments(apps, schema_editor):
+    # Stamped with last_update, not updated_at: re-render on the next read.
+    apps.get_model("cases", "CaseFragment").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0014_sync_client_mirrors'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='casefragment',
+            old_name='source_last_update',
+            new_name='source_updated_at',
+        ),
+        migrations.RunPython(drop_fragments, migrations.RunPython.noop),
+    ]
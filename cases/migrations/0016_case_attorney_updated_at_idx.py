@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-17 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0015_casefragment_source_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['attorney', 'updated_at', 'id'], name='cases_case_attorne_9a1543_idx'),
+        ),
+    ]
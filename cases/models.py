@@ -2,7 +2,8 @@ from __future__ import annotations
 import re
 import uuid
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
@@ -27,6 +28,8 @@ CASE_STATUSES = (
     "Treatment Scheduled",
 )
 
+LATEST_NOTE_FIELDS = ["latest_note", "latest_note_text", "latest_note_updated_at"]
+
 CASE_TYPE_CHOICES = tuple((v, v) for v in CASE_TYPES)
 CASE_STATUS_CHOICES = tuple((v, v) for v in CASE_STATUSES)
 
@@ -41,9 +44,91 @@ def _generate_human_code(name: str) -> str:
     suffix = uuid.uuid4().hex[-6:].upper()
     return f"{prefix}-{suffix}"
 
+# Fields Case snapshots when loaded, so saves can tell what changed without
+# re-reading the row (see Case.changed_fields()).
+TRACKED_FIELDS = ("case_status", "notes", "client_code", "attorney_id")
+
+CLIENT_FIELDS = ["client", "client_name", "client_code", "client_email", "client_phone", "attorney"]
+
+# Client field -> the Case column mirroring it
+CLIENT_MIRRORS = {"name": "client_name", "email": "client_email", "phone": "client_phone", "code": "client_code"}
+
+
+class Client(models.Model):
+    """
+    A client's identity and access code, shared by all of their cases.
+
+    Case keeps client_name/code/email/phone as mirrors of these columns (the
+    serializers and admin read them). Client.save() copies its identity onto
+    every one of its cases in the same transaction; Case.save() links a case
+    to its Client (creating one if needed) and only writes the Client when
+    the case's own identity fields were edited.
+    """
+    code = models.CharField(max_length=32, unique=True)
+    name = models.CharField(max_length=30)
+    email = models.EmailField(db_index=True)
+    phone = models.CharField(max_length=10, validators=[validate_phone_10])
+    attorney = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name="clients",
+        null=True, blank=True,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.code})"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding:
+                self.sync_cases()
+
+    def mirror_values(self) -> dict:
+        return {case_field: getattr(self, name) for name, case_field in CLIENT_MIRRORS.items()}
+
+    def sync_cases(self) -> list:
+        """Copy the identity onto the mirror columns of cases that differ; returns their ids."""
+        values = self.mirror_values()
+        ids = list(Case.objects.filter(client=self).exclude(**values).values_list("pk", flat=True))
+        if ids:
+            # lazy: these modules import the models
+            from .cache import invalidate_client_profile
+            from .unitofwork import drop_fragments
+
+            # updated_at is the delta sync's clock: the next ?since= poll
+            # returns these cases with the new identity
+            Case.objects.filter(pk__in=ids).update(**values, updated_at=timezone.now())
+            drop_fragments(ids)
+            invalidate_client_profile(self.code)
+        return ids
+
+    @classmethod
+    def for_case(cls, case: "Case") -> "Client | None":
+        """
+        The existing client a case belongs to: by its code, else by email.
+        Several clients can share an email (codes are never merged), so the
+        oldest one wins, as in cases.conflicts and the importer.
+        """
+        if case.client_id:
+            return case.client
+        if case.client_code:
+            return cls.objects.filter(code=case.client_code).first()
+        return cls.objects.filter(email=case.client_email).order_by("pk").first()
+
+
 class Case(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.PROTECT,
+        related_name="cases",
+        null=True, blank=True,
+        editable=False,
+    )
     client_name = models.CharField(max_length=30)
     client_code = models.CharField(max_length=32, blank=True) 
     client_phone = models.CharField(max_length=10, validators=[validate_phone_10])
@@ -64,8 +149,25 @@ class Case(models.Model):
     case_status = models.CharField(max_length=32, choices=CASE_STATUS_CHOICES)
     date_opened = models.DateTimeField(default=timezone.now)
     last_update = models.DateTimeField(default=timezone.now)
+    # Row version: moves on every save, whichever fields changed (ETags,
+    # fragment freshness, delta sync). last_update only tracks changes clients
+    # are told about.
+    updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True)
 
+    # Latest CaseNote for the current case_status, denormalized so reads and
+    # update responses need no note query. Kept in sync by add_status_note()
+    # and refresh_latest_note().
+    latest_note = models.ForeignKey(
+        "CaseNote",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True, blank=True,
+        editable=False,
+    )
+    latest_note_text = models.TextField(blank=True, default="", editable=False)
+    latest_note_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     class Meta:
         indexes = [
             models.Index(fields=["case_type"]),
@@ -74,35 +176,70 @@ class Case(models.Model):
             models.Index(fields=["last_update"]),
             models.Index(fields=["client_name"]),
             models.Index(fields=["client_email"]),
+            # case-insensitive email matching (cases.importer.existing_case_keys)
+            models.Index(Lower("client_email"), name="cases_case_email_lower_idx"),
             models.Index(fields=["client_code"]),
             models.Index(fields=["firm_name"]),
             models.Index(fields=["attorney"]),
             models.Index(fields=["firm_email"]),
             models.Index(fields=["firm_phone"]),
+            # keyset pagination (last_update) / delta sync (updated_at) for
+            # AttorneyBootstrapView
+            models.Index(fields=["attorney", "last_update", "id"]),
+            models.Index(fields=["attorney", "updated_at", "id"]),
         ]
         ordering = ["-last_update"]
 
     def __str__(self) -> str:
         return f"Case {self.pk} - {self.client_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in TRACKED_FIELDS
+        }
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot(fields)
+
+    def _snapshot(self, fields=None) -> None:
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        if fields is not None:
+            # update_fields may name the FK ("attorney") rather than "attorney_id"
+            fields = {self._meta.get_field(name).attname for name in fields}
+        for name in TRACKED_FIELDS:
+            if (fields is None or name in fields) and name in self.__dict__:
+                loaded[name] = self.__dict__[name]
+
+    def previous_value(self, name: str):
+        """Value of tracked field `name` as last loaded from / saved to the DB."""
+        return self.__dict__.get("_loaded_values", {})[name]
+
+    def changed_fields(self, fields=TRACKED_FIELDS) -> list[str] | None:
+        """
+        Tracked fields whose value differs from the loaded snapshot, or None
+        when there is no snapshot to compare against (an instance built by
+        hand rather than loaded from the DB, or a deferred field).
+        """
+        loaded = self.__dict__.get("_loaded_values", {})
+        if any(name not in loaded for name in fields):
+            return None
+        return [name for name in fields if getattr(self, name) != loaded[name]]
+
     def clean(self):
         if self.last_update and self.date_opened and self.last_update < self.date_opened:
             raise ValidationError({"last_update": "Last update cannot be before date opened."})
 
-      
-        qs = Case.objects.all()
-        if self.pk:
-            qs = qs.exclude(pk=self.pk)
+        # Same grouped query bulk imports use (cases.conflicts)
+        from .conflicts import ConflictCheck, find_conflicts
 
-        conflict = qs.filter(client_email=self.client_email).exclude(attorney_id=self.attorney_id).exists()
-        if conflict:
-            raise ValidationError({"attorney": "This client email is already associated with another attorney."})
+        message = find_conflicts([ConflictCheck.for_case(self)])[0]
+        if message:
+            raise ValidationError({"attorney": message})
 
-        if self.client_code:
-            conflict_code = qs.filter(client_code=self.client_code).exclude(attorney_id=self.attorney_id).exists()
-            if conflict_code:
-                raise ValidationError({"attorney": "This client code is already associated with another attorney."})
-            
     def add_status_note(self, text: str, *, status: str | None = None, created_by=None):
         status = status or self.case_status
         if status not in CASE_STATUSES:
@@ -126,12 +263,36 @@ class Case(models.Model):
             note.created_by = created_by
         note.save()
 
-        # bump last_update on the Case
+        # bump last_update on the Case (and the denormalized latest note,
+        # which this is whenever it belongs to the current status); inside a
+        # unit of work this joins the case's single flush
+        from .unitofwork import save_case
+
         self.last_update = timezone.now()
-        self.save(update_fields=["last_update"])
+        update_fields = ["last_update"]
+        if status == self.case_status:
+            self._set_latest_note(note)
+            update_fields += LATEST_NOTE_FIELDS
+        save_case(self, *update_fields)
 
         return note
 
+    def _set_latest_note(self, note: "CaseNote | None") -> None:
+        self.latest_note = note
+        self.latest_note_text = note.status_note if note else ""
+        self.latest_note_updated_at = note.updated_at if note else None
+
+    def refresh_latest_note(self, *, save: bool = True) -> None:
+        """Recompute the denormalized latest note for the current status."""
+        self._set_latest_note(
+            self.status_notes
+            .filter(status=self.case_status)
+            .order_by("-created_at")
+            .first()
+        )
+        if save:
+            self.save(update_fields=LATEST_NOTE_FIELDS)
+
 
     def notes_for_status(self, status: str | None = None):
         status = status or self.case_status
@@ -141,18 +302,60 @@ class Case(models.Model):
     def current_status_notes(self):
         return self.notes_for_status(self.case_status)
 
+    def _sync_client(self) -> None:
+        """
+        Link this case to its Client, creating one from the case's identity
+        if there is none. A case joining an existing client takes on the
+        client's identity; identity edits on a case already linked to the
+        client are saved to the Client, which copies them to all its cases.
+        The client's owner follows the case's attorney only while this is
+        its only case.
+        """
+        linked = self.client_id is not None
+        client = Client.for_case(self)
+        if client is None:
+            client = Client(
+                code=self.client_code or _generate_human_code(self.client_name),
+                name=self.client_name,
+                email=self.client_email,
+                phone=self.client_phone,
+                attorney_id=self.attorney_id,
+            )
+            client.save()
+        else:
+            dirty = False
+            if linked:
+                for name, case_field in CLIENT_MIRRORS.items():
+                    if name != "code" and getattr(client, name) != getattr(self, case_field):
+                        setattr(client, name, getattr(self, case_field))
+                        dirty = True
+            if client.attorney_id != self.attorney_id and not (
+                Case.objects.filter(client=client).exclude(pk=self.pk).exists()
+            ):
+                client.attorney_id = self.attorney_id
+                dirty = True
+            if dirty:
+                client.save()
+        self.client = client
+        for case_field, value in client.mirror_values().items():
+            setattr(self, case_field, value)
+
     def save(self, *args, **kwargs):
         validate_phone_10(self.client_phone)
-        if not self.client_code:
-            existing = (
-                Case.objects
-                .filter(client_email=self.client_email)
-                .order_by("-last_update")
-                .first()
-            )
-            self.client_code = existing.client_code if existing and existing.client_code else _generate_human_code(self.client_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(CLIENT_FIELDS):
+            self._sync_client()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "client", *CLIENT_MIRRORS.values()}
+                if {"attorney", "attorney_id"} & set(update_fields):
+                    # a reassignment bumps last_update (cases.signals)
+                    kwargs["update_fields"].add("last_update")
+        if update_fields is not None:
+            # auto_now is only written when listed
+            kwargs["update_fields"] = {*kwargs["update_fields"], "updated_at"}
 
         super().save(*args, **kwargs)
+        self._snapshot(kwargs.get("update_fields"))
 
 class CaseNote(models.Model):
     case = models.ForeignKey(
@@ -176,3 +379,132 @@ class CaseNote(models.Model):
 
     def __str__(self) -> str:
         return f"Note for {self.case.client_name} [{self.status}]"
+
+
+class CaseTombstone(models.Model):
+    """
+    A case that left an attorney's list, deleted or reassigned, so the
+    bootstrap delta sync (`since=`) can tell their clients to drop it.
+    """
+    case_id = models.UUIDField()
+    attorney = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="case_tombstones",
+    )
+    removed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["attorney", "removed_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Case {self.case_id} removed from attorney {self.attorney_id}"
+
+
+class CaseFragment(models.Model):
+    """
+    Pre-rendered JSON for one case and its notes, exactly as
+    AttorneyItemSerializer / CasePublicSerializer would render it.
+
+    Rows are dropped on every Case/CaseNote write (cases.signals) and rebuilt
+    on the next read; `source_updated_at` (the case's updated_at when it was
+    rendered) lets readers spot a fragment rendered from another version.
+    """
+    case = models.OneToOneField(
+        Case,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="fragment",
+    )
+    source_updated_at = models.DateTimeField()
+    attorney_json = models.TextField()
+    public_json = models.TextField()
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Fragment for case {self.case_id}"
+
+
+class ImportJob(models.Model):
+    """
+    A CSV upload imported in the background by `manage.py run_import_jobs`
+    (cases.jobs) instead of inside the admin request.
+
+    The worker scans the file once (errors, duplicates), then commits it in
+    batches; each batch advances `checkpoint_row` in the same transaction,
+    so a failed or interrupted job resumes after its last committed batch.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = ((PENDING, "Pending"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed"))
+
+    file = models.FileField(upload_to="case_imports/")
+    file_name = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="import_jobs",
+        null=True, blank=True,
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+
+    # set by the scan: rows to import, and the duplicate rows to skip
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    skip_rows = models.JSONField(default=list, blank=True)
+    duplicates = models.JSONField(default=list, blank=True)
+    errors = models.JSONField(default=list, blank=True)
+
+    rows_done = models.PositiveIntegerField(default=0)
+    # last CSV row number (header = 1) whose batch is committed
+    checkpoint_row = models.PositiveIntegerField(default=0)
+
+    attempts = models.PositiveIntegerField(default=0)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # current run, for rows/sec: when it started and rows_done at that point
+    started_at = models.DateTimeField(null=True, blank=True)
+    run_start_rows = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"Import {self.pk} ({self.file_name or self.file.name}) - {self.status}"
+
+    def progress(self) -> dict:
+        """What the admin modal polls: counts, rows/sec and ETA for the current run."""
+        rate = None
+        eta = None
+        if self.started_at and self.status == self.RUNNING:
+            elapsed = (timezone.now() - self.started_at).total_seconds()
+            done = self.rows_done - self.run_start_rows
+            if elapsed > 0 and done > 0:
+                rate = done / elapsed
+                if self.rows_total is not None:
+                    eta = max(0, self.rows_total - self.rows_done) / rate
+        elif self.status == self.DONE and self.started_at and self.finished_at:
+            elapsed = (self.finished_at - self.started_at).total_seconds()
+            if elapsed > 0:
+                rate = (self.rows_done - self.run_start_rows) / elapsed
+            eta = 0
+        return {
+            "id": self.pk,
+            "status": self.status,
+            "rows_total": self.rows_total,
+            "rows_done": self.rows_done,
+            "checkpoint_row": self.checkpoint_row,
+            "rows_per_sec": round(rate, 1) if rate is not None else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "skipped_duplicates": len(self.skip_rows),
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
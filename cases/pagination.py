@@ -0,0 +1,59 @@
+# cases/pagination.py
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+Cursor = Tuple[datetime, uuid.UUID]
+
+# Sorts after every case id: (ts, LAST_ID) is past everything at `ts`.
+LAST_ID = uuid.UUID(int=2 ** 128 - 1)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(ts: datetime, pk) -> str:
+    """Opaque, URL-safe token for a (timestamp, id) keyset position."""
+    raw = f"{ts.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        ts, pk = raw.split("|", 1)
+        last_update = datetime.fromisoformat(ts)
+        pk = uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor("Invalid cursor.") from exc
+
+    if timezone.is_naive(last_update):
+        raise InvalidCursor("Invalid cursor.")
+    return last_update, pk
+
+
+def newer_than(qs: QuerySet, cursor: Optional[Cursor]) -> QuerySet:
+    """
+    Rows saved strictly after `cursor`, oldest first (delta sync order).
+    Keyed on (updated_at, id): every save moves updated_at, while
+    last_update only moves for the changes clients are notified about.
+    """
+    if cursor is not None:
+        ts, pk = cursor
+        qs = qs.filter(Q(updated_at__gt=ts) | Q(updated_at=ts, id__gt=pk))
+    return qs.order_by("updated_at", "id")
+
+
+def older_than(qs: QuerySet, cursor: Optional[Cursor]) -> QuerySet:
+    """Rows strictly before `cursor` on (last_update, id), newest change first (page order)."""
+    if cursor is not None:
+        ts, pk = cursor
+        qs = qs.filter(Q(last_update__lt=ts) | Q(last_update=ts, id__lt=pk))
+    return qs.order_by("-last_update", "-id")
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Case, CaseNote
+from .unitofwork import unit_of_work
 
 class CaseNoteSerializer(serializers.ModelSerializer):
     case_status = serializers.CharField(source="status")
@@ -66,31 +67,36 @@ class CaseUpdateSerializer(serializers.ModelSerializer):
         # None means "field not sent at all"
         status_note_text = validated_data.pop("status_note", None)
 
-        # update the Case itself (notes / case_status)
-        instance = super().update(instance, validated_data)
-
         # figure out who is editing (may be None)
         request = self.context.get("request")
         user = getattr(request, "user", None) if request else None
         if user is not None and not getattr(user, "is_authenticated", False):
             user = None
 
-        # CASE 1 & 3: client SENT status_note (even empty string)
-        if status_note_text is not None:
-            instance.add_status_note(
-                status_note_text,
-                status=instance.case_status,
-                created_by=user,
-            )
-
-        # CASE 2: status changed but no status_note field sent
-        elif instance.case_status != old_status:
-            # create/update note with empty text for the new status
-            instance.add_status_note(
-                "",
-                status=instance.case_status,
-                created_by=user,
-            )
+        # The case save, the note and both last_update bumps are flushed as
+        # one UPDATE per row (and one notification) in one transaction.
+        with unit_of_work() as uow:
+            # update the Case itself (notes / case_status)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            uow.save_case(instance, *validated_data, "last_update")
+
+            # CASE 1 & 3: client SENT status_note (even empty string)
+            if status_note_text is not None:
+                instance.add_status_note(
+                    status_note_text,
+                    status=instance.case_status,
+                    created_by=user,
+                )
+
+            # CASE 2: status changed but no status_note field sent
+            elif instance.case_status != old_status:
+                # create/update note with empty text for the new status
+                instance.add_status_note(
+                    "",
+                    status=instance.case_status,
+                    created_by=user,
+                )
 
         return instance
 
@@ -104,12 +110,7 @@ class CaseUpdateSerializer(serializers.ModelSerializer):
         }
         """
         rep = super().to_representation(instance)
-        latest = (
-            instance.status_notes
-            .filter(status=instance.case_status)
-            .order_by("-created_at")
-            .first()
-        )
-        rep["status_note"] = latest.status_note if latest else ""
+        # denormalized on Case by add_status_note(); no note query needed
+        rep["status_note"] = instance.latest_note_text
         return rep
 
@@ -1,40 +1,58 @@
 # cases/signals.py
-from typing import List
-
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import Case, CaseNote
+from .cache import invalidate_client_profile
+from .models import TRACKED_FIELDS, Case, CaseNote, CaseTombstone
+from .unitofwork import drop_fragments, notify, save_case
 from notifications.services import notify_client_case_updated
 
 
 @receiver(pre_save, sender=Case)
-def case_status_or_notes_changed(sender, instance: Case, **kwargs) -> None:
+def case_status_or_notes_changed(sender, instance: Case, update_fields=None, raw=False, **kwargs) -> None:
     """
     Detect changes to case_status or notes and trigger a client notification.
 
     This runs for *every* Case save:
-      - If instance.pk is None => it's a new case, skip.
-      - Otherwise, compare with previous DB version.
+      - New cases and saves whose update_fields exclude the tracked fields
+        are skipped without touching the DB.
+      - Otherwise, diff against the snapshot taken when the case was loaded
+        (Case.changed_fields()); only hand-built instances fall back to
+        reading the previous row.
+      - A change of attorney bumps last_update (the case tops the new
+        attorney's list; the save itself moves updated_at, which their delta
+        sync follows) and the previous attorney gets a CaseTombstone once
+        the save succeeds.
     """
-    if not instance.pk:
-        # New case, nothing to compare against
+    if raw or instance._state.adding:
         return
-
-    try:
-        previous = Case.objects.get(pk=instance.pk)
-    except Case.DoesNotExist:
-        # Shouldn't happen in practice, but be defensive
+    # update_fields may name the FK ("attorney") rather than "attorney_id"
+    saved = None if update_fields is None else {instance._meta.get_field(name).attname for name in update_fields}
+    if saved is not None and not saved & set(TRACKED_FIELDS):
         return
 
-    changed: List[str] = []
+    changed = instance.changed_fields()
+    if changed is None:
+        previous = Case.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+        if previous is None:
+            # Shouldn't happen in practice, but be defensive
+            return
+        instance._loaded_values = previous
+        changed = instance.changed_fields()
 
-    if previous.case_status != instance.case_status:
-        changed.append("case_status")
+    if "client_code" in changed:
+        invalidate_client_profile(instance.previous_value("client_code"))
+        changed.remove("client_code")
 
-    if previous.notes != instance.notes:
-        changed.append("notes")
+    if saved is not None:
+        changed = [name for name in changed if name in saved]
+
+    if "attorney_id" in changed:
+        # the case leaves one attorney's delta sync and joins another's
+        instance._reassigned_from = instance.previous_value("attorney_id")
+        instance.last_update = timezone.now()
+        changed.remove("attorney_id")
 
     if not changed:
         return
@@ -42,8 +60,9 @@ def case_status_or_notes_changed(sender, instance: Case, **kwargs) -> None:
     # Keep last_update in sync whenever these important fields change
     instance.last_update = timezone.now()
 
-    # Fire the notification via the service helper
-    notify_client_case_updated(instance, changed)
+    # Queue the notification via the service helper (once per case inside a
+    # unit of work)
+    notify(notify_client_case_updated, instance, changed)
 
 @receiver(post_save, sender=CaseNote)
 def case_status_note_changed(sender, instance: CaseNote, created: bool, **kwargs) -> None:
@@ -59,7 +78,75 @@ def case_status_note_changed(sender, instance: CaseNote, created: bool, **kwargs
 
     # Optionally bump last_update on the Case
     case.last_update = timezone.now()
-    case.save(update_fields=["last_update"])
+    save_case(case, "last_update")
 
     # Re-use the existing 'notes' semantics in notify_client_case_updated
-    notify_client_case_updated(case, changed_fields=["case_note"])
\ No newline at end of file
+    notify(notify_client_case_updated, case, ["case_note"])
+
+
+@receiver(post_save, sender=Case)
+def case_record_reassignment(sender, instance: Case, **kwargs) -> None:
+    previous = instance.__dict__.pop("_reassigned_from", None)
+    if previous is not None:
+        CaseTombstone.objects.create(case_id=instance.pk, attorney_id=previous)
+
+
+@receiver(post_delete, sender=Case)
+def case_record_deletion(sender, instance: Case, **kwargs) -> None:
+    if instance.attorney_id is not None:
+        CaseTombstone.objects.create(case_id=instance.pk, attorney_id=instance.attorney_id)
+
+
+@receiver(post_save, sender=Case)
+@receiver(post_delete, sender=Case)
+def case_invalidate_client_profile(sender, instance: Case, **kwargs) -> None:
+    """Evict the cached client lookup payload for this case's client."""
+    invalidate_client_profile(instance.client_code)
+
+
+@receiver(post_save, sender=Case)
+def case_drop_fragment(sender, instance: Case, **kwargs) -> None:
+    """The pre-rendered JSON is rebuilt on the next read (cases.fragments)."""
+    drop_fragments([instance.pk])
+
+
+@receiver(post_save, sender=CaseNote)
+@receiver(post_delete, sender=CaseNote)
+def case_note_invalidate_client_profile(sender, instance: CaseNote, **kwargs) -> None:
+    """Notes are embedded in the lookup payload, so evict on every note write."""
+    try:
+        code = instance.case.client_code
+    except Case.DoesNotExist:
+        # Note deleted as part of its case's cascade; the case handler covers it.
+        return
+    invalidate_client_profile(code)
+
+
+@receiver(post_save, sender=CaseNote)
+@receiver(post_delete, sender=CaseNote)
+def case_note_drop_fragment(sender, instance: CaseNote, **kwargs) -> None:
+    drop_fragments([instance.case_id])
+
+
+@receiver(post_delete, sender=CaseNote)
+def case_note_deleted_bump_case(sender, instance: CaseNote, **kwargs) -> None:
+    """
+    A removed note changes the case's payload, so bump last_update and
+    updated_at (the delta sync's clock), as note saves do. A plain UPDATE: the note handlers already
+    drop the fragment and the cached lookup payload.
+    """
+    now = timezone.now()
+    Case.objects.filter(pk=instance.case_id).update(last_update=now, updated_at=now)
+
+
+@receiver(post_delete, sender=CaseNote)
+def case_note_deleted_refresh_latest(sender, instance: CaseNote, **kwargs) -> None:
+    """
+    Deleting the denormalized latest note nulls Case.latest_note (SET_NULL)
+    but leaves its text behind; recompute from the remaining notes.
+    """
+    case = Case.objects.filter(pk=instance.case_id, latest_note__isnull=True).exclude(
+        latest_note_text="", latest_note_updated_at__isnull=True,
+    ).first()
+    if case is not None:
+        case.refresh_latest_note()
@@ -1,3 +1,1229 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.apps import apps as django_apps
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+
+from . import fastpath
+from .cache import ClientProfileCache, client_profile_cache
+from .conflicts import CODE_CONFLICT, EMAIL_CONFLICT, ConflictCheck, find_conflicts
+from .importer import CaseImporter, SeenKeys, import_csv, scan_csv
+from .jobs import claim_job, resume
+from .models import Case, CaseFragment, CaseNote, Client, ImportJob
+from .serializers import AttorneyItemSerializer, CasePublicSerializer, CaseUpdateSerializer, ClientPublicSerializer
+from .unitofwork import unit_of_work
+
+User = get_user_model()
+
+
+def seed_client_cases(code, count, *, notes_per_case=2, attorney=None, email="client@example.com"):
+    """
+    Bulk-insert `count` cases (each with `notes_per_case` notes) for one client.
+    bulk_create bypasses save()/signals so fixtures stay cheap even for 200 cases.
+    """
+    now = timezone.now()
+    client, _ = Client.objects.get_or_create(
+        code=code,
+        defaults={"name": "Jane Client", "email": email, "phone": "5551234567", "attorney": attorney},
+    )
+    cases = Case.objects.bulk_create([
+        Case(
+            client=client,
+            client_name="Jane Client",
+            client_code=code,
+            client_phone="5551234567",
+            client_email=email,
+            firm_name="Acme Law",
+            attorney=attorney,
+            case_type="Auto Accident",
+            case_status="Case Signed",
+            date_opened=now - timedelta(days=30),
+            last_update=now - timedelta(minutes=i),
+            notes=f"case {i}",
+        )
+        for i in range(count)
+    ])
+    CaseNote.objects.bulk_create([
+        CaseNote(case=case, status="Case Signed", status_note=f"note {n}")
+        for case in cases
+        for n in range(notes_per_case)
+    ])
+    return cases
+
+
+class ClientLookupQueryCountTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("cases:client-lookup")
+        client_profile_cache.clear()
+
+    def _assert_lookup_queries(self, case_count):
+        code = f"JAN-{case_count:06d}"
+        seed_client_cases(code, case_count)
+
+        # cold: fingerprint + fragments + cases + notes + batched fragment upsert
+        with CaptureQueriesContext(connection) as cold:
+            response = self.client.get(self.url, {"code": code})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(cold), 6)
+
+        # warm: fingerprint + fragments
+        client_profile_cache.clear()
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"code": code})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["code"], code)
+        self.assertEqual(len(response.json()["cases"]), case_count)
+        self.assertEqual(len(response.json()["cases"][0]["status_notes"]), 2)
+
+    def test_lookup_one_case(self):
+        self._assert_lookup_queries(1)
+
+    def test_lookup_ten_cases(self):
+        self._assert_lookup_queries(10)
+
+    def test_lookup_two_hundred_cases(self):
+        self._assert_lookup_queries(200)
+
+    def test_lookup_unknown_code_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"code": "NOPE-000000"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_lookup_orders_freshest_case_first(self):
+        cases = seed_client_cases("JAN-ORDER1", 3)
+        response = self.client.get(self.url, {"code": "JAN-ORDER1"})
+        self.assertEqual(response.json()["cases"][0]["id"], str(cases[0].id))
+
+
+class ClientProfileCacheTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("cases:client-lookup")
+        client_profile_cache.clear()
+
+    def test_second_lookup_is_served_from_cache(self):
+        seed_client_cases("JAN-CACHE1", 3)
+        first = self.client.get(self.url, {"code": "JAN-CACHE1"})
+
+        # only the fingerprint check
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, {"code": "JAN-CACHE1"})
+
+        self.assertEqual(first.json(), second.json())
+        stats = client_profile_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_case_save_invalidates_entry(self):
+        cases = seed_client_cases("JAN-CACHE2", 1)
+        self.client.get(self.url, {"code": "JAN-CACHE2"})
+
+        case = Case.objects.get(pk=cases[0].pk)
+        case.notes = "updated notes"
+        case.save()
+
+        response = self.client.get(self.url, {"code": "JAN-CACHE2"})
+        self.assertEqual(response.json()["cases"][0]["notes"], "updated notes")
+
+    def test_note_change_invalidates_entry(self):
+        cases = seed_client_cases("JAN-CACHE3", 1, notes_per_case=0)
+        self.client.get(self.url, {"code": "JAN-CACHE3"})
+
+        Case.objects.get(pk=cases[0].pk).add_status_note("new note")
+
+        response = self.client.get(self.url, {"code": "JAN-CACHE3"})
+        notes = response.json()["cases"][0]["status_notes"]
+        self.assertEqual([n["status_note"] for n in notes], ["new note"])
+
+    def test_entry_for_older_version_is_a_miss(self):
+        cache = ClientProfileCache(max_entries=4, ttl=0)
+        cache.set("A", {"v": 1}, version='"v1"')
+
+        self.assertIsNone(cache.get("A", version='"v2"'))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_lru_eviction_is_bounded(self):
+        cache = ClientProfileCache(max_entries=2, ttl=0)
+        cache.set("A", 1)
+        cache.set("B", 2)
+        cache.get("A")
+        cache.set("C", 3)
+
+        self.assertIsNone(cache.get("B"))
+        self.assertEqual(cache.get("A"), 1)
+        self.assertEqual(cache.get("C"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_stats_endpoint_requires_staff(self):
+        url = reverse("cases:client-lookup-cache-stats")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        staff = User.objects.create_user(email="staff@example.com", password="x", is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("hit_rate", response.data)
+
+
+class AttorneyBootstrapCursorTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("cases:attorney-bootstrap")
+        self.attorney = User.objects.create_user(email="atty@example.com", password="x")
+        self.client.force_authenticate(self.attorney)
+        self.cases = seed_client_cases("JAN-BOOT01", 5, attorney=self.attorney)
+
+    def test_plain_list_is_unchanged(self):
+        response = self.client.get(self.url, {"limit": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c["case_id"] for c in response.json()], [str(c.id) for c in self.cases[:3]])
+
+    def test_cursor_pages_cover_all_cases_once(self):
+        seen, params = [], {"cursor": "", "limit": 2}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [c["case_id"] for c in response.json()["results"]]
+            if not response.json()["next_cursor"]:
+                break
+            params["cursor"] = response.json()["next_cursor"]
+
+        self.assertEqual(seen, [str(c.id) for c in self.cases])
+
+    def test_delta_returns_only_changed_cases(self):
+        full = self.client.get(self.url, {"since": "", "limit": 500})
+        self.assertEqual(len(full.json()["results"]), 5)
+        self.assertFalse(full.json()["has_more"])
+        cursor = full.json()["cursor"]
+
+        idle = self.client.get(self.url, {"since": cursor})
+        self.assertEqual(idle.json()["results"], [])
+        self.assertEqual(idle.json()["cursor"], cursor)
+
+        changed = Case.objects.get(pk=self.cases[3].pk)
+        changed.add_status_note("called insurer", status="Insurance Contacted")
+
+        delta = self.client.get(self.url, {"since": cursor})
+        self.assertEqual([c["case_id"] for c in delta.json()["results"]], [str(changed.id)])
+        self.assertIn("called insurer", [n["status_note"] for n in delta.json()["results"][0]["status_notes"]])
+        self.assertNotEqual(delta.json()["cursor"], cursor)
+
+    def _sync(self):
+        body = self.client.get(self.url, {"since": "", "limit": 500}).json()
+        self.assertEqual(body["removed"], [])
+        return body["cursor"]
+
+    def test_delta_reports_deleted_cases(self):
+        cursor = self._sync()
+        gone = self.cases[1].pk
+        Case.objects.get(pk=gone).delete()
+
+        delta = self.client.get(self.url, {"since": cursor}).json()
+        self.assertEqual((delta["results"], delta["removed"]), ([], [str(gone)]))
+        # the cursor moves past the removal
+        idle = self.client.get(self.url, {"since": delta["cursor"]}).json()
+        self.assertEqual((idle["results"], idle["removed"]), ([], []))
+
+    def test_delta_returns_case_whose_note_was_deleted(self):
+        cursor = self._sync()
+        case = self.cases[2]
+        note = case.status_notes.first()
+        note.delete()
+
+        delta = self.client.get(self.url, {"since": cursor}).json()
+        self.assertEqual([c["case_id"] for c in delta["results"]], [str(case.pk)])
+        self.assertNotIn(note.pk, [n["id"] for n in delta["results"][0]["status_notes"]])
+
+    def test_delta_follows_reassigned_cases(self):
+        other = User.objects.create_user(email="other-atty@example.com", password="x")
+        seed_client_cases("OTH-BOOT01", 1, attorney=other, email="other@example.com")
+        cursor = self._sync()
+        self.client.force_authenticate(other)
+        other_cursor = self._sync()
+
+        case = Case.objects.get(pk=self.cases[0].pk)
+        case.attorney = other
+        case.save(update_fields=["attorney"])
+
+        self.assertTrue(other_cursor)
+        delta = self.client.get(self.url, {"since": other_cursor}).json()
+        self.assertEqual([c["case_id"] for c in delta["results"]], [str(case.pk)])
+        self.client.force_authenticate(self.attorney)
+        delta = self.client.get(self.url, {"since": cursor}).json()
+        self.assertEqual((delta["results"], delta["removed"]), ([], [str(case.pk)]))
+
+    def test_delta_returns_case_with_non_status_edit(self):
+        cursor = self._sync()
+        case = Case.objects.get(pk=self.cases[1].pk)
+        last_update = case.last_update
+        case.firm_name = "Renamed Firm LLP"
+        case.save()
+        self.assertEqual(Case.objects.get(pk=case.pk).last_update, last_update)
+
+        delta = self.client.get(self.url, {"since": cursor}).json()
+        self.assertEqual([c["case_id"] for c in delta["results"]], [str(case.pk)])
+        self.assertEqual(delta["results"][0]["firm_name"], "Renamed Firm LLP")
+        idle = self.client.get(self.url, {"since": delta["cursor"]}).json()
+        self.assertEqual((idle["results"], idle["removed"]), ([], []))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {"since": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalResponseTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.attorney = User.objects.create_user(email="etag@example.com", password="x")
+        self.cases = seed_client_cases("JAN-ETAG01", 3, attorney=self.attorney)
+        client_profile_cache.clear()
+
+    def test_client_lookup_not_modified(self):
+        url = reverse("cases:client-lookup")
+        first = self.client.get(url, {"code": "JAN-ETAG01"})
+        etag = first["ETag"]
+
+        with self.assertNumQueries(1):
+            second = self.client.get(url, {"code": "JAN-ETAG01"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b"")
+
+        weak = self.client.get(url, {"code": "JAN-ETAG01"}, HTTP_IF_NONE_MATCH=f"W/{etag}")
+        self.assertEqual(weak.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_client_lookup_post_never_answers_not_modified(self):
+        url = reverse("cases:client-lookup")
+        etag = self.client.get(url, {"code": "JAN-ETAG01"})["ETag"]
+
+        response = self.client.post(url, {"code": "JAN-ETAG01"}, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["code"], "JAN-ETAG01")
+
+        head = self.client.head(url, {"code": "JAN-ETAG01"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(head.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_client_lookup_etag_moves_on_note_edit(self):
+        url = reverse("cases:client-lookup")
+        etag = self.client.get(url, {"code": "JAN-ETAG01"})["ETag"]
+
+        note = CaseNote.objects.filter(case=self.cases[2]).first()
+        note.status_note = "edited"
+        note.save()
+
+        response = self.client.get(url, {"code": "JAN-ETAG01"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etags_move_on_any_case_edit(self):
+        # firm fields don't bump last_update, but they are in both payloads
+        lookup, bootstrap = reverse("cases:client-lookup"), reverse("cases:attorney-bootstrap")
+        self.client.force_authenticate(self.attorney)
+        lookup_etag = self.client.get(lookup, {"code": "JAN-ETAG01"})["ETag"]
+        bootstrap_etag = self.client.get(bootstrap)["ETag"]
+
+        case = Case.objects.get(pk=self.cases[0].pk)
+        last_update = case.last_update
+        case.firm_name = "New Firm"
+        case.save()
+        self.assertEqual(Case.objects.get(pk=case.pk).last_update, last_update)
+
+        response = self.client.get(lookup, {"code": "JAN-ETAG01"}, HTTP_IF_NONE_MATCH=lookup_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b"New Firm", response.content)
+        response = self.client.get(bootstrap, HTTP_IF_NONE_MATCH=bootstrap_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # so does a save restricted to other fields
+        bootstrap_etag = response["ETag"]
+        case.case_type = "Work Injury"
+        case.save(update_fields=["case_type"])
+        response = self.client.get(bootstrap, HTTP_IF_NONE_MATCH=bootstrap_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bootstrap_not_modified_per_query(self):
+        url = reverse("cases:attorney-bootstrap")
+        self.client.force_authenticate(self.attorney)
+        etag = self.client.get(url, {"limit": 2})["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"limit": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        other = self.client.get(url, {"limit": 3}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+
+
+class CaseFragmentTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.attorney = User.objects.create_user(email="frag@example.com", password="x")
+        self.client.force_authenticate(self.attorney)
+        self.cases = seed_client_cases("JAN-FRAG01", 4, attorney=self.attorney)
+        CaseNote.objects.create(case=self.cases[0], status="Case Signed", status_note="unicode \u2028 ✓")
+        client_profile_cache.clear()
+
+    def _drf_bootstrap(self):
+        qs = Case.objects.filter(attorney=self.attorney).order_by("-last_update")
+        return JSONRenderer().render(AttorneyItemSerializer(qs, many=True).data)
+
+    def _drf_lookup(self):
+        cases = list(Case.objects.filter(client_code="JAN-FRAG01").order_by("-last_update", "-date_opened"))
+        head = cases[0]
+        return JSONRenderer().render(ClientPublicSerializer({
+            "name": head.client_name,
+            "code": head.client_code,
+            "email": head.client_email,
+            "phone": head.client_phone,
+            "cases": cases,
+        }).data)
+
+    def test_bootstrap_bytes_match_serializer(self):
+        response = self.client.get(reverse("cases:attorney-bootstrap"))
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, self._drf_bootstrap())
+        self.assertEqual(CaseFragment.objects.count(), 4)
+
+        # second read is served from the stored fragments
+        self.assertEqual(self.client.get(reverse("cases:attorney-bootstrap")).content, self._drf_bootstrap())
+
+    def test_lookup_bytes_match_serializer(self):
+        response = self.client.get(reverse("cases:client-lookup"), {"code": "JAN-FRAG01"})
+        self.assertEqual(response.content, self._drf_lookup())
+
+    def test_note_write_drops_fragment(self):
+        self.client.get(reverse("cases:attorney-bootstrap"))
+        Case.objects.get(pk=self.cases[1].pk).add_status_note("fresh", status="Documents Received")
+
+        self.assertFalse(CaseFragment.objects.filter(case_id=self.cases[1].pk).exists())
+        response = self.client.get(reverse("cases:attorney-bootstrap"))
+        self.assertEqual(response.content, self._drf_bootstrap())
+
+    def test_stale_fragment_is_rerendered(self):
+        self.client.get(reverse("cases:attorney-bootstrap"))
+        # bypass signals: the fragment no longer matches its case's updated_at
+        Case.objects.filter(pk=self.cases[2].pk).update(updated_at=timezone.now(), notes="bulk edit")
+
+        response = self.client.get(reverse("cases:attorney-bootstrap"))
+        self.assertEqual(response.content, self._drf_bootstrap())
+
+    def test_edit_that_keeps_last_update_is_rerendered(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), self.settings(CASES_FAST_SERIALIZERS=fast):
+                self.client.get(reverse("cases:attorney-bootstrap"))
+                # a firm edit moves updated_at but not last_update
+                Case.objects.filter(pk=self.cases[3].pk).update(
+                    updated_at=timezone.now(), firm_name=f"Renamed {fast}",
+                )
+
+                response = self.client.get(reverse("cases:attorney-bootstrap"))
+                self.assertIn(f"Renamed {fast}".encode(), response.content)
+                self.assertEqual(response.content, self._drf_bootstrap())
+                fragment = CaseFragment.objects.get(case_id=self.cases[3].pk)
+                self.assertEqual(fragment.source_updated_at, Case.objects.get(pk=self.cases[3].pk).updated_at)
+
+
+class FastPathSerializerTests(APITestCase):
+    def setUp(self):
+        self.attorney = User.objects.create_user(email="fast@example.com", password="x")
+        self.cases = seed_client_cases("JAN-FAST01", 6, attorney=self.attorney, notes_per_case=3)
+        seed_client_cases("JAN-FAST01", 1, attorney=self.attorney, notes_per_case=0)
+        CaseNote.objects.create(case=self.cases[0], status="Case Approved", status_note="ünïcode \u2029 ✓")
+        self.qs = Case.objects.filter(attorney=self.attorney).order_by("-last_update")
+        self.render = JSONRenderer().render
+
+    def test_attorney_items_match_serializer_bytes(self):
+        expected = self.render(AttorneyItemSerializer(self.qs.prefetch_related("status_notes"), many=True).data)
+        with self.assertNumQueries(2):
+            items = fastpath.attorney_items(self.qs)
+        self.assertEqual(self.render(items), expected)
+
+    def test_public_cases_match_serializer_bytes(self):
+        expected = self.render(CasePublicSerializer(self.qs, many=True).data)
+        self.assertEqual(self.render(fastpath.public_cases(self.qs)), expected)
+
+        attorney, public = fastpath.attorney_and_public(self.qs)
+        self.assertEqual(self.render(public), expected)
+        self.assertEqual(len(attorney), 7)
+
+    @override_settings(CASES_FAST_SERIALIZERS=True)
+    def test_fragments_rendered_with_fast_path(self):
+        client = APIClient()
+        client.force_authenticate(self.attorney)
+        response = client.get(reverse("cases:attorney-bootstrap"), {"limit": 500})
+        expected = self.render(AttorneyItemSerializer(self.qs, many=True).data)
+        self.assertEqual(response.content, expected)
+        self.assertEqual(client.get(reverse("cases:attorney-bootstrap"), {"limit": 500}).content, expected)
+
+
+@override_settings(CASES_STREAM_CHUNK_SIZE=3)
+class AttorneyBootstrapStreamingTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("cases:attorney-bootstrap")
+        self.attorney = User.objects.create_user(email="stream@example.com", password="x")
+        self.client.force_authenticate(self.attorney)
+        seed_client_cases("JAN-STRM01", 8, attorney=self.attorney)
+
+    def test_stream_matches_buffered_list(self):
+        buffered = self.client.get(self.url, {"limit": 500}).content
+
+        response = self.client.get(self.url, {"limit": 500, "stream": "1"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(b"".join(response.streaming_content), buffered)
+
+    def test_stream_reads_in_chunks(self):
+        response = self.client.get(self.url, {"limit": 7, "stream": "1"})
+        with CaptureQueriesContext(connection) as ctx:
+            body = b"".join(response.streaming_content)
+
+        self.assertEqual(len(json.loads(body)), 7)
+        # 3 + 3 + 1 rows, each chunk rendering its own fragments
+        chunk_reads = [q for q in ctx.captured_queries if "cases_casefragment" in q["sql"] and q["sql"].startswith("SELECT")]
+        self.assertEqual(len(chunk_reads), 3)
+
+    def test_stream_survives_case_deleted_mid_chunk(self):
+        from cases import fragments
+
+        render = fragments.render_fragments
+        deleted = []
+
+        def delete_then_render(case_ids):
+            case_ids = list(case_ids)
+            if not deleted:
+                deleted.append(case_ids[1])
+                Case.objects.filter(pk=case_ids[1]).delete()
+            return render(case_ids)
+
+        response = self.client.get(self.url, {"limit": 500, "stream": "1"})
+        with patch.object(fragments, "render_fragments", delete_then_render):
+            body = json.loads(b"".join(response.streaming_content))
+
+        # the first chunk came back one short; the rest still streams
+        self.assertEqual(len(body), 7)
+        self.assertNotIn(str(deleted[0]), {item["case_id"] for item in body})
+
+    def test_ties_on_last_update_order_by_id(self):
+        Case.objects.filter(attorney=self.attorney).update(last_update=timezone.now())
+        expected = [str(pk) for pk in Case.objects.filter(attorney=self.attorney).order_by("-id").values_list("pk", flat=True)]
+
+        buffered = self.client.get(self.url, {"limit": 500}).content
+        self.assertEqual([item["case_id"] for item in json.loads(buffered)], expected)
+        response = self.client.get(self.url, {"limit": 500, "stream": "1"})
+        self.assertEqual(b"".join(response.streaming_content), buffered)
+
+    def test_buffered_paths_keep_the_plain_limit(self):
+        seed_client_cases("JAN-STRM02", 500, attorney=self.attorney, notes_per_case=0)
+
+        with self.settings(CASES_STREAM_CHUNK_SIZE=100):
+            streamed = self.client.get(self.url, {"limit": 600, "stream": "1"})
+            self.assertEqual(len(json.loads(b"".join(streamed.streaming_content))), 508)
+        for param in ("since", "cursor"):
+            with self.subTest(param=param):
+                response = self.client.get(self.url, {param: "", "limit": 600, "stream": "1"})
+                self.assertFalse(response.streaming)
+                self.assertEqual(len(response.json()["results"]), 500)
+
+    def test_ndjson_via_accept_header(self):
+        buffered = json.loads(self.client.get(self.url, {"limit": 500}).content)
+
+        response = self.client.get(self.url, {"limit": 500}, HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], buffered)
+
+    def test_ndjson_via_format_param(self):
+        response = self.client.get(self.url, {"limit": 2, "format": "ndjson"})
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 2)
+
+    def test_stream_of_empty_list(self):
+        other = User.objects.create_user(email="empty@example.com", password="x")
+        self.client.force_authenticate(other)
+        response = self.client.get(self.url, {"stream": "1"})
+        self.assertEqual(b"".join(response.streaming_content), b"[]")
+
+
+class LatestStatusNoteTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.attorney = User.objects.create_user(email="latest@example.com", password="x")
+        self.client.force_authenticate(self.attorney)
+        self.case = seed_client_cases("JAN-LATE01", 1, attorney=self.attorney, notes_per_case=0)[0]
+        self.url = reverse("cases:case-partial-update", kwargs={"pk": self.case.pk})
+
+    def test_add_status_note_keeps_columns_in_sync(self):
+        note = self.case.add_status_note("first")
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.latest_note_id, note.pk)
+        self.assertEqual(self.case.latest_note_text, "first")
+        self.assertEqual(self.case.latest_note_updated_at, note.updated_at)
+
+        # a note for another status leaves the current one alone
+        self.case.add_status_note("later", status="Hearing Scheduled")
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.latest_note_text, "first")
+
+    def test_update_response_reads_denormalized_note(self):
+        response = self.client.patch(self.url, {"case_status": "Court Date Scheduled", "status_note": "see you in court"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status_note"], "see you in court")
+
+        case = Case.objects.get(pk=self.case.pk)
+        with self.assertNumQueries(0):
+            rep = CaseUpdateSerializer(case).data
+        self.assertEqual(rep["status_note"], "see you in court")
+
+    def test_status_change_without_note_clears_text(self):
+        self.case.add_status_note("signed")
+        response = self.client.patch(self.url, {"case_status": "Documents Received"})
+        self.assertEqual(response.data["status_note"], "")
+
+    def test_deleting_latest_note_recomputes(self):
+        older = self.case.add_status_note("older")
+        CaseNote.objects.filter(pk=older.pk).update(created_at=timezone.now() - timedelta(days=1))
+        newer = CaseNote.objects.create(case=self.case, status="Case Signed", status_note="newer")
+        self.case.refresh_latest_note()
+        self.assertEqual(self.case.latest_note_id, newer.pk)
+
+        newer.delete()
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.latest_note_id, older.pk)
+        self.assertEqual(self.case.latest_note_text, "older")
+
+    def test_backfill_migration(self):
+        backfill = import_module("cases.migrations.0008_case_latest_note").backfill_latest_note
+        cases = seed_client_cases("JAN-LATE02", 3, notes_per_case=2)
+
+        backfill(django_apps, None)
+
+        for case in Case.objects.filter(pk__in=[c.pk for c in cases]):
+            expected = case.status_notes.filter(status=case.case_status).order_by("-created_at").first()
+            self.assertEqual(case.latest_note_id, expected.pk)
+            self.assertEqual(case.latest_note_text, expected.status_note)
+
+
+class ClientModelTests(APITestCase):
+    def setUp(self):
+        self.attorney = User.objects.create_user(email="owner@example.com", password="x")
+
+    def _case(self, **overrides):
+        fields = dict(
+            client_name="Jane Client",
+            client_phone="5551234567",
+            client_email="jane@example.com",
+            firm_name="Acme Law",
+            attorney=self.attorney,
+            case_type="Auto Accident",
+            case_status="Case Signed",
+        )
+        fields.update(overrides)
+        return Case(**fields)
+
+    def test_cases_with_same_email_share_one_client(self):
+        first = self._case()
+        first.save()
+        second = self._case(client_name="Jane Q. Client", case_type="Work Injury")
+        second.save()
+
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertEqual(first.client_id, second.client_id)
+        self.assertEqual(second.client_code, first.client_code)
+        # linking takes on the client's identity rather than overwriting it
+        self.assertEqual(Client.objects.get().name, "Jane Client")
+        self.assertEqual(second.client_name, "Jane Client")
+
+    def test_identity_edit_reaches_every_case_of_the_client(self):
+        first = self._case()
+        first.save()
+        second = self._case(case_type="Work Injury")
+        second.save()
+        etag = self.client.get(reverse("cases:client-lookup"), {"code": first.client_code})["ETag"]
+
+        first.client_name = "Jane Q. Client"
+        first.client_phone = "5550001111"
+        first.save()
+
+        client = Client.objects.get()
+        self.assertEqual((client.name, client.phone), ("Jane Q. Client", "5550001111"))
+        self.assertEqual(
+            set(Case.objects.values_list("client_name", "client_phone")), {("Jane Q. Client", "5550001111")},
+        )
+        response = self.client.get(reverse("cases:client-lookup"), {"code": first.client_code}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["name"], "Jane Q. Client")
+        # the attorney's list reads the case columns, and agrees
+        self.client.force_authenticate(self.attorney)
+        bootstrap = self.client.get(reverse("cases:attorney-bootstrap")).json()
+        self.assertEqual({c["client_name"] for c in bootstrap}, {"Jane Q. Client"})
+
+    def test_client_rename_reaches_the_delta_sync(self):
+        first = self._case()
+        first.save()
+        self._case(case_type="Work Injury").save()
+        self.client.force_authenticate(self.attorney)
+        url = reverse("cases:attorney-bootstrap")
+        cursor = self.client.get(url, {"since": "", "limit": 500}).json()["cursor"]
+
+        client = Client.objects.get()
+        client.name = "Jane Renamed"
+        client.save()
+
+        delta = self.client.get(url, {"since": cursor}).json()
+        self.assertEqual(len(delta["results"]), 2)
+        self.assertEqual({c["client_name"] for c in delta["results"]}, {"Jane Renamed"})
+
+    def test_reassigning_one_case_keeps_the_client_owner(self):
+        first = self._case()
+        first.save()
+        self._case(case_type="Work Injury").save()
+        other = User.objects.create_user(email="other@example.com", password="x")
+
+        first.attorney = other
+        first.save()
+        self.assertEqual(Client.objects.get().attorney, self.attorney)
+
+        # a client's only case takes the client along
+        Case.objects.exclude(pk=first.pk).delete()
+        first.save()
+        self.assertEqual(Client.objects.get().attorney, other)
+
+    def test_email_lookup_picks_the_oldest_client(self):
+        oldest = Client.objects.create(code="JAN-OLDEST", name="Jane", email="jane@example.com", phone="5551234567")
+        Client.objects.create(code="JAN-NEWER1", name="Jane Two", email="jane@example.com", phone="5551234567")
+        case = self._case()
+        case.save()
+        self.assertEqual((case.client_id, case.client_code), (oldest.pk, "JAN-OLDEST"))
+
+    def test_narrow_saves_skip_the_client(self):
+        case = self._case()
+        case.save()
+        with CaptureQueriesContext(connection) as ctx:
+            case.save(update_fields=["last_update"])
+        self.assertFalse([q for q in ctx.captured_queries if "cases_client" in q["sql"]])
+
+    def test_lookup_profile_comes_from_client(self):
+        case = self._case()
+        case.save()
+        Client.objects.filter(pk=case.client_id).update(name="Renamed", updated_at=timezone.now())
+
+        response = self.client.get(reverse("cases:client-lookup"), {"code": case.client_code})
+        self.assertEqual(response.json()["name"], "Renamed")
+        self.assertEqual(len(response.json()["cases"]), 1)
+
+    def test_clean_rejects_client_of_another_attorney(self):
+        self._case().save()
+        other = User.objects.create_user(email="other@example.com", password="x")
+
+        with self.assertRaises(ValidationError) as ctx:
+            self._case(attorney=other).clean()
+        self.assertIn("email", str(ctx.exception))
+
+        # moving a client's only case to another attorney is fine
+        only = Case.objects.get()
+        only.attorney = other
+        only.clean()
+
+    def test_migration_deduplicates_by_code(self):
+        create_clients = import_module("cases.migrations.0009_client").create_clients
+        now = timezone.now()
+        Case.objects.bulk_create([
+            self._case(client_code="JAN-AAAAAA", client_name="Old Name", last_update=now - timedelta(days=2)),
+            self._case(client_code="JAN-AAAAAA", client_name="New Name", last_update=now - timedelta(days=1)),
+            self._case(client_code="", last_update=now - timedelta(days=3)),
+            self._case(client_code="BOB-BBBBBB", client_email="bob@example.com", client_name="Bob"),
+        ])
+
+        create_clients(django_apps, None)
+
+        self.assertEqual(Client.objects.count(), 2)
+        jane = Client.objects.get(code="JAN-AAAAAA")
+        self.assertEqual(jane.name, "New Name")
+        self.assertEqual(jane.cases.count(), 3)
+        self.assertFalse(Case.objects.filter(client__isnull=True).exists())
+        self.assertFalse(Case.objects.filter(client_code="").exists())
+
+        # the follow-up migration brings every case in line with its client
+        import_module("cases.migrations.0014_sync_client_mirrors").sync_client_mirrors(django_apps, None)
+        self.assertEqual(set(jane.cases.values_list("client_name", flat=True)), {"New Name"})
+
+
+class CaseDirtyTrackingTests(APITestCase):
+    def setUp(self):
+        self.case = seed_client_cases("JAN-DIRTY1", 1, notes_per_case=0)[0]
+        self.case = Case.objects.get(pk=self.case.pk)
+
+    def _case_selects(self, ctx):
+        return [q for q in ctx.captured_queries if q["sql"].startswith("SELECT") and '"cases_case"' in q["sql"]]
+
+    def test_changed_fields(self):
+        self.assertEqual(self.case.changed_fields(), [])
+        self.case.case_status = "Hearing Scheduled"
+        self.assertEqual(self.case.changed_fields(), ["case_status"])
+        self.assertEqual(self.case.previous_value("case_status"), "Case Signed")
+
+    @patch("cases.signals.notify_client_case_updated")
+    def test_narrow_save_skips_diff(self, notify):
+        with CaptureQueriesContext(connection) as ctx:
+            self.case.save(update_fields=["last_update"])
+        self.assertEqual(self._case_selects(ctx), [])
+        notify.assert_not_called()
+
+    @patch("cases.signals.notify_client_case_updated")
+    def test_status_change_diffs_in_memory(self, notify):
+        self.case.case_status = "Hearing Scheduled"
+        with CaptureQueriesContext(connection) as ctx:
+            self.case.save(update_fields=["case_status", "last_update"])
+        self.assertEqual(self._case_selects(ctx), [])
+        notify.assert_called_once_with(self.case, ["case_status"])
+
+        # the snapshot follows the save
+        self.assertEqual(self.case.changed_fields(), [])
+        self.case.save(update_fields=["case_status"])
+        notify.assert_called_once()
+
+    @patch("cases.signals.notify_client_case_updated")
+    def test_unloaded_instance_falls_back_to_db(self, notify):
+        detached = Case(**{f.attname: getattr(self.case, f.attname) for f in Case._meta.concrete_fields})
+        detached._state.adding = False
+        detached.notes = "changed"
+        self.assertIsNone(detached.changed_fields())
+
+        detached.save()
+        notify.assert_called_once_with(detached, ["notes"])
+
+
+class CaseUpdateUnitOfWorkTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.attorney = User.objects.create_user(email="uow@example.com", password="x")
+        self.client.force_authenticate(self.attorney)
+        self.case = seed_client_cases("JAN-UOW001", 1, attorney=self.attorney, notes_per_case=1)[0]
+        self.url = reverse("cases:case-partial-update", kwargs={"pk": self.case.pk})
+
+    def _writes(self, ctx, table):
+        return [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith(("UPDATE", "DELETE")) and f'"{table}"' in q["sql"]
+        ]
+
+    @patch("cases.signals.notify_client_case_updated")
+    def test_status_and_note_patch_is_coalesced(self, notify):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(self.url, {"case_status": "Hearing Scheduled", "status_note": "on the 5th"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # case load, note lookup, note insert, one case update, one fragment drop
+        queries = [q for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(queries), 5)
+        self.assertEqual(len(self._writes(ctx, "cases_case")), 1)
+        self.assertEqual(len(self._writes(ctx, "cases_casefragment")), 1)
+
+        notify.assert_called_once()
+        self.assertEqual(sorted(notify.call_args.args[1]), ["case_note", "case_status"])
+
+        case = Case.objects.get(pk=self.case.pk)
+        self.assertEqual(case.case_status, "Hearing Scheduled")
+        self.assertEqual(case.latest_note_text, "on the 5th")
+
+    @patch("cases.signals.notify_client_case_updated")
+    def test_notes_only_patch_bumps_last_update(self, notify):
+        before = Case.objects.get(pk=self.case.pk).last_update
+        self.client.patch(self.url, {"notes": "called the insurer"})
+
+        case = Case.objects.get(pk=self.case.pk)
+        self.assertEqual(case.notes, "called the insurer")
+        self.assertGreater(case.last_update, before)
+        notify.assert_called_once_with(case, ["notes"])
+
+    @patch("cases.signals.notify_client_case_updated")
+    def test_failed_block_writes_nothing(self, notify):
+        case = Case.objects.get(pk=self.case.pk)
+        with self.assertRaises(RuntimeError), unit_of_work():
+            case.add_status_note("never saved")
+            raise RuntimeError
+        self.assertFalse(CaseNote.objects.filter(status_note="never saved").exists())
+        notify.assert_not_called()
+
+
+class ConflictCheckTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="x")
+        self.other = User.objects.create_user(email="other@example.com", password="x")
+        self.owned = seed_client_cases("OWN-000001", 2, attorney=self.owner, email="owned@example.com")
+        self.single = seed_client_cases("ONE-000001", 1, attorney=self.owner, email="single@example.com")[0]
+
+    def test_many_rows_in_one_query(self):
+        checks = [
+            ConflictCheck("owned@example.com", "", self.other.pk),     # email owned elsewhere
+            ConflictCheck("new@example.com", "OWN-000001", None),      # code owned elsewhere
+            ConflictCheck("owned@example.com", "", self.owner.pk),     # same attorney
+            ConflictCheck("single@example.com", "", self.other.pk, self.single.pk),  # its only case
+            ConflictCheck("single@example.com", "", self.other.pk),    # a new case for that client
+        ] + [ConflictCheck(f"fresh{i}@example.com", f"FRS-{i:06d}", None) for i in range(600)]
+
+        # 603 emails/codes at 200 a chunk, plus one lookup for the single-case client
+        with self.assertNumQueries(5):
+            results = find_conflicts(checks)
+
+        self.assertEqual(results[:5], [EMAIL_CONFLICT, CODE_CONFLICT, None, None, EMAIL_CONFLICT])
+        self.assertEqual(set(results[5:]), {None})
+
+    def test_csv_import_reports_conflicting_rows(self):
+        admin_user = User.objects.create_superuser(email="admin@example.com", password="x")
+        self.client.force_login(admin_user)
+        csv_text = (
+            "Client Name,Phone,Email,Firm Name,Case Type,Case Status,Date Opened,Notes,Status Note\n"
+            "Fresh Client,5551234567,fresh@example.com,Acme Law,Auto Accident,Case Signed,2024-01-02,n,s\n"
+            "Owned Client,5551234567,owned@example.com,Acme Law,Auto Accident,Case Signed,2024-01-02,n,s\n"
+        )
+        upload = SimpleUploadedFile("cases.csv", csv_text.encode(), content_type="text/csv")
+
+        response = self.client.post(
+            reverse("admin:cases_case_import_csv"), {"csv_file": upload, "validate_only": "on"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [{"row": 3, "msg": EMAIL_CONFLICT}])
+
+
+class CaseImportTests(APITestCase):
+    HEADER = "Client Name,Phone,Email,Firm Name,Case Type,Case Status,Date Opened,Notes,Status Note\n"
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser(email="admin@example.com", password="x"))
+        self.existing = seed_client_cases("JAN-EXIST1", 1, email="jane@example.com")[0]
+
+    def _import(self, rows, **data):
+        upload = SimpleUploadedFile("cases.csv", (self.HEADER + "".join(rows)).encode(), content_type="text/csv")
+        return self.client.post(
+            reverse("admin:cases_case_import_csv"), {"csv_file": upload, **data},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+    def _rows(self, count, email="client{i}@example.com"):
+        return [
+            f"Client {i},5550000000,{email.format(i=i)},Acme Law,Work Injury,Case Signed,2024-01-02,notes {i},note {i}\n"
+            for i in range(count)
+        ]
+
+    @override_settings(CASES_IMPORT_BATCH_SIZE=20)
+    def test_rows_are_bulk_inserted_in_batches(self):
+        small = CaptureQueriesContext(connection)
+        with small:
+            self._import(self._rows(20))
+        large = CaptureQueriesContext(connection)
+        with large:
+            response = self._import(self._rows(60, email="big{i}@example.com"))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["created"], 60)
+        self.assertGreater(body["rows_per_sec"], 0)
+        # per-row duplicate checks aside, the writes cost a fixed number of
+        # statements per batch rather than several per row
+        writes = lambda ctx: [q for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(len(writes(large)), 3 * len(writes(small)))
+        self.assertEqual(Case.objects.filter(client_email__startswith="big").count(), 60)
+        self.assertEqual(Client.objects.filter(email__startswith="big").count(), 60)
+
+    def test_cases_join_clients_and_carry_their_note(self):
+        rows = self._rows(2, email="new@example.com") + [
+            "Jane Client,5551234567,jane@example.com,Acme Law,Work Injury,Hearing Scheduled,2024-01-02,n,\n",
+        ]
+        response = self._import(rows)
+        self.assertEqual(response.json()["created"], 3)
+
+        shared = Case.objects.filter(client_email="new@example.com")
+        self.assertEqual(shared.values("client").distinct().count(), 1)
+        client = Client.objects.get(email="new@example.com")
+        self.assertEqual(client.name, "Client 0")  # the first row creates the client
+        self.assertRegex(client.code, r"^CLI-[0-9A-F]{6}$")
+        self.assertEqual(set(shared.values_list("client_name", flat=True)), {"Client 0"})
+
+        case = shared.get(notes="notes 0")
+        self.assertEqual(case.client_code, client.code)
+        self.assertEqual(case.latest_note_text, "note 0")
+        self.assertEqual(case.latest_note, case.status_notes.get())
+
+        # an existing client keeps its code; no Status Note falls back to Notes
+        jane = Case.objects.get(client_email="jane@example.com", case_status="Hearing Scheduled")
+        self.assertEqual(jane.client_id, self.existing.client_id)
+        self.assertEqual(jane.client_code, "JAN-EXIST1")
+        self.assertEqual(jane.latest_note_text, "n")
+
+    def test_import_queues_no_notifications(self):
+        from notifications.models import NotificationOutbox
+        from notifications.services import register_device_token
+
+        register_device_token("jane-phone", client_code="JAN-EXIST1")
+        self._import(["Jane Client,5551234567,jane@example.com,Acme Law,Work Injury,Case Signed,2024-01-02,n,s\n"])
+        self.assertEqual(Case.objects.filter(client_code="JAN-EXIST1").count(), 2)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_duplicates_of_stored_cases_are_found_in_chunked_queries(self):
+        # the seeded case, with its email in another case and a time of day
+        Case.objects.filter(pk=self.existing.pk).update(
+            client_email="Jane@Example.com", date_opened=timezone.make_aware(timezone.datetime(2024, 1, 2, 15, 30)),
+        )
+        dupe = "Jane Client,5551234567,JANE@example.com,acme law,Auto Accident,Case Signed,2024-01-02,n,s\n"
+        rows = [dupe] + self._rows(40)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._import(rows, validate_only="on")
+
+        body = response.json()
+        self.assertEqual((body["count"], body["skipped_duplicates_in_db"]), (40, 1))
+        self.assertEqual(body["duplicates"], [{"row": 2, "msg": "Duplicate of an existing case in the database"}])
+        case_reads = [q for q in ctx.captured_queries if 'FROM "cases_case"' in q["sql"]]
+        self.assertEqual(len(case_reads), 1)
+        self.assertIn("LOWER", case_reads[0]["sql"])
+
+    @override_settings(CASES_IMPORT_BATCH_SIZE=10, FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_large_upload_streams_in_chunks(self):
+        # spooled to disk; a duplicate of row 2 sits three chunks later
+        rows = self._rows(35) + [self._rows(1)[0]]
+        response = self._import(rows)
+
+        body = response.json()
+        self.assertEqual(body["created"], 35)
+        self.assertEqual(body["duplicates"], [{"row": 37, "msg": "Duplicate row in the uploaded CSV"}])
+        self.assertEqual(Case.objects.filter(client_email__startswith="client").count(), 35)
+
+    def test_parallel_scan_matches_serial(self):
+        rows = self._rows(50)
+        rows[7] = "Client 7,5550000000,client7@example.com,Acme Law,Bogus Type,Case Signed,2024-01-02,n,s\n"
+        rows[31] = "Client 31,5550000000,client31@example.com,Acme Law,Work Injury,Case Signed,not-a-date,n,s\n"
+        rows.append(rows[3])
+        data = (self.HEADER + "".join(rows)).encode()
+
+        serial = scan_csv(io.BytesIO(data), chunk_size=6, workers=1)
+        parallel = scan_csv(io.BytesIO(data), chunk_size=6, workers=2)
+        self.assertEqual(parallel, serial)
+        self.assertEqual([e["row"] for e in parallel.errors], [9, 33])
+        self.assertEqual([d["row"] for d in parallel.file_dupes], [52])
+
+        clean = self._rows(30)
+        data = (self.HEADER + "".join(clean)).encode()
+        batches = []
+        stats = import_csv(
+            io.BytesIO(data), scan_csv(io.BytesIO(data)), chunk_size=7, workers=2,
+            on_batch=lambda last_row, count: batches.append((last_row, count)),
+        )
+        self.assertEqual(stats.created, 30)
+        # rows reach the writer in file order, whatever the worker count
+        self.assertEqual(batches, [(8, 7), (15, 7), (22, 7), (29, 7), (31, 2)])
+        self.assertEqual(Case.objects.filter(client_email__startswith="client").count(), 30)
+
+    def test_duplicate_keys_spill_to_disk(self):
+        rows = self._rows(40)
+        rows += [rows[2], rows[35]]
+        data = (self.HEADER + "".join(rows)).encode()
+
+        in_memory = scan_csv(io.BytesIO(data), chunk_size=6)
+        with override_settings(CASES_IMPORT_SEEN_IN_MEMORY=5):
+            spilled = scan_csv(io.BytesIO(data), chunk_size=6)
+        self.assertEqual(spilled, in_memory)
+        self.assertEqual([d["row"] for d in spilled.file_dupes], [42, 43])
+
+        seen = SeenKeys(memory_limit=2)
+        self.assertTrue(seen.add(b"a") and seen.add(b"b") and seen.add(b"c"))
+        self.assertIsNotNone(seen.db)
+        self.assertFalse(seen.add(b"a"))
+        self.assertFalse(seen.add(b"c"))
+        seen.close()
+
+    def test_bad_encoding_late_in_file_imports_nothing(self):
+        rows = self._rows(3000)
+        upload = SimpleUploadedFile(
+            "cases.csv", (self.HEADER + "".join(rows)).encode() + b"Bad \xff,5550000000,x@example.com\n",
+        )
+        response = self.client.post(
+            reverse("admin:cases_case_import_csv"), {"csv_file": upload},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [{"row": None, "msg": "CSV must be UTF-8 encoded."}])
+        self.assertFalse(Case.objects.filter(client_email__startswith="client").exists())
+
+
+class ImportJobTests(APITestCase):
+    HEADER = CaseImportTests.HEADER
+    _rows = CaseImportTests._rows
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        overrides = override_settings(MEDIA_ROOT=media.name, CASES_IMPORT_BATCH_SIZE=10)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client.force_login(User.objects.create_superuser(email="admin@example.com", password="x"))
+
+    def _upload(self, rows):
+        upload = SimpleUploadedFile("cases.csv", (self.HEADER + "".join(rows)).encode(), content_type="text/csv")
+        return self.client.post(
+            reverse("admin:cases_case_import_csv"), {"csv_file": upload, "background": "on"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+    def _run_worker(self):
+        out = StringIO()
+        call_command("run_import_jobs", "--once", stdout=out)
+        return out.getvalue()
+
+    def test_background_import_reports_progress(self):
+        response = self._upload(self._rows(25) + [self._rows(1)[0]])
+        self.assertEqual(response.status_code, 202)
+        progress_url = response.json()["progress_url"]
+        self.assertEqual(self.client.get(progress_url).json()["status"], ImportJob.PENDING)
+        self.assertFalse(Case.objects.exists())
+
+        self.assertIn("done=1 failed=0", self._run_worker())
+
+        progress = self.client.get(progress_url).json()
+        self.assertEqual(progress["status"], ImportJob.DONE)
+        self.assertEqual((progress["rows_total"], progress["rows_done"], progress["checkpoint_row"]), (25, 25, 26))
+        self.assertEqual(progress["skipped_duplicates"], 1)
+        self.assertEqual(progress["eta_seconds"], 0)
+        self.assertIsNotNone(progress["rows_per_sec"])
+        self.assertEqual(Case.objects.count(), 25)
+
+    def test_failed_job_resumes_after_last_committed_batch(self):
+        job_id = self._upload(self._rows(35)).json()["job"]
+        write_batch = CaseImporter._write_batch
+        calls = []
+
+        def flaky(importer, batch):
+            calls.append(len(batch))
+            if len(calls) == 3:
+                raise RuntimeError("disk full")
+            return write_batch(importer, batch)
+
+        with patch.object(CaseImporter, "_write_batch", flaky), self.assertLogs("cases.jobs", "ERROR"):
+            self.assertIn("failed=1", self._run_worker())
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.rows_done, job.checkpoint_row), (ImportJob.FAILED, 20, 21))
+        self.assertIn("disk full", job.last_error)
+        self.assertEqual(Case.objects.count(), 20)
+
+        self.assertEqual(resume([job_id]), 1)
+        self._run_worker()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_done, job.attempts), (ImportJob.DONE, 35, 2))
+        self.assertEqual(Case.objects.count(), 35)
+        self.assertEqual(Case.objects.values("client_email").distinct().count(), 35)
+
+    def test_abandoned_job_is_reclaimed_after_its_lease(self):
+        job_id = self._upload(self._rows(5)).json()["job"]
+        ImportJob.objects.filter(pk=job_id).update(
+            status=ImportJob.RUNNING, locked_until=timezone.now() + timedelta(minutes=1),
+        )
+        self.assertIsNone(claim_job())
+
+        ImportJob.objects.filter(pk=job_id).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_job().pk, job_id)
+
+    def test_invalid_file_fails_with_row_errors(self):
+        job_id = self._upload(["Nobody,123,,Acme Law,Work Injury,Case Signed,2024-01-02,n,s\n"]).json()["job"]
+        self._run_worker()
+        progress = self.client.get(reverse("admin:cases_case_import_job", args=[job_id])).json()
+        self.assertEqual(progress["status"], ImportJob.FAILED)
+        self.assertEqual(progress["errors"], [{"row": 2, "msg": "Phone must be 10 digits; Email required"}])
+
+
+@override_settings(CASES_EXPORT_CHUNK_SIZE=2)
+class CaseExportTests(APITestCase):
+    FIELDS = (
+        "client_name", "client_phone", "client_email", "firm_name", "case_type", "case_status",
+        "date_opened", "notes", "latest_note_text", "firm_email", "firm_phone",
+    )
+
+    def setUp(self):
+        self.attorney = User.objects.create_user(email="export@example.com", password="x")
+        for i in range(5):
+            case = seed_client_cases(f"EXP-{i:06d}", 1, notes_per_case=i + 1, attorney=self.attorney, email=f"c{i}@example.com")[0]
+            case.refresh_latest_note()
+        Case.objects.filter(client_email="c3@example.com").update(firm_email="firm@example.com", firm_phone="5559876543")
+        seed_client_cases("OTH-000001", 1, email="other@example.com")
+        self.client.force_authenticate(self.attorney)
+
+    def _cases(self):
+        return list(Case.objects.filter(attorney=self.attorney).order_by("client_email").values_list(*self.FIELDS))
+
+    def test_csv_export_round_trips_through_the_importer(self):
+        response = self.client.get(reverse("cases:attorney-case-export"))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        body = b"".join(response.streaming_content)
+        lines = body.decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "Client Name,Phone,Email,Firm Name,Case Type,Case Status,Date Opened,Notes,Status Note,Firm Email,Firm Phone")
+        self.assertEqual(len(lines), 6)  # the other attorney's case is left out
+
+        self.client.force_login(User.objects.create_superuser(email="admin@example.com", password="x"))
+        reimport = lambda: self.client.post(
+            reverse("admin:cases_case_import_csv"), {"csv_file": SimpleUploadedFile("cases.csv", body)},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+        # as-is, every row is a copy of a stored case
+        response = reimport()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.json()["created"], response.json()["skipped_duplicates_in_db"]), (0, 5))
+
+        # into an empty database, the same cases come back
+        before = self._cases()
+        Case.objects.filter(attorney=self.attorney).delete()
+        self.assertEqual(reimport().json()["created"], 5)
+        Case.objects.filter(client_email__startswith="c").update(attorney=self.attorney)
+        self.assertEqual(self._cases(), before)
+
+    def test_ndjson_groups_notes_in_one_pass(self):
+        response = self.client.get(reverse("cases:attorney-case-export"), {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        with CaptureQueriesContext(connection) as ctx:
+            lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+        # one query for the cases and one for the notes, read in chunks
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(len(lines), 5)
+        for item in lines:
+            case = Case.objects.get(client_email=item["Email"])
+            notes = list(case.status_notes.order_by("created_at", "id").values_list("status_note", flat=True))
+            self.assertEqual([n["Status Note"] for n in item["Status Notes"]], notes)
+            self.assertEqual(item["Status Note"], case.latest_note_text)
+
+    def test_admin_action_exports_selected_cases(self):
+        self.client.force_login(User.objects.create_superuser(email="admin@example.com", password="x"))
+        selected = Case.objects.filter(client_email__in=["c1@example.com", "other@example.com"])
+        response = self.client.post(reverse("admin:cases_case_changelist"), {
+            "action": "export_cases_csv",
+            "_selected_action": [str(pk) for pk in selected.values_list("pk", flat=True)],
+        })
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()[1:]
+        self.assertEqual(sorted(row.split(",")[2] for row in rows), ["c1@example.com", "other@example.com"])
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse("cases:attorney-case-export"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
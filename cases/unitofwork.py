@@ -0,0 +1,119 @@
+# cases/unitofwork.py
+"""
+Coalesce the writes one logical case update fans out into.
+
+A PATCH through CaseUpdateSerializer saves the case, saves a note, bumps the
+case's last_update from the note signal, then again from add_status_note, and
+each of those saves drops the case's fragment and may push a notification.
+Inside `unit_of_work()` those side effects are buffered instead:
+
+  - save_case(case, *fields) merges the fields per case; flush() saves each
+    case once with the union of its fields
+  - fragment drops are collected and run as one DELETE after the saves
+  - notifications are merged per (sender, case) and queued once, in the
+    same transaction (notifications.NotificationOutbox)
+
+Outside a unit of work every helper acts immediately, as before.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+
+_current: ContextVar[Optional["UnitOfWork"]] = ContextVar("cases_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    def __init__(self) -> None:
+        self._cases: Dict[object, Tuple[object, Set[str]]] = {}
+        self._fragments: Set[object] = set()
+        self._notifications: Dict[Tuple[Callable, object], Tuple[object, list]] = {}
+
+    def save_case(self, case, *fields: str) -> None:
+        buffered, pending = self._cases.setdefault(case.pk, (case, set()))
+        if buffered is not case:
+            # Another instance of the same row: carry its new values over.
+            for name in fields:
+                setattr(buffered, name, getattr(case, name))
+        pending.update(fields)
+
+    def drop_fragments(self, case_ids: Iterable) -> None:
+        self._fragments.update(case_ids)
+
+    def notify(self, sender: Callable, case, changed_fields: Iterable[str]) -> None:
+        _case, fields = self._notifications.setdefault((sender, case.pk), (case, []))
+        fields.extend(f for f in changed_fields if f not in fields)
+
+    def flush(self) -> None:
+        # Saves run signals that may buffer more work (fragments,
+        # notifications, even another save), so drain in that order.
+        while self._cases:
+            pk = next(iter(self._cases))
+            case, fields = self._cases.pop(pk)
+            if fields:
+                case.save(update_fields=sorted(fields))
+
+        if self._fragments:
+            _drop_fragments(self._fragments)
+            self._fragments = set()
+
+        notifications, self._notifications = self._notifications, {}
+        for (sender, _pk), (case, fields) in notifications.items():
+            sender(case, fields)
+
+
+def _drop_fragments(case_ids) -> None:
+    # cases.fragments imports the serializers, which use unit_of_work()
+    from .fragments import drop_fragments
+
+    drop_fragments(case_ids)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current.get()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Buffer case writes for the block and flush them once, inside a single
+    transaction. Nested blocks join the outermost one.
+    """
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+
+    with transaction.atomic():
+        uow = UnitOfWork()
+        token = _current.set(uow)
+        try:
+            yield uow
+            uow.flush()
+        finally:
+            _current.reset(token)
+
+
+def save_case(case, *fields: str) -> None:
+    uow = _current.get()
+    if uow is None:
+        case.save(update_fields=list(fields))
+    else:
+        uow.save_case(case, *fields)
+
+
+def drop_fragments(case_ids: Iterable) -> None:
+    uow = _current.get()
+    if uow is None:
+        _drop_fragments(case_ids)
+    else:
+        uow.drop_fragments(case_ids)
+
+
+def notify(sender: Callable, case, changed_fields) -> None:
+    uow = _current.get()
+    if uow is None:
+        sender(case, changed_fields)
+    else:
+        uow.notify(sender, case, changed_fields)
@@ -2,7 +2,9 @@ from django.contrib import admin
 from django.urls import path, include
 from .views import (
     ClientLookupView,
+    ClientProfileCacheStatsView,
     AttorneyBootstrapView,
+    AttorneyCaseExportView,
     CasePartialUpdateView,
     ClientCallRequestView,
 )
@@ -11,7 +13,9 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/auth/', include('authentication.urls', namespace='auth')),
     path("client/lookup", ClientLookupView.as_view(), name="client-lookup"),
+    path("client/lookup/cache-stats", ClientProfileCacheStatsView.as_view(), name="client-lookup-cache-stats"),
     path("attorney/bootstrap", AttorneyBootstrapView.as_view(), name="attorney-bootstrap"),
+    path("attorney/export", AttorneyCaseExportView.as_view(), name="attorney-case-export"),
     path("attorney/cases/<uuid:pk>", CasePartialUpdateView.as_view(), name="case-partial-update"),
     path("client-call-request/", ClientCallRequestView.as_view(), name="client-call-request"),
 ]
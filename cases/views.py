@@ -1,17 +1,22 @@
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import status, generics
-from rest_framework.permissions import AllowAny, IsAuthenticated, BasePermission
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser, BasePermission
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.throttling import ScopedRateThrottle
 
-from .models import Case
-from .serializers import (
-    ClientPublicSerializer,
-    AttorneyItemSerializer,
-    CaseUpdateSerializer,
-    CasePublicSerializer,
-)
+from core.renderers import CSVRenderer, NDJSONRenderer
+
+from .cache import client_profile_cache
+from . import exporter
+from .conditional import attorney_fingerprint, client_fingerprint, etag_matches, not_modified, with_etag
+from .fragments import ATTORNEY, PUBLIC, JSONFragmentResponse, fetch_fragments, json_array, json_object, render_json
+from .models import Case, CaseTombstone
+from .pagination import LAST_ID, InvalidCursor, decode_cursor, encode_cursor, newer_than, older_than
+from .serializers import CaseUpdateSerializer
+from .streaming import JSON, NDJSON, stream_cases
 
 from notifications.services import (
     notify_attorney_call_request,
@@ -33,48 +38,173 @@ class ClientLookupView(APIView):
         code = (request.query_params.get("code") or "").strip()
         if not code:
             return Response({"detail": "Missing 'code' query parameter."}, status=status.HTTP_400_BAD_REQUEST)
-        return self._lookup(code)
+        return self._lookup(request, code)
 
     def post(self, request):
         code = (request.data.get("code") or "").strip()
         if not code:
             return Response({"detail": "Missing 'code' in request body."}, status=status.HTTP_400_BAD_REQUEST)
-        return self._lookup(code)
+        return self._lookup(request, code)
 
-    def _lookup(self, code: str):
-        cases_qs = Case.objects.filter(client_code=code).order_by("-last_update", "-date_opened")
-        if not cases_qs.exists():
+    def _lookup(self, request, code: str):
+        etag = client_fingerprint(code)
+        if etag is None:
             return Response({"detail": "Client not found."}, status=status.HTTP_404_NOT_FOUND)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        body = client_profile_cache.get(code, version=etag)
+        if body is None:
+            body = self._build_payload(code)
+            if body is None:
+                return Response({"detail": "Client not found."}, status=status.HTTP_404_NOT_FOUND)
+            client_profile_cache.set(code, body, version=etag)
+        return with_etag(JSONFragmentResponse(body, status=status.HTTP_200_OK), etag)
+
+    def _build_payload(self, code: str):
+        """
+        Render the ClientPublicSerializer payload from per-case fragments:
+        one query for the fragments joined to the Client row (plus a render
+        for any stale ones).
+        """
+        rows = fetch_fragments(
+            Case.objects.filter(client__code=code).order_by("-last_update", "-date_opened"),
+            PUBLIC,
+            "client__name", "client__code", "client__email", "client__phone",
+        )
+        if not rows:
+            return None
+
+        _pk, _last_update, _fragment, name, client_code, email, phone = rows[0]
+        return json_object([
+            ("name", render_json(name)),
+            ("code", render_json(client_code)),
+            ("email", render_json(email)),
+            ("phone", render_json(phone)),
+            ("cases", json_array(row[2] for row in rows)),
+        ])
 
-        # Use the freshest case to populate the client “profile” fields
-        head = cases_qs.first()
-        payload = {
-            "name": head.client_name,
-            "code": head.client_code,
-            "email": head.client_email,
-            "phone": head.client_phone,
-            "cases": cases_qs,
-        }
-        data = ClientPublicSerializer(payload).data
-        return Response(data, status=status.HTTP_200_OK)
+class ClientProfileCacheStatsView(APIView):
+    """
+    GET: hit/miss/eviction counters of this worker's client lookup cache.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(client_profile_cache.stats(), status=status.HTTP_200_OK)
 
 class AttorneyBootstrapView(APIView):
+    """
+    GET ?limit=N               newest N cases (plain list, legacy shape)
+    GET ?cursor=&limit=N       pages newest-first on (last_update, id);
+                               pass back `next_cursor` for the next page
+    GET ?since=<cursor>&limit=N
+                               cases saved after the cursor (on updated_at,
+                               id), oldest first, with a new `cursor` to poll
+                               from; `since=` (empty) starts a full sync
+    GET ?stream=1&limit=N      the plain list, streamed in chunks (limit up to
+                               CASES_STREAM_MAX_LIMIT); with ?format=ndjson or
+                               Accept: application/x-ndjson, one case per line
+
+    Every case save, note write or delete and client identity change moves
+    the case's updated_at, so the next delta poll returns the case again
+    (with all of its notes). Delta responses also list `removed` case ids: cases deleted or
+    reassigned to another attorney since the cursor (CaseTombstone).
+    """
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
 
     def get(self, request):
+        fmt = request.accepted_renderer.format
+        # since/cursor requests are always buffered, so they keep the 500 cap
+        streaming = (
+            fmt == NDJSON or request.query_params.get("stream") in ("1", "true")
+        ) and not {"since", "cursor"} & set(request.query_params)
+        max_limit = getattr(settings, "CASES_STREAM_MAX_LIMIT", 5000) if streaming else 500
         try:
             limit = int(request.query_params.get("limit", 50))
-            limit = max(1, min(limit, 500))
+            limit = max(1, min(limit, max_limit))
         except ValueError:
             return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-        qs = (
-            Case.objects
-            .filter(attorney=request.user)
-            .order_by("-last_update")
-        )
-        data = AttorneyItemSerializer(qs[:limit], many=True).data
-        return Response(data, status=status.HTTP_200_OK)
+        # The response is fully determined by the attorney's data, the query
+        # string and the negotiated format, so an unchanged fingerprint means
+        # nothing to send.
+        etag = attorney_fingerprint(request.user.pk, limit, fmt, request.META.get("QUERY_STRING", ""))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        qs = Case.objects.filter(attorney=request.user)
+
+        try:
+            if streaming:
+                response = stream_cases(qs, ATTORNEY, limit, NDJSON if fmt == NDJSON else JSON)
+            elif "since" in request.query_params:
+                response = self._delta(qs, request.query_params["since"], limit)
+            elif "cursor" in request.query_params:
+                response = self._page(qs, request.query_params["cursor"], limit)
+            else:
+                rows = fetch_fragments(qs.order_by("-last_update", "-id")[:limit], ATTORNEY)
+                response = JSONFragmentResponse(json_array(row[2] for row in rows), status=status.HTTP_200_OK)
+        except InvalidCursor as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return with_etag(response, etag)
+
+    def _page(self, qs, cursor: str, limit: int):
+        position = decode_cursor(cursor) if cursor else None
+        rows = fetch_fragments(older_than(qs, position)[:limit + 1], ATTORNEY)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if has_more else None
+        return JSONFragmentResponse(json_object([
+            ("results", json_array(row[2] for row in rows)),
+            ("next_cursor", render_json(next_cursor)),
+        ]), status=status.HTTP_200_OK)
+
+    def _delta(self, qs, since: str, limit: int):
+        position = decode_cursor(since) if since else None
+        # rows are (pk, last_update, fragment, updated_at)
+        rows = fetch_fragments(newer_than(qs, position)[:limit + 1], ATTORNEY, "updated_at")
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = encode_cursor(rows[-1][3], rows[-1][0]) if rows else since
+
+        # Removals up to the new cursor (all of them on the last page); a
+        # full sync (`since=`) has nothing to remove.
+        removed = []
+        if position is not None:
+            tombstones = CaseTombstone.objects.filter(attorney=self.request.user, removed_at__gt=position[0])
+            if has_more:
+                tombstones = tombstones.filter(removed_at__lte=rows[-1][3])
+            tombstones = list(tombstones.order_by("removed_at").values_list("case_id", "removed_at"))
+            returned = {row[0] for row in rows}
+            removed = list(dict.fromkeys(str(pk) for pk, _at in tombstones if pk not in returned))
+            if not has_more and tombstones and (not rows or tombstones[-1][1] > rows[-1][3]):
+                # past the last removal; nothing else changed at that instant
+                cursor = encode_cursor(tombstones[-1][1], LAST_ID)
+
+        return JSONFragmentResponse(json_object([
+            ("results", json_array(row[2] for row in rows)),
+            ("removed", render_json(removed)),
+            ("cursor", render_json(cursor)),
+            ("has_more", render_json(has_more)),
+        ]), status=status.HTTP_200_OK)
+
+class AttorneyCaseExportView(APIView):
+    """
+    GET                        every case of the attorney as CSV in the
+                               admin import layout (cases.exporter), streamed
+    GET ?format=ndjson         one case per line with its note history (or
+                               Accept: application/x-ndjson)
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        fmt = exporter.NDJSON if request.accepted_renderer.format == NDJSON else exporter.CSV
+        return exporter.stream_export(Case.objects.filter(attorney=request.user), fmt)
+
 
 class CasePartialUpdateView(generics.UpdateAPIView):
     permission_classes = [IsAuthenticated, IsAttorneyCaseOwner]
@@ -107,7 +237,7 @@ class ClientCallRequestView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        qs = Case.objects.filter(client_code=code)
+        qs = Case.objects.filter(client__code=code)
         if case_id:
             qs = qs.filter(id=case_id)
 
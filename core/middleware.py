@@ -1,5 +1,9 @@
+import threading
+import zlib
+
 from django.conf import settings
 from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
@@ -13,4 +17,173 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
         if settings.SECURE_HSTS_SECONDS > 0:
             response['Strict-Transport-Security'] = f'max-age={settings.SECURE_HSTS_SECONDS}; includeSubDomains; preload'
         
-        return response
\ No newline at end of file
+        return response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class CompressionStats:
+    """Process-wide counters for CompressionMiddleware."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.responses = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.by_encoding = {}
+
+    def record(self, encoding, bytes_in, bytes_out):
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                "by_encoding": dict(self.by_encoding),
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def compression_exempt(view_func):
+    """Mark a view function as never compressed (like csrf_exempt).
+    For DRF/class-based views set `compression_exempt = True` on the class."""
+    view_func.compression_exempt = True
+    return view_func
+
+
+def _accepted_encodings(header):
+    """{encoding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    gzip / brotli (when the `brotli` package is installed) for API responses.
+
+    - Only COMPRESSION_CONTENT_TYPES are compressed (JSON, NDJSON, CSV by
+      default), which keeps HTML pages carrying CSRF tokens out of scope.
+    - Buffered bodies under COMPRESSION_MIN_SIZE bytes are left alone.
+    - Streaming responses are compressed chunk by chunk and flushed per chunk.
+    - Opt out per route with @compression_exempt, a `compression_exempt = True`
+      view class attribute, or a COMPRESSION_EXEMPT_PATHS prefix.
+    - Bytes in/out are counted in `compression_stats`.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        if getattr(view_func, "compression_exempt", False) or getattr(view_class, "compression_exempt", False):
+            request._compression_exempt = True
+        return None
+
+    def _encoding_for(self, request):
+        accepted = _accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING"))
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        # Server preference order breaks ties.
+        for encoding in (("br",) if brotli is not None else ()) + ("gzip",):
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def _compressible(self, request, response):
+        if getattr(request, "_compression_exempt", False):
+            return False
+        if any(request.path.startswith(p) for p in getattr(settings, "COMPRESSION_EXEMPT_PATHS", ())):
+            return False
+        if response.has_header("Content-Encoding") or response.status_code in (204, 304):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in getattr(settings, "COMPRESSION_CONTENT_TYPES", ("application/json",)):
+            return False
+        if not response.streaming and len(response.content) < getattr(settings, "COMPRESSION_MIN_SIZE", 1024):
+            return False
+        return True
+
+    def _compressor(self, encoding):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5))
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(getattr(settings, "COMPRESSION_GZIP_LEVEL", 6), zlib.DEFLATED, 31)
+        return (
+            compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+    def _compress_stream(self, chunks, encoding):
+        process, flush, finish = self._compressor(encoding)
+        bytes_in = bytes_out = 0
+        for chunk in chunks:
+            bytes_in += len(chunk)
+            data = process(chunk) + flush()
+            bytes_out += len(data)
+            if data:
+                yield data
+        data = finish()
+        bytes_out += len(data)
+        compression_stats.record(encoding, bytes_in, bytes_out)
+        yield data
+
+    def process_response(self, request, response):
+        if not self._compressible(request, response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = self._encoding_for(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = self._compress_stream(response.streaming_content, encoding)
+            del response.headers["Content-Length"]
+        else:
+            process, _flush, finish = self._compressor(encoding)
+            compressed = process(response.content) + finish()
+            # Return the compressed content only if it's actually shorter.
+            if len(compressed) >= len(response.content):
+                return response
+            compression_stats.record(encoding, len(response.content), len(compressed))
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # A compressed representation only weakly matches the original ETag.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
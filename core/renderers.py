@@ -0,0 +1,85 @@
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib encoder
+    orjson = None
+
+_ORJSON_OPTIONS = (
+    (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer backed by orjson, which encodes UUIDs and datetimes
+    natively. Output is byte-for-byte what JSONRenderer produces for compact,
+    non-ASCII-escaped JSON (the project's DRF settings); anything else
+    (indent requested, ASCII-only, values orjson rejects) goes through the
+    stock stdlib path.
+    """
+
+    _fallback_encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._fallback_encoder.default, option=_ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. ints beyond 64 bits; let the stdlib raise or succeed as before
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Match JSONRenderer: always escape U+2028 / U+2029.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class NDJSONRenderer(JSONRenderer):
+    """
+    Newline-delimited JSON: one compact JSON document per list item (a
+    non-list renders as a single line). Views that stream NDJSON write the
+    lines themselves; this renderer makes the media type negotiable and
+    renders error responses.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        line = FastJSONRenderer().render
+        items = data if isinstance(data, list) else [data]
+        return b"".join(line(item) + b"\n" for item in items)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    text/csv for views that stream CSV themselves; like NDJSONRenderer it
+    makes the media type negotiable and renders error responses (a dict as
+    one header row and one value row).
+    """
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        out = io.StringIO()
+        writer = csv.writer(out)
+        if items and isinstance(items[0], dict):
+            writer.writerow(items[0].keys())
+            writer.writerows(item.values() for item in items)
+        return out.getvalue().encode()
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -99,15 +100,31 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", str(BASE_DIR / "media"))
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "authentication.CustomUser"
 
 
+# "fast" = orjson-backed renderer/parser (stdlib fallback if orjson is missing)
+API_JSON_BACKEND = os.getenv("API_JSON_BACKEND", "fast").lower()
+
+if API_JSON_BACKEND == "fast":
+    API_JSON_RENDERER = "core.renderers.FastJSONRenderer"
+    API_JSON_PARSER = "core.parsers.FastJSONParser"
+else:
+    API_JSON_RENDERER = "rest_framework.renderers.JSONRenderer"
+    API_JSON_PARSER = "rest_framework.parsers.JSONParser"
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_RENDERER_CLASSES": (API_JSON_RENDERER,),
+    "DEFAULT_PARSER_CLASSES": (
+        API_JSON_PARSER,
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "EXCEPTION_HANDLER": "core.exceptions.custom_exception_handler",
     "DEFAULT_THROTTLE_CLASSES": (
         "rest_framework.throttling.AnonRateThrottle",
@@ -223,5 +240,55 @@ EMAIL_VERIFICATION_REDIRECT_ERROR = os.getenv(
     "EMAIL_VERIF_ERROR_PATH", "/invalid"
 )
 
+# core.middleware.CompressionMiddleware (gzip, plus brotli if installed)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_CONTENT_TYPES = ("application/json", "application/x-ndjson", "text/csv")
+COMPRESSION_EXEMPT_PATHS = ()
+
+# Per-process LRU of rendered client lookup payloads (cases.cache)
+CLIENT_PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("CLIENT_PROFILE_CACHE_MAX_ENTRIES", "1024"))
+CLIENT_PROFILE_CACHE_TTL = int(os.getenv("CLIENT_PROFILE_CACHE_TTL", "300"))
+
+# Render case JSON fragments with cases.fastpath instead of the DRF serializers
+# (byte-identical output; see benchmarks/bench_serializers.py)
+CASES_FAST_SERIALIZERS = os.getenv("CASES_FAST_SERIALIZERS", "false").lower() == "true"
+
+# Streamed attorney bootstrap (?stream=1 / NDJSON): rows per chunk and max limit
+CASES_STREAM_CHUNK_SIZE = int(os.getenv("CASES_STREAM_CHUNK_SIZE", "100"))
+CASES_STREAM_MAX_LIMIT = int(os.getenv("CASES_STREAM_MAX_LIMIT", "5000"))
+
+# Case exports (cases.exporter): rows read per query chunk
+CASES_EXPORT_CHUNK_SIZE = int(os.getenv("CASES_EXPORT_CHUNK_SIZE", "2000"))
+
+# Admin CSV import (cases.importer): rows written per transaction
+CASES_IMPORT_BATCH_SIZE = int(os.getenv("CASES_IMPORT_BATCH_SIZE", "1000"))
+# Processes parsing/validating CSV rows (1 = in the request/worker process)
+CASES_IMPORT_WORKERS = int(os.getenv("CASES_IMPORT_WORKERS", "1"))
+# Row keys the validation pass keeps in memory for in-file duplicate checks
+# (16 bytes each plus set overhead); beyond that they go to a temporary
+# on-disk SQLite table
+CASES_IMPORT_SEEN_IN_MEMORY = int(os.getenv("CASES_IMPORT_SEEN_IN_MEMORY", "100000"))
+# Background import jobs (cases.jobs; `manage.py run_import_jobs`): seconds a
+# worker holds a job between committed batches before another may take it over
+CASES_IMPORT_LEASE = int(os.getenv("CASES_IMPORT_LEASE", "300"))
+
+# Push notifications go through notifications.NotificationOutbox and are
+# sent by `manage.py send_notifications` (notifications.outbox)
+NOTIFICATIONS_SENDER = os.getenv("NOTIFICATIONS_SENDER", "notifications.outbox.FcmSender")
+NOTIFICATIONS_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATIONS_OUTBOX_BATCH_SIZE", "100"))
+NOTIFICATIONS_OUTBOX_LEASE = int(os.getenv("NOTIFICATIONS_OUTBOX_LEASE", "60"))
+NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS", "8"))
+NOTIFICATIONS_OUTBOX_BACKOFF = int(os.getenv("NOTIFICATIONS_OUTBOX_BACKOFF", "5"))
+NOTIFICATIONS_OUTBOX_BACKOFF_MAX = int(os.getenv("NOTIFICATIONS_OUTBOX_BACKOFF_MAX", "3600"))
+# Consecutive token-specific failures before a device token is dropped (outages never count)
+NOTIFICATIONS_TOKEN_MAX_FAILURES = int(os.getenv("NOTIFICATIONS_TOKEN_MAX_FAILURES", "5"))
+
 FIREBASE_CREDENTIALS_FILE = os.getenv("FIREBASE_CREDENTIALS_FILE", "")
 FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "")
+
+# asyncio FCM HTTP v1 dispatcher (notifications.dispatch; send_notifications --async)
+FCM_ENDPOINT = os.getenv("FCM_ENDPOINT", "https://fcm.googleapis.com")
+FCM_MAX_CONCURRENCY = int(os.getenv("FCM_MAX_CONCURRENCY", "200"))
+FCM_TIMEOUT = float(os.getenv("FCM_TIMEOUT", "10"))
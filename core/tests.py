@@ -0,0 +1,158 @@
+import gzip
+import io
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework import exceptions
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+
+from core import middleware as middleware_module, parsers, renderers
+from core.exceptions import custom_exception_handler
+from core.middleware import CompressionMiddleware, compression_exempt, compression_stats
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assertSameBytes(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_matches_stock_renderer_for_api_values(self):
+        self.assertSameBytes({
+            "case_id": uuid.uuid4(),
+            "opened": datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "day": date(2025, 3, 1),
+            "amount": Decimal("12.50"),
+            "label": gettext_lazy("Client not found."),
+            "text": "ünïcode \u2028 line \u2029 sep ✓",
+            "nested": [{"n": 1, "ok": True, "none": None}],
+            3: "int key",
+        })
+
+    def test_error_envelopes_render_identically(self):
+        for exc in (
+            exceptions.ValidationError({"code": ["This field is required."]}),
+            exceptions.NotAuthenticated(),
+            exceptions.Throttled(wait=12),
+            DjangoValidationError({"attorney": ["This client email is already associated with another attorney."]}),
+        ):
+            response = custom_exception_handler(exc, {"view": None})
+            self.assertSameBytes(response.data)
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_indent_uses_stdlib_path(self):
+        self.assertEqual(
+            FastJSONRenderer().render({"a": 1}, "application/json; indent=2"),
+            JSONRenderer().render({"a": 1}, "application/json; indent=2"),
+        )
+
+    def test_falls_back_without_orjson(self):
+        with patch.object(renderers, "orjson", None):
+            self.assertSameBytes({"id": uuid.UUID(int=1)})
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def test_parses_like_stock_parser(self):
+        body = '{"code": "JAN-123456", "n": [1, 2.5, null], "s": "ü"}'.encode()
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            JSONParser().parse(io.BytesIO(body)),
+        )
+
+    def test_invalid_json_raises_parse_error(self):
+        with self.assertRaises(exceptions.ParseError):
+            FastJSONParser().parse(io.BytesIO(b"{not json"))
+
+    def test_falls_back_without_orjson(self):
+        with patch.object(parsers, "orjson", None):
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": 1}')), {"a": 1})
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100, COMPRESSION_EXEMPT_PATHS=("/api/raw/",))
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"firm_name":"Acme Law","case_type":"Auto Accident"},' * 50
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        compression_stats.reset()
+
+    def _run(self, response, path="/api/attorney/bootstrap", view=None, **headers):
+        request = self.factory.get(path, **headers)
+        middleware = CompressionMiddleware(lambda r: response)
+        if view is not None:
+            middleware.process_view(request, view, (), {})
+        return middleware.process_response(request, response)
+
+    def _json(self, content=None, **kwargs):
+        response = HttpResponse(content if content is not None else self.body, content_type="application/json", **kwargs)
+        response["ETag"] = '"abc"'
+        return response
+
+    def test_gzip_when_accepted(self):
+        response = self._run(self._json(), HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+        stats = compression_stats.snapshot()
+        self.assertEqual(stats["responses"], 1)
+        self.assertEqual(stats["bytes_saved"], len(self.body) - len(response.content))
+
+    def test_not_accepted_or_refused(self):
+        self.assertFalse(self._run(self._json()).has_header("Content-Encoding"))
+        refused = self._run(self._json(), HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+        self.assertFalse(refused.has_header("Content-Encoding"))
+
+    def test_below_threshold_is_left_alone(self):
+        response = self._run(self._json(b'{"ok":true}'), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_non_api_content_types_are_skipped(self):
+        html = HttpResponse(b"<p>x</p>" * 100, content_type="text/html")
+        self.assertFalse(self._run(html, HTTP_ACCEPT_ENCODING="gzip").has_header("Content-Encoding"))
+
+    def test_streaming_is_compressed_incrementally(self):
+        chunks = [b'{"n":%d,"firm_name":"Acme Law"}\n' % i for i in range(200)]
+        response = StreamingHttpResponse(iter(chunks), content_type="application/x-ndjson")
+        response = self._run(response, HTTP_ACCEPT_ENCODING="gzip")
+
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(gzip.decompress(b"".join(parts)), b"".join(chunks))
+        self.assertEqual(compression_stats.snapshot()["bytes_in"], len(b"".join(chunks)))
+
+    def test_per_route_opt_out(self):
+        @compression_exempt
+        def view(request):
+            return None
+
+        class ExemptView(APIView):
+            compression_exempt = True
+
+        for kwargs in ({"view": view}, {"view": ExemptView.as_view()}, {"path": "/api/raw/export"}):
+            response = self._run(self._json(), HTTP_ACCEPT_ENCODING="gzip", **kwargs)
+            self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_brotli_preferred_when_available(self):
+        fake = Mock()
+        fake.Compressor.return_value.process.side_effect = lambda data: b"BR" + data[:10]
+        fake.Compressor.return_value.finish.return_value = b""
+        with patch.object(middleware_module, "brotli", fake):
+            response = self._run(self._json(), HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+
+        with patch.object(middleware_module, "brotli", None):
+            response = self._run(self._json(), HTTP_ACCEPT_ENCODING="br")
+        self.assertFalse(response.has_header("Content-Encoding"))
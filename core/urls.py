@@ -2,9 +2,12 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from .views import CompressionStatsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/auth/', include('authentication.urls', namespace='auth')),
     path("api/", include(("cases.urls", "cases"), namespace="cases")),
     path("api/notifications/", include("notifications.urls")),
+    path("api/metrics/compression", CompressionStatsView.as_view(), name="compression-stats"),
 ]
@@ -0,0 +1,16 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .middleware import compression_stats
+
+
+class CompressionStatsView(APIView):
+    """
+    GET: bytes in/out and bytes saved by CompressionMiddleware in this worker.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(compression_stats.snapshot(), status=status.HTTP_200_OK)
@@ -0,0 +1,193 @@
+# notifications/dispatch.py
+"""
+asyncio dispatcher for the FCM HTTP v1 API.
+
+One FcmDispatcher holds a pooled keep-alive httpx.AsyncClient (HTTP/2 when
+the `h2` package is installed, so many requests share a connection) and a
+semaphore that bounds in-flight requests. HTTP v1 sends one message per
+token, so throughput comes from concurrency rather than batching:
+
+    async with FcmDispatcher() as dispatcher:
+        result = await dispatcher.send(tokens, title, body, data)
+
+Results are the same SendResult/TokenResult objects FcmNotification returns,
+with errors mapped onto the firebase_admin exception types so
+classify_error() and prune_device_tokens() treat both paths alike.
+"""
+import asyncio
+import importlib.util
+import logging
+import socket
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+import httpx
+from django.conf import settings
+from firebase_admin import exceptions as firebase_exceptions, messaging
+
+from .services import SendRequestError, SendResult, TokenResult, names_token
+
+logger = logging.getLogger(__name__)
+
+FCM_SCOPE = "https://www.googleapis.com/auth/firebase.messaging"
+
+TokenProvider = Callable[[], Union[str, Awaitable[str]]]
+
+
+class FcmHttpError(SendRequestError):
+    """
+    A failed send that is not specific to the token: network, auth, quota,
+    server, or a message FCM rejects for every recipient (a bare 400).
+    """
+
+
+def _error_for(response: httpx.Response) -> Exception:
+    """
+    Only FCM error details about the token condemn it; a status code alone
+    never does (a 404 may be a wrong project id, a 400 an oversized payload).
+    """
+    try:
+        error = response.json().get("error", {})
+    except ValueError:
+        error = {}
+    if not isinstance(error, dict):
+        error = {}
+    message = error.get("message") or response.reason_phrase
+    codes = {d.get("errorCode") for d in error.get("details", []) if isinstance(d, dict)}
+
+    if "UNREGISTERED" in codes:
+        return messaging.UnregisteredError(message)
+    if "SENDER_ID_MISMATCH" in codes:
+        return messaging.SenderIdMismatchError(message)
+    if "INVALID_ARGUMENT" in codes and names_token(error):
+        return firebase_exceptions.InvalidArgumentError(message)
+    return FcmHttpError(f"{response.status_code} {message}")
+
+
+class ServiceAccountTokens:
+    """
+    OAuth2 access tokens from the FIREBASE_CREDENTIALS_FILE service account,
+    refreshed (in a worker thread) shortly before they expire.
+    """
+
+    def __init__(self, credentials_file: str):
+        from google.oauth2 import service_account
+
+        self.credentials = service_account.Credentials.from_service_account_file(
+            credentials_file, scopes=[FCM_SCOPE],
+        )
+        self._lock = asyncio.Lock()
+
+    def _refresh(self) -> None:
+        from google.auth.transport.requests import Request
+
+        self.credentials.refresh(Request())
+
+    async def __call__(self) -> str:
+        async with self._lock:
+            expiry = self.credentials.expiry
+            if not self.credentials.token or expiry is None or expiry.timestamp() - time.time() < 300:
+                await asyncio.to_thread(self._refresh)
+        return self.credentials.token
+
+
+class FcmDispatcher:
+    def __init__(
+        self,
+        project_id: Optional[str] = None,
+        token_provider: Optional[TokenProvider] = None,
+        *,
+        concurrency: Optional[int] = None,
+        endpoint: Optional[str] = None,
+        timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ) -> None:
+        self.project_id = project_id or getattr(settings, "FIREBASE_PROJECT_ID", "")
+        self.token_provider = token_provider
+        self.concurrency = concurrency or getattr(settings, "FCM_MAX_CONCURRENCY", 200)
+        self.endpoint = (endpoint or getattr(settings, "FCM_ENDPOINT", "https://fcm.googleapis.com")).rstrip("/")
+        self.timeout = timeout or getattr(settings, "FCM_TIMEOUT", 10)
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "FcmDispatcher":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        if self._client is not None:
+            return
+        if self.token_provider is None:
+            self.token_provider = ServiceAccountTokens(settings.FIREBASE_CREDENTIALS_FILE)
+        transport = httpx.AsyncHTTPTransport(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            # small request/response pairs: don't let Nagle hold the body
+            # back waiting for the peer's (delayed) ACK of the headers
+            socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)],
+        )
+        self._client = httpx.AsyncClient(base_url=self.endpoint, timeout=self.timeout, transport=transport)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _access_token(self) -> str:
+        token = self.token_provider()
+        if asyncio.iscoroutine(token):
+            token = await token
+        return token
+
+    async def _send_one(self, token: str, payload: dict, headers: Dict[str, str]) -> TokenResult:
+        body = {"message": {**payload, "token": token}}
+        async with self._semaphore:
+            try:
+                response = await self._client.post(
+                    f"/v1/projects/{self.project_id}/messages:send", json=body, headers=headers,
+                )
+            except httpx.HTTPError as exc:
+                return TokenResult(token, False, error=FcmHttpError(f"{type(exc).__name__}: {exc}"))
+        if response.status_code == 200:
+            return TokenResult(token, True, response.json().get("name"))
+        return TokenResult(token, False, error=_error_for(response))
+
+    async def send(
+        self,
+        device_ids: Iterable[str],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, str]] = None,
+    ) -> SendResult:
+        """Send one notification to every token concurrently; never raises for send errors."""
+        await self.open()
+        tokens = list(dict.fromkeys(t for t in device_ids if t))
+        if not tokens:
+            return SendResult()
+
+        payload = {
+            "notification": {"title": title, "body": body},
+            "data": {str(k): str(v) for k, v in (data or {}).items()},
+        }
+        headers = {"Authorization": f"Bearer {await self._access_token()}"}
+        results: List[TokenResult] = await asyncio.gather(
+            *(self._send_one(token, payload, headers) for token in tokens)
+        )
+        result = SendResult(list(results))
+        logger.info(
+            "FCM v1 push finished: attempted=%s, success=%s, failed=%s",
+            result.attempted,
+            result.succeeded,
+            result.failed,
+        )
+        return result
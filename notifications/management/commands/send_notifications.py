@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import AsyncFcmSender, get_sender, process_batch, process_batch_async
+
+
+class Command(BaseCommand):
+    help = "Send queued push notifications from the NotificationOutbox table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int,
+            default=getattr(settings, "NOTIFICATIONS_OUTBOX_BATCH_SIZE", 100),
+        )
+        parser.add_argument(
+            "--interval", type=float, default=1.0,
+            help="Seconds to sleep when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain what is due now and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--async", dest="use_async", action="store_true",
+            help="Send through the asyncio FCM HTTP v1 dispatcher (notifications.dispatch).",
+        )
+        parser.add_argument(
+            "--concurrency", type=int,
+            default=getattr(settings, "FCM_MAX_CONCURRENCY", 200),
+            help="Max in-flight FCM requests with --async.",
+        )
+
+    def handle(self, *args, batch_size, interval, once, use_async, concurrency, **options):
+        totals = {"claimed": 0, "sent": 0, "retried": 0, "failed": 0}
+        try:
+            if use_async:
+                # async_to_sync keeps the ORM work (sync_to_async) on this thread
+                async_to_sync(self._drain_async)(totals, batch_size, interval, once, concurrency)
+            else:
+                self._drain(totals, batch_size, interval, once)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            "sent={sent} retried={retried} failed={failed}".format(**totals)
+        )
+
+    def _drain(self, totals, batch_size, interval, once):
+        sender = get_sender()
+        while True:
+            counts = process_batch(sender, batch_size)
+            self._add(totals, counts)
+            if counts["claimed"]:
+                continue
+            if once:
+                return
+            time.sleep(interval)
+
+    async def _drain_async(self, totals, batch_size, interval, once, concurrency):
+        from notifications.dispatch import FcmDispatcher
+
+        async with FcmDispatcher(concurrency=concurrency) as dispatcher:
+            sender = AsyncFcmSender(dispatcher)
+            while True:
+                counts = await process_batch_async(sender, batch_size)
+                self._add(totals, counts)
+                if counts["claimed"]:
+                    continue
+                if once:
+                    return
+                await asyncio.sleep(interval)
+
+    @staticmethod
+    def _add(totals, counts):
+        for key, value in counts.items():
+            totals[key] += value
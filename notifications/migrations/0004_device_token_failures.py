@@ -0,0 +1,23 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attorneydevice',
+            name='token_failures',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='clientdevice',
+            name='token_failures',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
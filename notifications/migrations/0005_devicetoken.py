@@ -0,0 +1,78 @@
+# Generated by Django 4.2.24 on 2026-10-17 22:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_device_tokens(apps, schema_editor):
+    """
+    One DeviceToken per token in the old per-owner JSON lists, keeping each
+    token's failure count. A token listed under several owners goes to the
+    last one seen (clients after attorneys), as a fresh registration would.
+    """
+    AttorneyDevice = apps.get_model("notifications", "AttorneyDevice")
+    ClientDevice = apps.get_model("notifications", "ClientDevice")
+    DeviceToken = apps.get_model("notifications", "DeviceToken")
+
+    tokens = {}
+    for user_id, device_ids, failures in AttorneyDevice.objects.values_list(
+        "user_id", "device_ids", "token_failures",
+    ).iterator(chunk_size=2000):
+        for token in device_ids or []:
+            if token:
+                tokens[token] = DeviceToken(
+                    token=token, audience="attorney", user_id=user_id,
+                    failures=(failures or {}).get(token, 0),
+                )
+    for client_code, device_ids, failures in ClientDevice.objects.values_list(
+        "client_code", "device_ids", "token_failures",
+    ).iterator(chunk_size=2000):
+        for token in device_ids or []:
+            if token:
+                tokens[token] = DeviceToken(
+                    token=token, audience="client", client_code=client_code,
+                    failures=(failures or {}).get(token, 0),
+                )
+
+    DeviceToken.objects.bulk_create(tokens.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0004_device_token_failures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=512, unique=True)),
+                ('audience', models.CharField(choices=[('client', 'Client'), ('attorney', 'Attorney')], max_length=16)),
+                ('client_code', models.CharField(blank=True, max_length=32)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='device_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='devicetoken',
+            index=models.Index(fields=['user'], name='notificatio_user_id_177c8a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devicetoken',
+            index=models.Index(fields=['client_code'], name='notificatio_client__2762a3_idx'),
+        ),
+        migrations.RunPython(copy_device_tokens, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='ClientDevice',
+        ),
+        migrations.DeleteModel(
+            name='AttorneyDevice',
+        ),
+    ]
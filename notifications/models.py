@@ -1,50 +1,86 @@
 # notifications/models.py
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
-class AttorneyDevice(models.Model):
+class DeviceToken(models.Model):
     """
-    One row per attorney.
-    device_ids is a JSON list of FCM registration tokens for that attorney's devices.
+    One row per FCM registration token, owned by an attorney (user) or a
+    client (client_code). Registering is an upsert on the unique token, so a
+    token that moves to another owner is reassigned rather than duplicated.
     """
 
-    user = models.OneToOneField(
+    CLIENT = "client"
+    ATTORNEY = "attorney"
+    AUDIENCE_CHOICES = ((CLIENT, "Client"), (ATTORNEY, "Attorney"))
+
+    token = models.CharField(max_length=512, unique=True)
+    audience = models.CharField(max_length=16, choices=AUDIENCE_CHOICES)
+    user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name="attorney_devices",
+        related_name="device_tokens",
+        null=True, blank=True,
     )
-    # List of FCM registration tokens
-    device_ids = models.JSONField(default=list, blank=True)
+    client_code = models.CharField(max_length=32, blank=True)
+    # consecutive transient send failures; see prune_device_tokens()
+    failures = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
             models.Index(fields=["user"]),
+            models.Index(fields=["client_code"]),
         ]
 
     def __str__(self) -> str:
-        ids = self.device_ids or []
-        if not ids:
-            return f"{self.user_id} - <no devices>"
-        return f"{self.user_id} - {len(ids)} device(s)"
+        owner = self.user_id if self.audience == self.ATTORNEY else self.client_code
+        return f"{self.audience}:{owner} - {self.token[:16]}…"
 
 
-class ClientDevice(models.Model):
+class NotificationOutbox(models.Model):
     """
-    One row per client_code.
-    device_ids is a JSON list of FCM registration tokens for that client.
+    A push notification waiting to be sent.
+
+    Rows are written in the same transaction as the change they announce and
+    drained by `manage.py send_notifications` (notifications.outbox), so a
+    request never waits on FCM. A row is only marked sent after the send
+    returns; a worker that dies mid-batch loses its lease and the row is
+    picked up again (at-least-once).
     """
 
-    client_code = models.CharField(max_length=32, unique=True, db_index=True)
-    device_ids = models.JSONField(default=list, blank=True)
+    CLIENT = DeviceToken.CLIENT
+    ATTORNEY = DeviceToken.ATTORNEY
+    AUDIENCE_CHOICES = DeviceToken.AUDIENCE_CHOICES
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = ((PENDING, "Pending"), (SENT, "Sent"), (FAILED, "Failed"))
+
+    kind = models.CharField(max_length=32)
+    audience = models.CharField(max_length=16, choices=AUDIENCE_CHOICES)
+    # client_code or attorney user id, whichever `audience` says
+    recipient = models.CharField(max_length=64)
+    tokens = models.JSONField(default=list)
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         indexes = [
-            models.Index(fields=["client_code"]),
+            models.Index(fields=["status", "available_at"]),
         ]
 
     def __str__(self) -> str:
-        ids = self.device_ids or []
-        if not ids:
-            return f"{self.client_code} - <no devices>"
-        return f"{self.client_code} - {len(ids)} device(s)"
+        return f"{self.kind} -> {self.audience}:{self.recipient} [{self.status}]"
@@ -0,0 +1,197 @@
+# notifications/outbox.py
+"""
+Drain NotificationOutbox rows: claim a batch under a lease, send each row
+through the configured sender, then mark it sent or schedule a retry with
+exponential backoff. Run by `manage.py send_notifications`.
+
+The sender is settings.NOTIFICATIONS_SENDER (a dotted path to a class with
+`send(message) -> int`); FakeSender keeps everything in memory for tests and
+local development. process_batch_async() is the asyncio counterpart: it sends
+a whole batch concurrently through AsyncFcmSender (notifications.dispatch).
+"""
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class TransientSendError(Exception):
+    pass
+
+
+def settle(message: NotificationOutbox, result) -> int:
+    """
+    Prune the recipient's dead tokens after a send. Tokens that failed
+    transiently or with a request-level error (and were not evicted) stay on
+    the row and this raises, so only they are retried.
+    """
+    from .services import RETRY, TRANSIENT, prune_device_tokens
+
+    evicted = set(prune_device_tokens(result))
+    retry = [t for t in result.tokens(TRANSIENT, RETRY) if t not in evicted]
+    if retry:
+        NotificationOutbox.objects.filter(pk=message.pk).update(tokens=retry)
+        raise TransientSendError(f"{len(retry)} of {result.attempted} token(s) failed transiently")
+    return result.succeeded
+
+
+class FcmSender:
+    """Sends through FcmNotification (firebase_admin multicast), then settle()s."""
+
+    def __init__(self, transport=None):
+        self.transport = transport
+
+    def send(self, message: NotificationOutbox) -> int:
+        from .services import FcmNotification
+
+        result = FcmNotification(
+            device_ids=message.tokens,
+            title=message.title,
+            body=message.body,
+            data=message.data,
+            transport=self.transport,
+        ).send()
+        return settle(message, result)
+
+
+class AsyncFcmSender:
+    """Sends through an FcmDispatcher (HTTP v1, concurrent), then settle()s."""
+
+    def __init__(self, dispatcher=None):
+        from .dispatch import FcmDispatcher
+
+        self.dispatcher = dispatcher or FcmDispatcher()
+
+    async def send(self, message: NotificationOutbox) -> int:
+        result = await self.dispatcher.send(message.tokens, message.title, message.body, message.data)
+        return await sync_to_async(settle)(message, result)
+
+
+class FakeSender:
+    """
+    Records messages in FakeSender.outbox instead of sending them. Set
+    `fail_with` to an exception to make every send raise it.
+    """
+
+    outbox: List[NotificationOutbox] = []
+    fail_with: Optional[Exception] = None
+
+    def send(self, message: NotificationOutbox) -> int:
+        if self.fail_with is not None:
+            raise self.fail_with
+        type(self).outbox.append(message)
+        return len(message.tokens)
+
+
+def get_sender():
+    return import_string(getattr(settings, "NOTIFICATIONS_SENDER", "notifications.outbox.FcmSender"))()
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before retry number `attempts` (1-based): base * 2^(n-1), capped."""
+    base = getattr(settings, "NOTIFICATIONS_OUTBOX_BACKOFF", 5)
+    cap = getattr(settings, "NOTIFICATIONS_OUTBOX_BACKOFF_MAX", 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def claim_batch(batch_size: int, lease: int) -> List[NotificationOutbox]:
+    """
+    Lease up to `batch_size` due rows to this worker. Rows whose lease has
+    expired (a worker died holding them) are due again.
+    """
+    now = timezone.now()
+    due = NotificationOutbox.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        status=NotificationOutbox.PENDING,
+        available_at__lte=now,
+    )
+    with transaction.atomic():
+        # skip_locked lets several workers claim disjoint batches (ignored
+        # where unsupported, e.g. SQLite, which serializes writers anyway)
+        ids = list(
+            due.select_for_update(skip_locked=True)
+            .order_by("available_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        due.filter(id__in=ids).update(locked_until=now + timedelta(seconds=lease))
+    return list(NotificationOutbox.objects.filter(id__in=ids).order_by("available_at", "id"))
+
+
+def _record(outcomes, max_attempts: int) -> Dict[str, int]:
+    """Mark (message, error-or-None) outcomes sent, or schedule their retry."""
+    counts = {"claimed": len(outcomes), "sent": 0, "retried": 0, "failed": 0}
+    sent_ids = []
+    for message, exc in outcomes:
+        if exc is None:
+            sent_ids.append(message.pk)
+            continue
+        attempts = message.attempts + 1
+        failed = attempts >= max_attempts
+        logger.warning("Outbox message %s failed (attempt %s): %s", message.pk, attempts, exc)
+        NotificationOutbox.objects.filter(pk=message.pk).update(
+            attempts=attempts,
+            status=NotificationOutbox.FAILED if failed else NotificationOutbox.PENDING,
+            available_at=timezone.now() + backoff(attempts),
+            locked_until=None,
+            last_error=f"{type(exc).__name__}: {exc}"[:2000],
+        )
+        counts["failed" if failed else "retried"] += 1
+
+    if sent_ids:
+        NotificationOutbox.objects.filter(pk__in=sent_ids).update(
+            status=NotificationOutbox.SENT,
+            sent_at=timezone.now(),
+            locked_until=None,
+        )
+        counts["sent"] = len(sent_ids)
+    return counts
+
+
+def _batch_settings(batch_size: Optional[int]):
+    return (
+        batch_size or getattr(settings, "NOTIFICATIONS_OUTBOX_BATCH_SIZE", 100),
+        getattr(settings, "NOTIFICATIONS_OUTBOX_LEASE", 60),
+        getattr(settings, "NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS", 8),
+    )
+
+
+def process_batch(sender=None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Send one claimed batch; returns counts of claimed/sent/retried/failed rows."""
+    sender = sender or get_sender()
+    batch_size, lease, max_attempts = _batch_settings(batch_size)
+
+    outcomes = []
+    for message in claim_batch(batch_size, lease):
+        try:
+            sender.send(message)
+        except Exception as exc:
+            outcomes.append((message, exc))
+        else:
+            outcomes.append((message, None))
+    return _record(outcomes, max_attempts)
+
+
+async def process_batch_async(sender, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """process_batch() with the batch's messages sent concurrently by an async sender."""
+    batch_size, lease, max_attempts = _batch_settings(batch_size)
+
+    messages = await sync_to_async(claim_batch)(batch_size, lease)
+    errors = await asyncio.gather(*(sender.send(m) for m in messages), return_exceptions=True)
+    outcomes = [
+        (message, error if isinstance(error, Exception) else None)
+        for message, error in zip(messages, errors)
+    ]
+    return await sync_to_async(_record)(outcomes, max_attempts)
@@ -1,7 +1,8 @@
 # notifications/serializers.py
 from rest_framework import serializers
-from cases.models import Case
-from .models import AttorneyDevice, ClientDevice
+from cases.models import Client
+from .models import DeviceToken
+from .services import register_device_token
 
 
 class AttorneyDeviceRegisterSerializer(serializers.Serializer):
@@ -12,18 +13,8 @@ class AttorneyDeviceRegisterSerializer(serializers.Serializer):
         user = self.context["request"].user
         token = validated_data["device_id"]
 
-        obj, _ = AttorneyDevice.objects.get_or_create(
-            user=user,
-            defaults={"device_ids": []},
-        )
-
-        devices = obj.device_ids or []
-        if token not in devices:
-            devices.append(token)
-            obj.device_ids = devices
-            obj.save(update_fields=["device_ids"])
-
-        return obj
+        register_device_token(token, user=user)
+        return DeviceToken.objects.get(token=token)
 
 
 class ClientDeviceRegisterSerializer(serializers.Serializer):
@@ -32,8 +23,7 @@ class ClientDeviceRegisterSerializer(serializers.Serializer):
     device_id = serializers.CharField(max_length=512)
 
     def validate_client_code(self, value):
-        from cases.models import Case  # keep or move to top as you prefer
-        if not Case.objects.filter(client_code=value).exists():
+        if not Client.objects.filter(code=value).exists():
             raise serializers.ValidationError("Invalid client code.")
         return value
 
@@ -41,15 +31,5 @@ class ClientDeviceRegisterSerializer(serializers.Serializer):
         client_code = validated_data["client_code"]
         token = validated_data["device_id"]
 
-        obj, _ = ClientDevice.objects.get_or_create(
-            client_code=client_code,
-            defaults={"device_ids": []},
-        )
-
-        devices = obj.device_ids or []
-        if token not in devices:
-            devices.append(token)
-            obj.device_ids = devices
-            obj.save(update_fields=["device_ids"])
-
-        return obj
+        register_device_token(token, client_code=client_code)
+        return DeviceToken.objects.get(token=token)
@@ -1,12 +1,16 @@
-from typing import Iterable, Sequence, Optional, Dict
+from dataclasses import dataclass, field
+from typing import Iterable, List, Sequence, Optional, Dict
 import logging
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, exceptions as firebase_exceptions, messaging
 
-from .models import AttorneyDevice, ClientDevice
+from .models import DeviceToken, NotificationOutbox
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,129 @@ if not firebase_admin._apps:
         )
 
 
+# FCM accepts at most this many tokens per multicast request.
+FCM_MULTICAST_LIMIT = 500
+
+# Send outcomes, per token
+DELIVERED = "delivered"
+UNREGISTERED = "unregistered"  # app uninstalled / token expired: drop it
+INVALID = "invalid"            # malformed or for another sender: drop it
+TRANSIENT = "transient"        # token-specific failure; repeated ones evict the token
+RETRY = "retry"                # not the token's fault: retried, never counted against it
+
+# Errors about the request, the credentials or FCM itself rather than the
+# token; an outage or a bad credential must not evict every device.
+_NOT_THE_TOKEN = (
+    firebase_exceptions.UnavailableError,
+    firebase_exceptions.InternalError,
+    firebase_exceptions.ResourceExhaustedError,  # incl. QuotaExceededError
+    firebase_exceptions.UnauthenticatedError,    # incl. ThirdPartyAuthError
+    firebase_exceptions.PermissionDeniedError,
+    firebase_exceptions.DeadlineExceededError,
+    firebase_exceptions.CancelledError,
+    firebase_exceptions.UnknownError,
+)
+
+
+class SendRequestError(Exception):
+    """A failed send that is not specific to the token (transport, auth, quota, server, payload)."""
+
+
+def names_token(error_body: dict) -> bool:
+    """Whether an FCM v1 error body has a field violation on message.token."""
+    for detail in error_body.get("details", []):
+        if not isinstance(detail, dict):
+            continue
+        for violation in detail.get("fieldViolations", []):
+            if isinstance(violation, dict) and violation.get("field") == "message.token":
+                return True
+    return False
+
+
+def _invalid_token(exc: firebase_exceptions.InvalidArgumentError) -> bool:
+    # INVALID_ARGUMENT also covers a bad payload (too large, reserved data
+    # keys), which would fail for every recipient; only a violation on the
+    # token field condemns the token. Errors built without a response come
+    # from notifications.dispatch, which has already checked.
+    response = getattr(exc, "http_response", None)
+    if response is None:
+        return True
+    try:
+        return names_token(response.json().get("error", {}))
+    except (ValueError, AttributeError):
+        return False
+
+
+def classify_error(exc: Optional[Exception]) -> str:
+    if isinstance(exc, messaging.UnregisteredError):
+        return UNREGISTERED
+    if isinstance(exc, messaging.SenderIdMismatchError):
+        return INVALID
+    if isinstance(exc, firebase_exceptions.InvalidArgumentError):
+        return INVALID if _invalid_token(exc) else RETRY
+    if isinstance(exc, firebase_exceptions.FirebaseError) and not isinstance(exc, _NOT_THE_TOKEN):
+        return TRANSIENT
+    return RETRY
+
+
+@dataclass
+class TokenResult:
+    token: str
+    success: bool
+    message_id: Optional[str] = None
+    error: Optional[Exception] = None
+
+    @property
+    def outcome(self) -> str:
+        return DELIVERED if self.success else classify_error(self.error)
+
+
+@dataclass
+class SendResult:
+    """Per-token outcome of one FcmNotification, in device_ids order."""
+    results: List[TokenResult] = field(default_factory=list)
+
+    @property
+    def attempted(self) -> int:
+        return len(self.results)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for r in self.results if r.success)
+
+    @property
+    def failed(self) -> int:
+        return self.attempted - self.succeeded
+
+    def tokens(self, *outcomes: str) -> List[str]:
+        return [r.token for r in self.results if r.outcome in outcomes]
+
+
+class FirebaseTransport:
+    """
+    Sends through firebase_admin's multicast API. A transport takes one
+    chunk of at most `max_batch` tokens and returns a TokenResult per token,
+    in order; anything with the same two members can stand in for it.
+    """
+    max_batch = FCM_MULTICAST_LIMIT
+
+    def available(self) -> bool:
+        return bool(firebase_admin._apps)
+
+    def send_multicast(self, tokens: List[str], title: str, body: str, data: Dict[str, str]) -> List[TokenResult]:
+        response = messaging.send_each_for_multicast(
+            messaging.MulticastMessage(
+                tokens=tokens,
+                notification=messaging.Notification(title=title, body=body),
+                data=data,
+            )
+        )
+        return [
+            TokenResult(token, r.success, r.message_id, r.exception)
+            for token, r in zip(tokens, response.responses)
+        ]
+
+
 class FcmNotification:
     def __init__(
         self,
@@ -32,46 +159,145 @@ class FcmNotification:
         title: str,
         body: str,
         data: Optional[Dict[str, str]] = None,
+        transport=None,
     ) -> None:
-        self.device_ids = [t for t in device_ids if t]
+        self.device_ids = list(dict.fromkeys(t for t in device_ids if t))
         self.title = title
         self.body = body
         self.data: Dict[str, str] = {
             str(k): str(v) for k, v in (data or {}).items()
         }
+        self.transport = transport or FirebaseTransport()
 
-    def run(self) -> int:
+    def send(self) -> SendResult:
+        """One multicast request per chunk of tokens; never raises."""
+        result = SendResult()
         if not self.device_ids:
-            return 0
+            return result
 
-        if not firebase_admin._apps:
+        if not self.transport.available():
+            # nothing was sent: report every token as a request-level failure
+            # so the outbox keeps the message pending instead of marking it sent
             logger.warning(
-                "Firebase app not initialized; skipping push notification."
+                "Firebase app not initialized; push notification not sent."
             )
-            return 0
+            error = SendRequestError("Firebase app not initialized")
+            result.results.extend(TokenResult(token, False, error=error) for token in self.device_ids)
+            return result
 
-        success_count = 0
-        for token in self.device_ids:
-            message = messaging.Message(
-                token=token,
-                notification=messaging.Notification(
-                    title=self.title,
-                    body=self.body,
-                ),
-                data=self.data,
-            )
+        size = max(1, min(self.transport.max_batch, FCM_MULTICAST_LIMIT))
+        for start in range(0, len(self.device_ids), size):
+            chunk = self.device_ids[start:start + size]
             try:
-                messaging.send(message)
-                success_count += 1
-            except Exception:
-                logger.exception("Error sending FCM push to token=%s", token)
+                result.results.extend(
+                    self.transport.send_multicast(chunk, self.title, self.body, self.data)
+                )
+            except Exception as exc:
+                # the request failed, not its tokens
+                logger.exception("Error sending FCM multicast to %s token(s)", len(chunk))
+                error = SendRequestError(f"{type(exc).__name__}: {exc}")
+                error.__cause__ = exc
+                result.results.extend(TokenResult(token, False, error=error) for token in chunk)
+
+        for r in result.results:
+            if not r.success:
+                logger.warning("FCM push failed for token=%s: %s", r.token, r.error)
 
         logger.info(
-            "FCM push finished: attempted=%s, success=%s",
-            len(self.device_ids),
-            success_count,
+            "FCM push finished: attempted=%s, success=%s, failed=%s",
+            result.attempted,
+            result.succeeded,
+            result.failed,
         )
-        return success_count
+        return result
+
+    def run(self) -> int:
+        return self.send().succeeded
+
+
+def register_device_token(token: str, *, user=None, client_code: str = "") -> None:
+    """
+    Record `token` for an attorney (`user`) or a client (`client_code`) in
+    one INSERT ... ON CONFLICT (token) DO UPDATE: concurrent registrations
+    can't lose tokens, and re-registering refreshes last_seen_at, resets the
+    failure count and moves the token to its new owner.
+    """
+    DeviceToken.objects.bulk_create(
+        [
+            DeviceToken(
+                token=token,
+                audience=DeviceToken.ATTORNEY if user is not None else DeviceToken.CLIENT,
+                user=user,
+                client_code=client_code,
+                failures=0,
+                last_seen_at=timezone.now(),
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["token"],
+        update_fields=["audience", "user", "client_code", "failures", "last_seen_at"],
+    )
+
+
+def attorney_tokens(user_id) -> List[str]:
+    return list(DeviceToken.objects.filter(user_id=user_id).values_list("token", flat=True))
+
+
+def client_tokens(client_code: str) -> List[str]:
+    return list(DeviceToken.objects.filter(client_code=client_code).values_list("token", flat=True))
+
+
+def prune_device_tokens(result: SendResult) -> List[str]:
+    """
+    Update the token table after a send: unregistered and invalid tokens are
+    deleted, token-specific transient failures bump the token's counter
+    (evicting it at NOTIFICATIONS_TOKEN_MAX_FAILURES) and a delivery resets
+    it. RETRY outcomes (request, auth, quota and server errors) leave the
+    token alone. Set-based statements over the unique token index; returns
+    the removed tokens.
+    """
+    dead = set(result.tokens(UNREGISTERED, INVALID))
+    transient = result.tokens(TRANSIENT)
+    delivered = result.tokens(DELIVERED)
+    max_failures = getattr(settings, "NOTIFICATIONS_TOKEN_MAX_FAILURES", 5)
+
+    with transaction.atomic():
+        if transient:
+            DeviceToken.objects.filter(token__in=transient).update(failures=F("failures") + 1)
+            dead.update(
+                DeviceToken.objects.filter(token__in=transient, failures__gte=max_failures)
+                .values_list("token", flat=True)
+            )
+        if delivered:
+            DeviceToken.objects.filter(token__in=delivered, failures__gt=0).update(failures=0)
+        removed = []
+        if dead:
+            removed = list(DeviceToken.objects.filter(token__in=dead).values_list("token", flat=True))
+            DeviceToken.objects.filter(token__in=removed).delete()
+
+    if removed:
+        logger.info("Pruned %s dead FCM token(s)", len(removed))
+    return removed
+
+
+def _enqueue(kind: str, audience: str, recipient: str, device_ids, title: str, body: str, data: Dict[str, str]) -> int:
+    """
+    Queue a push in the outbox (same transaction as the caller's writes) and
+    return how many devices it targets. Nothing is queued for no devices.
+    """
+    tokens = [t for t in (device_ids or []) if t]
+    if not tokens:
+        return 0
+    NotificationOutbox.objects.create(
+        kind=kind,
+        audience=audience,
+        recipient=recipient,
+        tokens=tokens,
+        title=title,
+        body=body,
+        data={str(k): str(v) for k, v in data.items()},
+    )
+    return len(tokens)
 
 
 def notify_client_case_updated(case, changed_fields: Iterable[str]) -> int:
@@ -86,23 +312,19 @@ def notify_client_case_updated(case, changed_fields: Iterable[str]) -> int:
 
     body = "; ".join(details) or "Your case details have changed."
 
-    try:
-        record = ClientDevice.objects.get(client_code=case.client_code)
-        device_ids = record.device_ids or []
-    except ClientDevice.DoesNotExist:
-        device_ids = []
-
-    notification = FcmNotification(
-        device_ids=device_ids,
-        title=title,
-        body=body,
-        data={
+    return _enqueue(
+        "case_update",
+        NotificationOutbox.CLIENT,
+        case.client_code,
+        client_tokens(case.client_code),
+        title,
+        body,
+        {
             "type": "case_update",
             "case_id": str(case.id),
             "client_code": case.client_code,
         },
     )
-    return notification.run()
 
 
 def notify_attorney_call_request(case) -> int:
@@ -115,20 +337,16 @@ def notify_attorney_call_request(case) -> int:
     title = "Client requested a call"
     body = f"{case.client_name} ({case.client_code}) asked you to call them."
 
-    try:
-        record = AttorneyDevice.objects.get(user_id=case.attorney_id)
-        device_ids = record.device_ids or []
-    except AttorneyDevice.DoesNotExist:
-        device_ids = []
-
-    notification = FcmNotification(
-        device_ids=device_ids,
-        title=title,
-        body=body,
-        data={
+    return _enqueue(
+        "call_request",
+        NotificationOutbox.ATTORNEY,
+        str(case.attorney_id),
+        attorney_tokens(case.attorney_id),
+        title,
+        body,
+        {
             "type": "call_request",
             "case_id": str(case.id),
             "client_code": case.client_code,
         },
     )
-    return notification.run()
\ No newline at end of file
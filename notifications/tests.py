@@ -0,0 +1,582 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from firebase_admin import exceptions as firebase_exceptions, messaging
+import requests
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from cases.models import Case
+
+from .dispatch import FcmDispatcher
+from .models import DeviceToken, NotificationOutbox
+from .outbox import FakeSender, FcmSender, backoff, process_batch
+from .services import (
+    DELIVERED,
+    FCM_MULTICAST_LIMIT,
+    INVALID,
+    RETRY,
+    TRANSIENT,
+    UNREGISTERED,
+    FcmNotification,
+    FirebaseTransport,
+    SendRequestError,
+    SendResult,
+    TokenResult,
+    classify_error,
+    client_tokens,
+    prune_device_tokens,
+    register_device_token,
+)
+
+User = get_user_model()
+
+
+def make_case(attorney=None, **overrides):
+    fields = dict(
+        client_name="Jane Client",
+        client_phone="5551234567",
+        client_email="jane@example.com",
+        firm_name="Acme Law",
+        attorney=attorney,
+        case_type="Auto Accident",
+        case_status="Case Signed",
+    )
+    fields.update(overrides)
+    case = Case(**fields)
+    case.save()
+    return case
+
+
+def queue(**overrides):
+    fields = dict(
+        kind="case_update",
+        audience=NotificationOutbox.CLIENT,
+        recipient="JAN-000001",
+        tokens=["tok-1", "tok-2"],
+        title="Your case was updated",
+        body="Status → Case Signed",
+    )
+    fields.update(overrides)
+    return NotificationOutbox.objects.create(**fields)
+
+
+@override_settings(NOTIFICATIONS_SENDER="notifications.outbox.FakeSender")
+class OutboxEnqueueTests(TestCase):
+    def setUp(self):
+        self.attorney = User.objects.create_user(email="att@example.com", password="x")
+        self.case = make_case(self.attorney)
+        register_device_token("client-tok", client_code=self.case.client_code)
+        register_device_token("att-tok-1", user=self.attorney)
+        register_device_token("att-tok-2", user=self.attorney)
+
+    @patch("notifications.services.messaging.send")
+    def test_case_change_is_queued_not_sent(self, send):
+        case = Case.objects.get(pk=self.case.pk)
+        case.case_status = "Hearing Scheduled"
+        case.save()
+
+        send.assert_not_called()
+        message = NotificationOutbox.objects.get()
+        self.assertEqual(message.audience, NotificationOutbox.CLIENT)
+        self.assertEqual(message.recipient, self.case.client_code)
+        self.assertEqual(message.tokens, ["client-tok"])
+        self.assertEqual(message.body, "Status → Hearing Scheduled")
+
+    def test_call_request_reports_queued_devices(self):
+        response = APIClient().post(reverse("cases:client-call-request"), {"code": self.case.client_code})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["devices_notified"], 2)
+        self.assertEqual(NotificationOutbox.objects.get().recipient, str(self.attorney.pk))
+
+    def test_nothing_queued_without_devices(self):
+        DeviceToken.objects.all().delete()
+        case = Case.objects.get(pk=self.case.pk)
+        case.notes = "changed"
+        case.save()
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+@override_settings(
+    NOTIFICATIONS_SENDER="notifications.outbox.FakeSender",
+    NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS=3,
+    NOTIFICATIONS_OUTBOX_BACKOFF=10,
+)
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        FakeSender.outbox = []
+        FakeSender.fail_with = None
+        self.addCleanup(setattr, FakeSender, "fail_with", None)
+
+    def test_sends_and_marks_sent(self):
+        queue()
+        queue(tokens=["tok-3"])
+
+        counts = process_batch(FakeSender(), batch_size=10)
+
+        self.assertEqual(counts, {"claimed": 2, "sent": 2, "retried": 0, "failed": 0})
+        self.assertEqual(len(FakeSender.outbox), 2)
+        self.assertFalse(NotificationOutbox.objects.exclude(status=NotificationOutbox.SENT).exists())
+        self.assertEqual(process_batch(FakeSender())["claimed"], 0)
+
+    def test_batches_respect_size(self):
+        for _ in range(5):
+            queue()
+        self.assertEqual(process_batch(FakeSender(), batch_size=2)["sent"], 2)
+        self.assertEqual(NotificationOutbox.objects.filter(status=NotificationOutbox.PENDING).count(), 3)
+
+    def test_failure_backs_off_then_gives_up(self):
+        message = queue()
+        FakeSender.fail_with = ConnectionError("fcm unreachable")
+
+        self.assertEqual(process_batch(FakeSender())["retried"], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.status, NotificationOutbox.PENDING)
+        self.assertGreater(message.available_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn("fcm unreachable", message.last_error)
+
+        # not due yet
+        self.assertEqual(process_batch(FakeSender())["claimed"], 0)
+
+        NotificationOutbox.objects.update(available_at=timezone.now(), attempts=2)
+        self.assertEqual(process_batch(FakeSender())["failed"], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, NotificationOutbox.FAILED)
+
+    def test_backoff_is_exponential_and_capped(self):
+        self.assertEqual([backoff(n).total_seconds() for n in (1, 2, 3)], [10, 20, 40])
+        with override_settings(NOTIFICATIONS_OUTBOX_BACKOFF_MAX=30):
+            self.assertEqual(backoff(5).total_seconds(), 30)
+
+    def test_leased_rows_are_skipped_until_the_lease_expires(self):
+        message = queue(locked_until=timezone.now() + timedelta(seconds=30))
+        self.assertEqual(process_batch(FakeSender())["claimed"], 0)
+
+        # the worker holding it died: the row is delivered again
+        NotificationOutbox.objects.filter(pk=message.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(process_batch(FakeSender())["sent"], 1)
+
+    def test_command_drains_once(self):
+        queue()
+        queue()
+        out = StringIO()
+        call_command("send_notifications", "--once", stdout=out)
+        self.assertIn("sent=2", out.getvalue())
+        self.assertEqual(len(FakeSender.outbox), 2)
+
+
+class StubTransport:
+    """In-process stand-in for FirebaseTransport."""
+
+    def __init__(self, max_batch=500, bad_tokens=(), fail_chunk=None):
+        self.max_batch = max_batch
+        self.bad_tokens = set(bad_tokens)
+        self.fail_chunk = fail_chunk
+        self.chunks = []
+
+    def available(self):
+        return True
+
+    def send_multicast(self, tokens, title, body, data):
+        self.chunks.append(list(tokens))
+        if self.fail_chunk is not None and len(self.chunks) - 1 == self.fail_chunk:
+            raise ConnectionError("connection reset")
+        return [
+            TokenResult(t, t not in self.bad_tokens, None if t in self.bad_tokens else f"msg-{t}",
+                        ValueError("bad token") if t in self.bad_tokens else None)
+            for t in tokens
+        ]
+
+
+class FcmMulticastTests(SimpleTestCase):
+    def test_chunks_and_maps_results_back(self):
+        transport = StubTransport(max_batch=2, bad_tokens={"t3"})
+        notification = FcmNotification(["t1", "t2", "t3", "t4", "t5", "t1", ""], "Title", "Body", {"n": 1}, transport=transport)
+
+        result = notification.send()
+
+        self.assertEqual(transport.chunks, [["t1", "t2"], ["t3", "t4"], ["t5"]])
+        self.assertEqual((result.attempted, result.succeeded, result.failed), (5, 4, 1))
+        self.assertEqual([r.token for r in result.results], ["t1", "t2", "t3", "t4", "t5"])
+        self.assertIsInstance(result.results[2].error, ValueError)
+        self.assertEqual(result.results[0].message_id, "msg-t1")
+
+    def test_chunk_size_capped_at_provider_limit(self):
+        transport = StubTransport(max_batch=10_000)
+        tokens = [f"t{i}" for i in range(FCM_MULTICAST_LIMIT + 1)]
+        FcmNotification(tokens, "Title", "Body", transport=transport).send()
+        self.assertEqual([len(c) for c in transport.chunks], [FCM_MULTICAST_LIMIT, 1])
+
+    def test_failed_request_marks_its_chunk_failed(self):
+        transport = StubTransport(max_batch=2, fail_chunk=0)
+        result = FcmNotification(["t1", "t2", "t3"], "Title", "Body", transport=transport).send()
+        self.assertEqual((result.succeeded, result.failed), (1, 2))
+        self.assertIsInstance(result.results[0].error, SendRequestError)
+        self.assertIsInstance(result.results[0].error.__cause__, ConnectionError)
+        self.assertEqual(result.tokens(RETRY), ["t1", "t2"])
+
+    def test_run_returns_success_count(self):
+        transport = StubTransport(bad_tokens={"t2"})
+        self.assertEqual(FcmNotification(["t1", "t2"], "Title", "Body", transport=transport).run(), 1)
+
+    def test_firebase_transport_uses_multicast(self):
+        responses = [Mock(success=True, message_id="m1", exception=None), Mock(success=False, message_id=None, exception=ValueError())]
+        with patch("notifications.services.messaging.send_each_for_multicast", return_value=Mock(responses=responses)) as send:
+            results = FirebaseTransport().send_multicast(["a", "b"], "Title", "Body", {})
+        send.assert_called_once()
+        self.assertEqual(send.call_args.args[0].tokens, ["a", "b"])
+        self.assertEqual([(r.token, r.success) for r in results], [("a", True), ("b", False)])
+
+
+def unregistered():
+    return messaging.UnregisteredError("Requested entity was not found.")
+
+
+def fcm_response(status_code, error):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps({"error": error}).encode()
+    return response
+
+
+class DeviceTokenRegistrationTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.attorney = User.objects.create_user(email="reg@example.com", password="x")
+
+    def test_registration_is_idempotent(self):
+        for _ in range(2):
+            response = self.api.post(reverse("client-device-register"), {"client_code": "JAN-REG001", "device_id": "tok"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(client_tokens("JAN-REG001"), ["tok"])
+
+    def test_registration_is_one_statement(self):
+        with self.assertNumQueries(1):
+            register_device_token("tok", client_code="JAN-REG001")
+
+    def test_reregistering_moves_token_and_resets_failures(self):
+        register_device_token("shared", client_code="JAN-REG001")
+        DeviceToken.objects.filter(token="shared").update(failures=3)
+
+        self.api.force_authenticate(self.attorney)
+        self.api.post(reverse("attorney-device-register"), {"device_id": "shared"})
+
+        device = DeviceToken.objects.get()
+        self.assertEqual((device.audience, device.user, device.client_code), (DeviceToken.ATTORNEY, self.attorney, ""))
+        self.assertEqual(device.failures, 0)
+        self.assertEqual(client_tokens("JAN-REG001"), [])
+
+
+class DeviceTokenMigrationTests(TransactionTestCase):
+    before = [("notifications", "0004_device_token_failures")]
+    after = [("notifications", "0005_devicetoken")]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_json_lists_become_token_rows(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old = executor.loader.project_state(self.before).apps
+        user = old.get_model("authentication", "CustomUser").objects.create(email="mig@example.com", password="x")
+        old.get_model("notifications", "AttorneyDevice").objects.create(
+            user_id=user.pk, device_ids=["a1", "shared"], token_failures={"a1": 2},
+        )
+        old.get_model("notifications", "ClientDevice").objects.create(client_code="JAN-MIG001", device_ids=["c1", "shared", ""])
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        new = executor.loader.project_state(self.after).apps.get_model("notifications", "DeviceToken")
+
+        rows = {t.token: (t.audience, t.user_id, t.client_code, t.failures) for t in new.objects.all()}
+        self.assertEqual(rows, {
+            "a1": ("attorney", user.pk, "", 2),
+            "c1": ("client", None, "JAN-MIG001", 0),
+            "shared": ("client", None, "JAN-MIG001", 0),
+        })
+
+
+class DeadTokenPruningTests(TestCase):
+    def setUp(self):
+        for token in ["live", "gone", "bad", "flaky"]:
+            register_device_token(token, client_code="JAN-PRUNE1")
+
+    def _result(self, **outcomes):
+        errors = {
+            "ok": None,
+            "unregistered": unregistered(),
+            "invalid": firebase_exceptions.InvalidArgumentError("The registration token is not valid."),
+            "transient": firebase_exceptions.NotFoundError("Requested entity was not found."),
+            "outage": firebase_exceptions.UnavailableError("The service is currently unavailable."),
+        }
+        return SendResult([TokenResult(token, kind == "ok", error=errors[kind]) for token, kind in outcomes.items()])
+
+    def test_classify_error(self):
+        self.assertEqual(classify_error(unregistered()), UNREGISTERED)
+        self.assertEqual(classify_error(messaging.SenderIdMismatchError("mismatch")), INVALID)
+        self.assertEqual(classify_error(firebase_exceptions.NotFoundError("not found")), TRANSIENT)
+        # the request, the credentials or FCM failed, not the token
+        self.assertEqual(classify_error(messaging.QuotaExceededError("slow down")), RETRY)
+        self.assertEqual(classify_error(messaging.ThirdPartyAuthError("apns cert")), RETRY)
+        self.assertEqual(classify_error(firebase_exceptions.InternalError("oops")), RETRY)
+        self.assertEqual(classify_error(TimeoutError()), RETRY)
+        self.assertEqual(classify_error(SendRequestError("connection reset")), RETRY)
+
+    def test_invalid_argument_only_condemns_the_token_it_names(self):
+        bad_token = firebase_exceptions.InvalidArgumentError("invalid token", http_response=fcm_response(400, {
+            "status": "INVALID_ARGUMENT",
+            "details": [
+                {"errorCode": "INVALID_ARGUMENT"},
+                {"fieldViolations": [{"field": "message.token", "description": "Invalid registration token"}]},
+            ],
+        }))
+        bad_payload = firebase_exceptions.InvalidArgumentError("too big", http_response=fcm_response(400, {
+            "status": "INVALID_ARGUMENT",
+            "details": [{"errorCode": "INVALID_ARGUMENT"}, {"fieldViolations": [{"field": "message.data"}]}],
+        }))
+        self.assertEqual(classify_error(bad_token), INVALID)
+        self.assertEqual(classify_error(bad_payload), RETRY)
+
+    def test_dead_tokens_removed_in_one_write(self):
+        result = self._result(live="ok", gone="unregistered", bad="invalid", flaky="transient")
+        # savepoint, bump, evictable read, reset, dead read, delete, release
+        with self.assertNumQueries(7):
+            removed = prune_device_tokens(result)
+
+        self.assertEqual(sorted(removed), ["bad", "gone"])
+        self.assertEqual(sorted(client_tokens("JAN-PRUNE1")), ["flaky", "live"])
+        self.assertEqual(DeviceToken.objects.get(token="flaky").failures, 1)
+
+    @override_settings(NOTIFICATIONS_TOKEN_MAX_FAILURES=3)
+    def test_repeated_transient_failures_evict(self):
+        for _ in range(2):
+            prune_device_tokens(self._result(flaky="transient"))
+        # a delivery in between starts the count over
+        prune_device_tokens(self._result(flaky="ok"))
+        for _ in range(2):
+            prune_device_tokens(self._result(flaky="transient"))
+        self.assertEqual(DeviceToken.objects.get(token="flaky").failures, 2)
+
+        removed = prune_device_tokens(self._result(flaky="transient"))
+        self.assertEqual(removed, ["flaky"])
+        self.assertNotIn("flaky", client_tokens("JAN-PRUNE1"))
+
+    def test_outages_never_evict_tokens(self):
+        class DownTransport(StubTransport):
+            def send_multicast(self, tokens, title, body, data):
+                raise ConnectionError("connection refused")
+
+        tokens = ["live", "gone", "bad", "flaky"]
+        for _ in range(5):
+            self.assertEqual(prune_device_tokens(FcmNotification(tokens, "T", "B", transport=DownTransport()).send()), [])
+        for _ in range(5):
+            prune_device_tokens(self._result(live="outage", gone="outage"))
+
+        self.assertEqual(sorted(client_tokens("JAN-PRUNE1")), sorted(tokens))
+        self.assertFalse(DeviceToken.objects.filter(failures__gt=0).exists())
+
+    def test_sender_keeps_message_pending_without_firebase(self):
+        class NoFirebase(StubTransport):
+            def available(self):
+                return False
+
+        message = queue(tokens=["live", "gone"])
+
+        counts = process_batch(FcmSender(NoFirebase()))
+
+        self.assertEqual((counts["sent"], counts["retried"]), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual(message.status, NotificationOutbox.PENDING)
+        self.assertEqual(message.tokens, ["live", "gone"])
+        self.assertIn("TransientSendError", message.last_error)
+        self.assertFalse(DeviceToken.objects.filter(failures__gt=0).exists())
+
+    def test_all_delivered_writes_nothing(self):
+        with self.assertNumQueries(3):  # savepoint, reset (matches nothing), release
+            prune_device_tokens(self._result(live="ok", gone="ok"))
+        self.assertEqual(DeviceToken.objects.filter(client_code="JAN-PRUNE1").count(), 4)
+
+    def test_sender_prunes_and_retries_only_transient_tokens(self):
+        attorney = User.objects.create_user(email="prune@example.com", password="x")
+        for token in ["a-live", "a-gone", "a-flaky"]:
+            register_device_token(token, user=attorney)
+        message = queue(audience=NotificationOutbox.ATTORNEY, recipient=str(attorney.pk), tokens=["a-live", "a-gone", "a-flaky"])
+
+        transport = StubTransport()
+        transport.send_multicast = lambda tokens, *args: [
+            TokenResult("a-live", True, "m1"),
+            TokenResult("a-gone", False, error=unregistered()),
+            TokenResult("a-flaky", False, error=ConnectionError("reset")),
+        ][:len(tokens)]
+
+        self.assertEqual(process_batch(FcmSender(transport))["retried"], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.tokens, ["a-flaky"])
+        self.assertEqual(sorted(attorney.device_tokens.values_list("token", flat=True)), ["a-flaky", "a-live"])
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class MockFcmServer:
+    """
+    Local stand-in for the FCM HTTP v1 endpoint (HTTP/1.1 keep-alive).
+    Tokens starting with "dead" get UNREGISTERED, "bad" INVALID_ARGUMENT on
+    the token, "huge" INVALID_ARGUMENT on the payload, "plain" a bare 400,
+    "denied" a 403 and "busy" a 503; everything else is accepted. Records
+    the client connections it served.
+    """
+
+    def __init__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                body = json.loads(self.rfile.read(length))
+                token = body["message"]["token"]
+                with server.lock:
+                    server.connections.add(self.client_address)
+                    server.requests += 1
+                    server.auth.add(self.headers.get("Authorization"))
+
+                if token.startswith("dead"):
+                    status_code, payload = 404, {"error": {"message": "Requested entity was not found.", "details": [{"errorCode": "UNREGISTERED"}]}}
+                elif token.startswith("bad"):
+                    status_code, payload = 400, {"error": {"message": "The registration token is not a valid FCM registration token", "details": [
+                        {"errorCode": "INVALID_ARGUMENT"},
+                        {"fieldViolations": [{"field": "message.token", "description": "Invalid registration token"}]},
+                    ]}}
+                elif token.startswith("huge"):
+                    status_code, payload = 400, {"error": {"message": "Message is too big", "details": [
+                        {"errorCode": "INVALID_ARGUMENT"},
+                        {"fieldViolations": [{"field": "message", "description": "Message is too big"}]},
+                    ]}}
+                elif token.startswith("plain"):
+                    status_code, payload = 400, {"error": {"message": "Bad Request"}}
+                elif token.startswith("denied"):
+                    status_code, payload = 403, {"error": {"message": "Permission denied"}}
+                elif token.startswith("busy"):
+                    status_code, payload = 503, {"error": {"message": "Service unavailable"}}
+                else:
+                    status_code, payload = 200, {"name": f"projects/test/messages/{token}"}
+
+                raw = json.dumps(payload).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.requests = 0
+        self.auth = set()
+        self.httpd = _Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FcmDispatcherTests(TestCase):
+    def dispatcher(self, server, **kwargs):
+        return FcmDispatcher("test", lambda: "test-token", endpoint=server.url, http2=False, **kwargs)
+
+    def test_delivers_many_over_pooled_connections(self):
+        tokens = [f"tok-{i}" for i in range(1000)]
+
+        async def run(server):
+            async with self.dispatcher(server, concurrency=16) as dispatcher:
+                return await dispatcher.send(tokens, "Title", "Body", {"n": 1})
+
+        with MockFcmServer() as server:
+            started = time.perf_counter()
+            result = async_to_sync(run)(server)
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual((result.attempted, result.succeeded), (1000, 1000))
+        self.assertEqual(server.requests, 1000)
+        self.assertEqual(server.auth, {"Bearer test-token"})
+        # keep-alive: connections are reused, never more than the concurrency bound
+        self.assertLessEqual(len(server.connections), 16)
+        self.assertGreater(1000 / elapsed, 100)
+
+    def test_errors_map_to_outcomes(self):
+        async def run(server):
+            async with self.dispatcher(server) as dispatcher:
+                return await dispatcher.send(
+                    ["ok-1", "dead-1", "bad-1", "busy-1", "huge-1", "plain-1", "denied-1"], "Title", "Body",
+                )
+
+        with MockFcmServer() as server:
+            result = async_to_sync(run)(server)
+
+        # only errors about the token condemn it; payload, auth and server
+        # errors are retried without counting against the token
+        self.assertEqual(
+            [r.outcome for r in result.results],
+            [DELIVERED, UNREGISTERED, INVALID, RETRY, RETRY, RETRY, RETRY],
+        )
+        self.assertEqual(result.results[0].message_id, "projects/test/messages/ok-1")
+
+    def test_async_worker_drains_outbox(self):
+        for token in ["ok-a", "dead-a", "busy-a"]:
+            register_device_token(token, client_code="JAN-ASYNC1")
+        first = queue(recipient="JAN-ASYNC1", tokens=["ok-a", "dead-a", "busy-a"])
+        second = queue(recipient="JAN-ASYNC1", tokens=["ok-a"])
+
+        with MockFcmServer() as server, override_settings(FCM_ENDPOINT=server.url, FIREBASE_PROJECT_ID="test"), \
+                patch("notifications.dispatch.ServiceAccountTokens", return_value=lambda: "test-token"):
+            out = StringIO()
+            call_command("send_notifications", "--async", "--once", stdout=out)
+
+        self.assertIn("sent=1 retried=1", out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.status, NotificationOutbox.SENT)
+        self.assertEqual((first.status, first.tokens), (NotificationOutbox.PENDING, ["busy-a"]))
+        self.assertEqual(sorted(client_tokens("JAN-ASYNC1")), ["busy-a", "ok-a"])
+        self.assertEqual(DeviceToken.objects.get(token="busy-a").failures, 0)
+
+    def test_rejected_message_keeps_every_token(self):
+        tokens = ["huge-a", "huge-b"]
+        for token in tokens:
+            register_device_token(token, client_code="JAN-ASYNC2")
+        message = queue(recipient="JAN-ASYNC2", tokens=tokens)
+
+        with MockFcmServer() as server, override_settings(FCM_ENDPOINT=server.url, FIREBASE_PROJECT_ID="test"), \
+                patch("notifications.dispatch.ServiceAccountTokens", return_value=lambda: "test-token"):
+            call_command("send_notifications", "--async", "--once", stdout=StringIO())
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.tokens), (NotificationOutbox.PENDING, tokens))
+        self.assertEqual(sorted(client_tokens("JAN-ASYNC2")), tokens)
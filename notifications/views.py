@@ -4,7 +4,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import AttorneyDevice, ClientDevice
+from .services import register_device_token
 
 
 class AttorneyDeviceRegisterView(APIView):
@@ -12,7 +12,7 @@ class AttorneyDeviceRegisterView(APIView):
     POST /api/notifications/attorney/device/
     Body: { "device_id": "<fcm_token>" }
 
-    Appends the token into AttorneyDevice.device_ids (single row per user).
+    Upserts the token into DeviceToken, owned by the current user.
     """
     permission_classes = [IsAuthenticated]
 
@@ -24,16 +24,7 @@ class AttorneyDeviceRegisterView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        obj, _ = AttorneyDevice.objects.get_or_create(
-            user=request.user,
-            defaults={"device_ids": []},
-        )
-
-        devices = obj.device_ids or []
-        if device_id not in devices:
-            devices.append(device_id)
-            obj.device_ids = devices
-            obj.save(update_fields=["device_ids"])
+        register_device_token(device_id, user=request.user)
 
         return Response({"detail": "OK"}, status=status.HTTP_200_OK)
 
@@ -43,7 +34,7 @@ class ClientDeviceRegisterView(APIView):
     POST /api/notifications/client/device/
     Body: { "client_code": "<code>", "device_id": "<fcm_token>" }
 
-    Appends the token into ClientDevice.device_ids (single row per client_code).
+    Upserts the token into DeviceToken, owned by the client code.
     """
     permission_classes = [AllowAny]
 
@@ -57,15 +48,6 @@ class ClientDeviceRegisterView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        obj, _ = ClientDevice.objects.get_or_create(
-            client_code=client_code,
-            defaults={"device_ids": []},
-        )
-
-        devices = obj.device_ids or []
-        if device_id not in devices:
-            devices.append(device_id)
-            obj.device_ids = devices
-            obj.save(update_fields=["device_ids"])
+        register_device_token(device_id, client_code=client_code)
 
         return Response({"detail": "OK"}, status=status.HTTP_200_OK)